@@ -29,6 +29,7 @@ from agents.agent_prompts import (
     T3RN_INTRODUCTION,
     TOOL_RESULTS_ANALYSIS,
 )
+from async_runtime import run_coroutine
 from channel_logger import ChannelLogger
 from session import Session
 
@@ -126,6 +127,18 @@ class Agent(ABC):
             raise ValueError("Session must have a memory manager initialized")
 
         self.memory_manager = self.session_data.memory_manager
+        # Tokens of the LLM calls of the current message
+        self.turn_tokens = 0
+
+    def begin_turn(self, channel_logger: "ChannelLogger") -> None:
+        """
+        Prepare an agent kept for the whole session for the next user message
+
+        Agents live as long as their session (see workload_agent_system), only per-message
+        state is replaced here.
+        """
+        self.channel_logger = channel_logger
+        self.turn_tokens = 0
 
     @abstractmethod
     def get_system_prompt(
@@ -134,8 +147,21 @@ class Agent(ABC):
         """Get system prompt for this agent"""
         pass
 
-    @abstractmethod
+    async def commit_turn_async(self, result: AgentResult) -> None:
+        """
+        Store the answered turn in the conversation memory
+
+        Called by the agent cascade for the answer the player gets only, agents do not commit
+        their own results (a hedged or timed out turn may lose).
+        """
+        await self.memory_manager.finalize_current_cycle_async(result.messages)
+
     def execute(self, context: str) -> AgentResult:
+        """Execute the agent from synchronous code (runs execute_async on the shared event loop)"""
+        return run_coroutine(self.execute_async(context))
+
+    @abstractmethod
+    async def execute_async(self, context: str) -> AgentResult:
         """Execute the agent with given context"""
         pass
 
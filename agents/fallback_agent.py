@@ -4,36 +4,69 @@ Fallback Agent
 Simplified agent without loops or tools, uses only RAG knowledge
 """
 
-import os
+import asyncio
 import time
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from openai.types.chat import ChatCompletionMessageParam
 
+from agents.base_agent import Agent, AgentResult
+from agents.prompt_cache import provider_cache_usage
+from cancellation import TurnCancelled, run_with_timeout
 from channel_logger import ChannelLogger
+from llm_clients import get_async_openai_client
 from session import Session
 from tools.db_rag_get_general_knowledge import db_rag_get_general_knowledge
 
-try:
-    import openai
-
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
-from agents.base_agent import Agent, AgentResult
-
 
 class FallbackAgent(Agent):
     def __init__(self, session: "Session", channel_logger: "ChannelLogger"):
         super().__init__(session, channel_logger)
 
-        self.openai_client: Optional[openai.OpenAI] = None
+        # RAG preload started before the agent runs: (user message, task)
+        self._preload: Optional[Tuple[str, "asyncio.Future[Any]"]] = None
+
+    def preload_knowledge(self, user_message: str) -> None:
+        """
+        Start the RAG preload of user_message in the background (speculatively, the agent may not run)
 
-        if OPENAI_AVAILABLE:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
+        Must be called on the event loop; the search runs in its own cancel scope, so
+        cancel_preload also aborts its database query.
+        """
+        self.cancel_preload()
+        task = asyncio.ensure_future(
+            run_with_timeout(asyncio.to_thread(db_rag_get_general_knowledge, user_message), None, "FallbackAgent RAG preload cancelled")
+        )
+        self._preload = (user_message, task)
+
+    def cancel_preload(self) -> bool:
+        """
+        Discard a preload the agent did not use
+
+        Returns:
+            Whether an unused preload was discarded
+        """
+        if self._preload is None:
+            return False
+
+        _, task = self._preload
+        self._preload = None
+        if task.done():
+            # Retrieve a failure of the unused preload, asyncio would log it as never retrieved
+            if not task.cancelled():
+                task.exception()
+        else:
+            task.cancel()
+        return True
+
+    async def _general_knowledge(self, user_message: str) -> Any:
+        if self._preload is not None and self._preload[0] == user_message:
+            _, task = self._preload
+            self._preload = None
+            self.channel_logger.log_to_logs("🔮 FallbackAgent using speculative RAG preload")
+            return await task
+
+        return await asyncio.to_thread(db_rag_get_general_knowledge, user_message)
 
     def get_system_prompt(
         self,
@@ -44,30 +77,17 @@ class FallbackAgent(Agent):
             "CONTENT_RESTRICTIONS",
         )
 
-    def call_llm(self, messages: List["ChatCompletionMessageParam"]) -> Any:
-        if self.openai_client is None:
+    async def call_llm_async(self, messages: List["ChatCompletionMessageParam"]) -> Any:
+        async_client = get_async_openai_client()
+        if async_client is None:
             raise Exception("OpenAI not available for FallbackAgent")
 
         try:
             start_time = time.time()
 
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=messages,
-                temperature=0.5,
-                max_tokens=1000,
-            )
-
-            elapsed_time = time.time() - start_time
+            response = await async_client.chat.completions.create(**self._completion_arguments(messages))
 
-            # Log call info
-            prompt_tokens = response.usage.prompt_tokens if response.usage else 0
-            completion_tokens = response.usage.completion_tokens if response.usage else 0
-            total_tokens = response.usage.total_tokens if response.usage else 0
-
-            self.channel_logger.log_to_logs(
-                f"⚡ FallbackAgent completed in {elapsed_time:.3f}s ({prompt_tokens}+{completion_tokens}={total_tokens} tokens)"
-            )
+            self._log_completion(response, time.time() - start_time)
 
             return response
 
@@ -75,40 +95,67 @@ class FallbackAgent(Agent):
             self.channel_logger.log_to_logs(f"❌ FallbackAgent LLM error: {str(e)}")
             raise
 
-    def execute(self, user_message: str) -> AgentResult:
-        self.channel_logger.log_to_logs("🛡️ FallbackAgent starting with RAG knowledge")
+    def _completion_arguments(self, messages: List["ChatCompletionMessageParam"]) -> Dict[str, Any]:
+        return dict(
+            model="gpt-4.1-mini",
+            messages=messages,
+            temperature=0.5,
+            max_tokens=1000,
+        )
 
-        try:
-            # Pre-load RAG data
-            general_knowledge = db_rag_get_general_knowledge(user_message)
-            self.channel_logger.log_to_logs(f"🔍 FallbackAgent pre-loaded RAG data for: '{user_message}'")
+    def _log_completion(self, response: Any, elapsed_time: float) -> None:
+        # Log call info
+        prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+        completion_tokens = response.usage.completion_tokens if response.usage else 0
+        total_tokens = response.usage.total_tokens if response.usage else 0
+        cached_tokens = provider_cache_usage.record(response.usage)
+        self.turn_tokens += total_tokens
 
-            # Prepare simple messages
-            messages: List[ChatCompletionMessageParam] = []
-            system_messages: List[ChatCompletionMessageParam] = [{"role": "system", "content": self.get_system_prompt()}]
+        self.channel_logger.log_to_logs(
+            f"⚡ FallbackAgent completed in {elapsed_time:.3f}s ({prompt_tokens}+{completion_tokens}={total_tokens} tokens, {cached_tokens} cached)"
+        )
 
-            if general_knowledge:
-                system_messages.append(
-                    {
-                        "role": "system",
-                        "content": f"Available knowledge: {general_knowledge}",
-                    }
-                )
+    def _prompt_messages(self, user_message: str, general_knowledge: Any) -> List["ChatCompletionMessageParam"]:
+        system_messages: List[ChatCompletionMessageParam] = [{"role": "system", "content": self.get_system_prompt()}]
 
-            messages.append({"role": "user", "content": user_message})
+        if general_knowledge:
+            system_messages.append(
+                {
+                    "role": "system",
+                    "content": f"Available knowledge: {general_knowledge}",
+                }
+            )
 
-            self.channel_logger.log_to_logs("🤖 FallbackAgent calling ChatGPT-4o-mini without tools")
-            response = self.call_llm(system_messages + messages)
+        return system_messages + [{"role": "user", "content": user_message}]
+
+    def _result(self, user_message: str, response: Any) -> AgentResult:
+        response_content = response.choices[0].message.content or "No response generated"
+
+        self.channel_logger.log_to_logs("✅ FallbackAgent completed successfully")
 
-            response_content = response.choices[0].message.content or "No response generated"
+        messages: List[ChatCompletionMessageParam] = [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": response_content},
+        ]
 
-            self.channel_logger.log_to_logs("✅ FallbackAgent completed successfully")
+        # Whole conversation, the cascade commits it to memory if this answer is used
+        return AgentResult(self.memory_manager.prepare_messages_for_agent() + messages)
 
-            messages.append({"role": "assistant", "content": response_content})
+    async def execute_async(self, user_message: str) -> AgentResult:
+        self.channel_logger.log_to_logs("🛡️ FallbackAgent starting with RAG knowledge")
 
-            result = AgentResult(messages)
+        try:
+            # Pre-load RAG data
+            general_knowledge = await self._general_knowledge(user_message)
+            self.channel_logger.log_to_logs(f"🔍 FallbackAgent pre-loaded RAG data for: '{user_message}'")
 
-            return result
+            self.channel_logger.log_to_logs("🤖 FallbackAgent calling ChatGPT-4o-mini without tools")
+            response = await self.call_llm_async(self._prompt_messages(user_message, general_knowledge))
+
+            return self._result(user_message, response)
 
+        except TurnCancelled:
+            # Deadline and hedge cancellations keep their reason in the logs
+            raise
         except Exception:
             raise Exception("Fallback Agent logic error")
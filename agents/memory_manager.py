@@ -1,16 +1,17 @@
 import json
-import os
 import textwrap
 from typing import List, TypedDict
 from venv import logger
 
 import markdown
-import openai
 from bs4 import BeautifulSoup
 from openai.types.chat import ChatCompletionMessageParam
 
 from agents.base_agent import chat_completion_to_content_str
+from agents.tool_results import ToolResultStore
+from async_runtime import run_coroutine
 from channel_logger import ChannelLogger
+from llm_clients import get_async_openai_client
 from workload_config import AGENT_CONFIG
 
 
@@ -30,17 +31,12 @@ class MemoryManager:
 
         self.llm_summarization_count = 0
 
-        self.openai_client = None
-
         self.memory = self.initialize_session_memory()
+        # Tool results reused while their declared llm_cache_duration lasts
+        self.tool_results = ToolResultStore()
 
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            try:
-                self.openai_client = openai.OpenAI(api_key=api_key)
-            except Exception:
-                self.openai_client = None
-        else:
+        # Summaries use the shared keep-alive client, None without OPENAI_API_KEY
+        if get_async_openai_client() is None:
             logger.warning("Memory Menager will not use openAI for summarization (No API KEY)")
 
         self.channal_logger: ChannelLogger = channel_logger
@@ -65,14 +61,21 @@ class MemoryManager:
 
         return messages
 
-    def last_exchange(self) -> List["ChatCompletionMessageParam"]:
+    def last_exchange(self, last_user_message: str | None = None) -> List["ChatCompletionMessageParam"]:
+        """
+        Return the last user/assistant exchange. `last_user_message` overrides the stored
+        last user message (used to compute it before the turn starts, e.g. for prefetch).
+        """
+        if last_user_message is None:
+            last_user_message = self.memory["last_user_message"]
+
         messages = (
             self.memory["old_messages"]
             + self.memory["running_messages"]
             + [
                 {
                     "role": "user",
-                    "content": self.memory["last_user_message"] or "",
+                    "content": last_user_message or "",
                 }
             ]
         )
@@ -99,71 +102,83 @@ class MemoryManager:
         return []
 
     def finalize_current_cycle(self, messages: List["ChatCompletionMessageParam"]) -> None:
+        """finalize_current_cycle_async from synchronous code (runs on the shared event loop)"""
+        run_coroutine(self.finalize_current_cycle_async(messages))
+
+    async def finalize_current_cycle_async(self, messages: List["ChatCompletionMessageParam"]) -> None:
         # Update running messages with current state
         self.memory["running_messages"] = messages
 
-        total_size = sum(len(str(msg)) for msg in messages)
+        # Sumarization logic, summaries come from the async OpenAI client
 
-        # Sumarization logic
-        while len(messages) > self.max_exchanges or total_size > self.max_summary_size:
-            messages_to_summarize = messages[: self.max_exchanges // 2]
-            remaining_messages = messages[self.max_exchanges // 2 :]
+        while (summary_text := self._pending_summary_text()) is not None:
+            self._apply_summary(await self._summarize_text_async(summary_text, self.summary_target_after_llm))
 
-            summary_text = ""
-            for msg in messages_to_summarize:
-                role = msg["role"]
-                summary_text += f"{role}: {self._clean_markdown(chat_completion_to_content_str(msg))}\n"
+    def _pending_summary_text(self) -> str | None:
+        """Text to summarize when running messages exceed the limits (None if they fit)"""
+        messages = self.memory["running_messages"]
+        total_size = sum(len(str(msg)) for msg in messages)
+        if len(messages) <= self.max_exchanges and total_size <= self.max_summary_size:
+            return None
 
-            if self.memory["summary"]:
-                summary_text = f"{self.memory['summary']}\n\n{summary_text}"
+        summary_text = ""
+        for msg in messages[: self.max_exchanges // 2]:
+            role = msg["role"]
+            summary_text += f"{role}: {self._clean_markdown(chat_completion_to_content_str(msg))}\n"
 
-            compressed_summary = self._summarize_text(summary_text, self.summary_target_after_llm)
-            self.memory["summary"] = compressed_summary
+        if self.memory["summary"]:
+            summary_text = f"{self.memory['summary']}\n\n{summary_text}"
+        return summary_text
 
-            self.memory["running_messages"] = remaining_messages
-            self.memory["old_messages"].extend(messages_to_summarize)
+    def _apply_summary(self, compressed_summary: str) -> None:
+        messages = self.memory["running_messages"]
+        messages_to_summarize = messages[: self.max_exchanges // 2]
 
-            messages = remaining_messages
+        self.memory["summary"] = compressed_summary
+        self.memory["running_messages"] = messages[self.max_exchanges // 2 :]
+        self.memory["old_messages"].extend(messages_to_summarize)
 
-            total_size = sum(len(str(msg)) for msg in messages)
+        self.llm_summarization_count += 1
 
-            self.llm_summarization_count += 1
+    def _summary_request(self, text: str, target_size: int) -> dict:
+        # Calculate approximate character count (rough estimate: 1 byte per char for English)
+        target_chars = int(target_size * 0.8)  # Conservative estimate
 
-    def _summarize_text(self, text: str, target_size: int) -> str:
-        if self.openai_client is None:
-            return textwrap.shorten(text, width=target_size)
+        # Use OpenAI for intelligent summarization
+        prompt = f"Summarize the following text to approximately {target_chars} characters while preserving key information. Be concise:\n\n{text}"
 
-        try:
-            # Calculate approximate character count (rough estimate: 1 byte per char for English)
-            target_chars = int(target_size * 0.8)  # Conservative estimate
+        return dict(
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a helpful assistant that creates very concise summaries. Be extremely brief.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=self.summary_temperature,
+            max_completion_tokens=int(target_chars / 2),
+        )
 
-            # Use OpenAI for intelligent summarization
-            prompt = (
-                f"Summarize the following text to approximately {target_chars} characters while preserving key information. Be concise:\n\n{text}"
-            )
+    def _summary_from_response(self, response, text: str, target_size: int) -> str:
+        if response.choices[0].message.content is None:
+            logger.error("Empty response from OpenAI summarization")
+            return textwrap.shorten(text, width=target_size)
 
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that creates very concise summaries. Be extremely brief.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=self.summary_temperature,
-                max_completion_tokens=int(target_chars / 2),
-            )
+        summary = response.choices[0].message.content.strip()
 
-            if response.choices[0].message.content is None:
-                logger.error("Empty response from OpenAI summarization")
-                return textwrap.shorten(text, width=target_size)
+        summary = textwrap.shorten(summary, width=target_size)
 
-            summary = response.choices[0].message.content.strip()
+        return summary
 
-            summary = textwrap.shorten(summary, width=target_size)
+    async def _summarize_text_async(self, text: str, target_size: int) -> str:
+        async_client = get_async_openai_client()
+        if async_client is None:
+            return textwrap.shorten(text, width=target_size)
 
-            return summary
+        try:
+            response = await async_client.chat.completions.create(**self._summary_request(text, target_size))
+            return self._summary_from_response(response, text, target_size)
 
         except Exception as e:
             logger.error(f"Error summarizing text: {str(e)}")
@@ -4,10 +4,15 @@ from agents.modules.module import T3RNModule
 from session import Session
 from tools.db_get_battle_details import db_get_battle_details
 from tools.db_get_lore_details import db_get_lore_details
+from tools.db_rag_get_battle_details import RAG_TOOL_SPEC as BATTLE_DETAILS_RAG_SPEC
 from tools.db_rag_get_battle_details import db_rag_get_battle_details
+from tools.db_rag_get_gameplay_details import RAG_TOOL_SPEC as GAMEPLAY_DETAILS_RAG_SPEC
 from tools.db_rag_get_gameplay_details import db_rag_get_gameplay_details
+from tools.db_rag_get_general_knowledge import RAG_TOOL_SPEC as GENERAL_KNOWLEDGE_RAG_SPEC
 from tools.db_rag_get_general_knowledge import db_rag_get_general_knowledge
+from tools.db_rag_get_location_details import RAG_TOOL_SPEC as LOCATION_DETAILS_RAG_SPEC
 from tools.db_rag_get_location_details import db_rag_get_location_details
+from tools.db_rag_get_mechanic_details import RAG_TOOL_SPEC as MECHANIC_DETAILS_RAG_SPEC
 from tools.db_rag_get_mechanic_details import db_rag_get_mechanic_details
 from tools.db_rag_get_smalltalk import db_rag_get_smalltalk
 from tool import T3RNTool
@@ -73,6 +78,7 @@ Examples:
                     },
                     "required": ["query"],
                 },
+                rag_spec=MECHANIC_DETAILS_RAG_SPEC,
             ),
             T3RNTool(
                 name="getGameplayDetails",
@@ -103,6 +109,7 @@ Examples:
                     },
                     "required": ["query"],
                 },
+                rag_spec=GAMEPLAY_DETAILS_RAG_SPEC,
             ),
             T3RNTool(
                 name="getGeneralKnowledge",
@@ -127,6 +134,7 @@ This is a broad search tool that searches both general documents and Q&A section
                     },
                     "required": ["query"],
                 },
+                rag_spec=GENERAL_KNOWLEDGE_RAG_SPEC,
             ),
             T3RNTool(
                 name="getLocationDetails",
@@ -157,6 +165,7 @@ Examples:
                     },
                     "required": ["query"],
                 },
+                rag_spec=LOCATION_DETAILS_RAG_SPEC,
             ),
             T3RNTool(
                 name="getRagBattleDetails",
@@ -184,6 +193,7 @@ You should not use this tool when:
                     },
                     "required": ["query"],
                 },
+                rag_spec=BATTLE_DETAILS_RAG_SPEC,
             ),
             T3RNTool(
                 name="getLoreDetails",
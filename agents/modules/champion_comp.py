@@ -6,6 +6,7 @@ from tools.db_compare_champions import db_compare_champions
 from tools.db_find_champions_stronger_than import db_find_champions_stronger_than
 from tools.db_find_strongest_champions import db_find_strongest_champions
 from tool import T3RNTool
+from tool_cache import ToolCachePolicy
 
 
 class ChampionCompTools(T3RNModule):
@@ -46,6 +47,7 @@ Examples:
                     },
                     "required": ["champion_names"],
                 },
+                cache=ToolCachePolicy(unordered=("champion_names",)),
             ),
             T3RNTool(
                 name="findStrongestChampions",
@@ -96,6 +98,7 @@ Examples:
                     },
                     "required": [],
                 },
+                cache=ToolCachePolicy(),
             ),
             T3RNTool(
                 name="findChampionsStrongerThan",
@@ -153,5 +156,6 @@ Examples:
                     },
                     "required": ["character_name"],
                 },
+                cache=ToolCachePolicy(),
             ),
         ]
@@ -4,16 +4,19 @@ from typing import List
 from agents.modules.module import T3RNModule
 from session import Session
 from tools.db_get_champion_details import db_get_champion_details
-from tools.db_get_champions_list import db_get_champions_list_text
-from tools.db_rag_get_boss_details import db_rag_get_boss_details
+from tools.db_get_champions_list import db_get_champions_roster
+from tools.db_rag_common import execute_universal_rag_batch
+from tools.db_rag_get_boss_details import RAG_TOOL_SPEC as BOSS_DETAILS_RAG_SPEC
+from tools.db_rag_get_champion_details import RAG_TOOL_SPEC as CHAMPION_DETAILS_RAG_SPEC
 from tools.db_rag_get_champion_details import db_rag_get_champion_details
 from tool import T3RNTool
+from tool_cache import ToolCachePolicy
 
 
 def getChampionsDetails(champion_name: str, prefer_lore: bool = False, session: Session | None = None) -> str:
     champion = db_get_champion_details(champion_name)
-    boss = db_rag_get_boss_details(champion_name)
-    champ_rag = db_rag_get_champion_details(champion_name)
+    # Boss and champion RAG searches share one embedding and one SQL round trip
+    boss, champ_rag = execute_universal_rag_batch([(champion_name, BOSS_DETAILS_RAG_SPEC), (champion_name, CHAMPION_DETAILS_RAG_SPEC)])
 
     # TODO championMechanics
     # TODO make it session-aware
@@ -30,7 +33,7 @@ def getChampionsDetails(champion_name: str, prefer_lore: bool = False, session:
         response += f"{json.dumps(champ_rag)}\n"
 
     if champion["status"] != "success":
-        champ_list = db_get_champions_list_text()
+        champ_list, _ = db_get_champions_roster()
         return json.dumps(
             {
                 "status": "error",
@@ -43,6 +46,12 @@ def getChampionsDetails(champion_name: str, prefer_lore: bool = False, session:
         return response
 
 
+def _all_details_found(response: str) -> bool:
+    """Champion details, boss and champion RAG results all found (degraded responses are not shared)"""
+    lines = response.splitlines()
+    return len(lines) == 3 and all(json.loads(line).get("status") == "success" for line in lines)
+
+
 class ChampionTools(T3RNModule):
     def define_tools(self, session: "Session") -> List["T3RNTool"]:
         return [
@@ -82,6 +91,8 @@ Examples:
                     },
                     "required": ["champion_name"],
                 },
+                # Champion details and RAG snippets only change when the database is reloaded
+                cache=ToolCachePolicy(cacheable=_all_details_found),
             ),
             T3RNTool(
                 name="getRAGCharacterDetails",
@@ -100,5 +111,6 @@ Tool getRAGCharacterDetails allows the droid to retrieve information about a spe
                     },
                     "required": ["champion_name"],
                 },
+                rag_spec=CHAMPION_DETAILS_RAG_SPEC,
             ),
         ]
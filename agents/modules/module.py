@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC
 from typing import Iterable, List
 
@@ -19,7 +20,7 @@ class T3RNModule(ABC):
     # Callbacks order
     The order of injection is important:
     1. `before_user_message` - it is called on the beginning of execution
-    2. `define_tools` - it is called to define tools available for the agent
+    2. `define_tools` - it is called to define tools available for the agent (once, see Lifetime)
     2. `inject_start` - it collects messages that will be injected at the start of the every session
     3. `inject_before_user_message` - it collects messages that will be injected before the user message
     4. `inject_after_user_message` - it collects messages that will be injected after the user message
@@ -35,6 +36,16 @@ class T3RNModule(ABC):
     <inject_after_user_message>
     <LLM_RESPONSES>
     ```
+    With [PromptCache] layout = prefix_stable, <inject_start> follows <MESSAGE_HISTORY> instead
+    (see T3RNAgent.layout_messages).
+
+    # Async agent loop
+    `T3RNAgent.execute_async` awaits the `*_async` hook variants, the injections of all modules
+    run concurrently. By default they run the sync hooks on worker threads.
+
+    # Lifetime
+    Modules live as long as the agent, which is kept for the whole session: state stored on the
+    module (e.g. cooldowns) persists between messages. `define_tools` is called once per agent.
     # How to add module to the agent
     1) create new class that inherits from `T3RNModule`
     2) add module def in agent constructor
@@ -45,29 +56,28 @@ class T3RNModule(ABC):
         self.channel_logger = channel_logger
 
     def inject_start_and_log(self, session: "Session"):
-        injected_messages = self.inject_start(session)
-        if len(injected_messages) > 0:
-            total_characters = sum(len(chat_completion_to_content_str(msg)) for msg in injected_messages if "content" in msg)
-            self.channel_logger.log_to_logs(
-                f"Module {self.__class__.__name__} injected {len(injected_messages)}  ({total_characters} chars) messages on begining"
-            )
-        return injected_messages
+        return self._log_injection(self.inject_start(session), "on begining")
 
     def inject_before_user_message_and_log(self, session: "Session"):
-        injected_messages = self.inject_before_user_message(session)
-        if len(injected_messages) > 0:
-            total_characters = sum(len(chat_completion_to_content_str(msg)) for msg in injected_messages if "content" in msg)
-            self.channel_logger.log_to_logs(
-                f"Module {self.__class__.__name__} injected {len(injected_messages)}  ({total_characters} chars) messages before user"
-            )
-        return injected_messages
+        return self._log_injection(self.inject_before_user_message(session), "before user")
 
     def inject_after_user_message_and_log(self, session: "Session"):
-        injected_messages = self.inject_after_user_message(session)
+        return self._log_injection(self.inject_after_user_message(session), "after user")
+
+    async def inject_start_and_log_async(self, session: "Session"):
+        return self._log_injection(await self.inject_start_async(session), "on begining")
+
+    async def inject_before_user_message_and_log_async(self, session: "Session"):
+        return self._log_injection(await self.inject_before_user_message_async(session), "before user")
+
+    async def inject_after_user_message_and_log_async(self, session: "Session"):
+        return self._log_injection(await self.inject_after_user_message_async(session), "after user")
+
+    def _log_injection(self, injected_messages: List["ChatCompletionMessageParam"], position: str) -> List["ChatCompletionMessageParam"]:
         if len(injected_messages) > 0:
             total_characters = sum(len(chat_completion_to_content_str(msg)) for msg in injected_messages if "content" in msg)
             self.channel_logger.log_to_logs(
-                f"Module {self.__class__.__name__} injected {len(injected_messages)} ({total_characters} chars) messages after user"
+                f"Module {self.__class__.__name__} injected {len(injected_messages)} ({total_characters} chars) messages {position}"
             )
         return injected_messages
 
@@ -107,6 +117,31 @@ class T3RNModule(ABC):
         """
         return []
 
+    async def inject_start_async(self, session: "Session") -> List["ChatCompletionMessageParam"]:
+        """
+        Async variant of inject_start used by the async agent loop.
+        Runs inject_start on a worker thread unless overridden with a native async implementation.
+        """
+        return await self._run_sync_hook("inject_start", session)
+
+    async def inject_before_user_message_async(self, session: "Session") -> List["ChatCompletionMessageParam"]:
+        """
+        Async variant of inject_before_user_message (worker thread unless overridden).
+        """
+        return await self._run_sync_hook("inject_before_user_message", session)
+
+    async def inject_after_user_message_async(self, session: "Session") -> List["ChatCompletionMessageParam"]:
+        """
+        Async variant of inject_after_user_message (worker thread unless overridden).
+        """
+        return await self._run_sync_hook("inject_after_user_message", session)
+
+    async def _run_sync_hook(self, hook_name: str, session: "Session") -> List["ChatCompletionMessageParam"]:
+        # Hooks that are not overridden inject nothing, no worker thread needed
+        if getattr(type(self), hook_name) is getattr(T3RNModule, hook_name):
+            return []
+        return await asyncio.to_thread(getattr(self, hook_name), session)
+
     def define_tools(self, session: "Session") -> Iterable["T3RNTool"]:
         """
         Should define tools that are available for the agent.
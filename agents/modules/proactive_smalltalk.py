@@ -3,14 +3,13 @@ import logging
 import textwrap
 from typing import List
 
-import numpy as np
 from openai.types.chat import ChatCompletionMessageParam
-from sklearn.metrics.pairwise import cosine_similarity
 
 from agents.modules.module import T3RNModule
 from session import Session
 from tools.db_rag_common import generate_embedding_from_conv, search_qa_similarity
 from tools.db_rag_get_smalltalk import db_rag_get_smalltalk_from_embedding
+from vector_index import diversify_rows
 from workload_config import AGENT_CONFIG
 
 logger = logging.getLogger("ProactiveSmallTalk")
@@ -21,6 +20,7 @@ class ProactiveSmalltalk(T3RNModule):
 
     SIMILLARITY_THRESHOLD = AGENT_CONFIG.getfloat(SECTION, "similarity_threshold")
     VARIATION_THRESHOLD = AGENT_CONFIG.getfloat(SECTION, "variation_threshold")
+    MMR_LAMBDA = AGENT_CONFIG.getfloat(SECTION, "mmr_lambda", fallback=1.0)
     INJECT_MAX = AGENT_CONFIG.getint(SECTION, "inject_max")
     INJECT_MAX_SIZE = AGENT_CONFIG.getint(SECTION, "inject_max_size")
     INJECTION_COOLDOWN = AGENT_CONFIG.getint(SECTION, "injection_cooldown")
@@ -31,33 +31,6 @@ class ProactiveSmalltalk(T3RNModule):
         super().__init__(channel_logger)
         self.injection_cooldowns = dict()
 
-    def _cosine_matrix(self, smalltalks: List[dict]) -> np.ndarray:
-        simmilarity_scores = np.zeros((len(smalltalks), len(smalltalks)))
-
-        for i in range(len(smalltalks)):
-            for j in range(i + 1, len(smalltalks)):
-                simmilarity_scores[i][j] = cosine_similarity(
-                    smalltalks[i]["embedding"][np.newaxis, :],
-                    smalltalks[j]["embedding"][np.newaxis, :],
-                )
-                simmilarity_scores[j][i] = simmilarity_scores[i][j]
-
-        return simmilarity_scores
-
-    def _remove_duplicate(self, smalltalks: List[dict], simmilarity_scores: np.ndarray) -> List[dict]:
-        to_remove = set()
-        for i in range(len(smalltalks)):
-            for j in range(len(smalltalks)):
-                if i == j or i in to_remove or j in to_remove:
-                    continue
-                if simmilarity_scores[i][j] > self.VARIATION_THRESHOLD:
-                    if smalltalks[i]["similarity"] < smalltalks[j]["similarity"]:
-                        to_remove.add(i)
-                    else:
-                        to_remove.add(j)
-
-        return [s for i, s in enumerate(smalltalks) if i not in to_remove]
-
     def _apply_treshold(self, smalltalks: List[dict]) -> List[dict]:
         smalltalks_clean = [s for s in smalltalks if s["similarity"] >= self.SIMILLARITY_THRESHOLD]
         return smalltalks_clean
@@ -90,11 +63,13 @@ class ProactiveSmalltalk(T3RNModule):
         logger.info(f"Updated injection cooldowns: {self.injection_cooldowns}")
 
     def remove_duplicate(self, smalltalks: List[dict]) -> List[dict]:
-        simmilarity_scores = self._cosine_matrix(smalltalks)
-
-        logger.debug(f"Simmilarity scores matrix:\n{simmilarity_scores}\n")
-
-        smalltalks_clean = self._remove_duplicate(smalltalks, simmilarity_scores)
+        # MMR order; items more similar than variation_threshold to a better one are dropped
+        smalltalks_clean = diversify_rows(
+            smalltalks,
+            k=len(smalltalks),
+            lambda_mult=self.MMR_LAMBDA,
+            duplicate_threshold=self.VARIATION_THRESHOLD,
+        )
 
         smalltalks_clean = self._apply_treshold(smalltalks_clean)
 
@@ -108,7 +83,15 @@ class ProactiveSmalltalk(T3RNModule):
 
         last_exchange = memory.last_exchange()
 
-        embedding = generate_embedding_from_conv(last_exchange)
+        # Reuse searches started by the transport layer when they were made for the same exchange
+        prefetch = session.rag_prefetch if session.rag_prefetch and session.rag_prefetch.matches_conversation(last_exchange) else None
+
+        embedding = prefetch.result("conversation_embedding") if prefetch else None
+        if embedding is None:
+            prefetch = None
+            embedding = generate_embedding_from_conv(last_exchange)
+        else:
+            self.channel_logger.log_to_caches("⚡ ProactiveSmalltalk using prefetched embedding and searches")
 
         if embedding is None:
             self.channel_logger.log_to_logs("Failed to generate embedding, returning empty injection")
@@ -116,20 +99,27 @@ class ProactiveSmalltalk(T3RNModule):
             return []
 
         if self.USE_SMALLTALK:
-            smalltalks = db_rag_get_smalltalk_from_embedding(
-                embedding,
-                RAG_SMALLTALK_SEARCH_LIMIT=4,
-            )
+            smalltalks = prefetch.result("smalltalk") if prefetch else None
+            if smalltalks is None:
+                smalltalks = db_rag_get_smalltalk_from_embedding(
+                    embedding,
+                    RAG_SMALLTALK_SEARCH_LIMIT=4,
+                )
+            # Copy rows - prefetched lists must not be mutated by id prefixing
+            smalltalks = [dict(smalltalk) for smalltalk in smalltalks]
             for smalltalk in smalltalks:
                 smalltalk["id"] = "st" + str(smalltalk["id"])
         else:
             smalltalks = []
 
         if self.USE_QA:
-            questions_answers = search_qa_similarity(
-                embedding,
-                limit=4,
-            )
+            questions_answers = prefetch.result("qa") if prefetch else None
+            if questions_answers is None:
+                questions_answers = search_qa_similarity(
+                    embedding,
+                    limit=4,
+                )
+            questions_answers = [dict(qa) for qa in questions_answers]
             for qa in questions_answers:
                 qa["id"] = "qa" + str(qa["id"])
         else:
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Prompt Cache
+Assembled system prompts cached by their inputs (character variant, module set, roster version)
+and usage of the provider-side prompt cache (cached prompt tokens reported by OpenAI)
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Tuple
+
+from context_packer import count_tokens
+from workload_config import AGENT_CONFIG
+
+SECTION = "PromptCache"
+
+PROMPT_LAYOUTS = ("legacy", "prefix_stable")
+
+
+@dataclass(frozen=True)
+class CachedPrompt:
+    text: str
+    # Token count of text (o200k_base), for context budgeting
+    tokens: int
+    # Increases every time a prompt is (re)built, identifies the exact prompt version in logs
+    version: int
+
+
+class SystemPromptCache:
+    """
+    LRU cache of assembled system prompts.
+
+    The key must contain every input of the prompt; a prompt is only rebuilt when one of
+    them changes (or the entry is evicted).
+    """
+
+    def __init__(self, name: str, max_entries: int = 16, enabled: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedPrompt]" = OrderedDict()
+        self._builds = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> Tuple[CachedPrompt, bool]:
+        """
+        Cached prompt for key, built with build() on a miss
+
+        Returns:
+            The prompt and whether it came from the cache
+        """
+        with self._lock:
+            if self.enabled and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+            self.misses += 1
+
+        # Built outside the lock, concurrent misses of the same key just build it twice
+        text = build()
+        with self._lock:
+            self._builds += 1
+            prompt = CachedPrompt(text=text, tokens=count_tokens(text), version=self._builds)
+            if self.enabled:
+                self._entries[key] = prompt
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return prompt, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def format_stats(self) -> str:
+        with self._lock:
+            if not self.enabled:
+                return f"🧾 {self.name}: disabled"
+            lookups = self.hits + self.misses
+            hit_rate = self.hits / lookups if lookups else 0.0
+            return f"🧾 {self.name}: {self.hits}/{lookups} hits ({hit_rate:.1%}), {self._builds} builds, {len(self._entries)} entries"
+
+
+system_prompt_cache = SystemPromptCache(
+    name="System prompt cache",
+    max_entries=AGENT_CONFIG.getint(SECTION, "max_entries", fallback=16),
+    enabled=AGENT_CONFIG.getboolean(SECTION, "enable", fallback=True),
+)
+
+
+class ProviderCacheUsage:
+    """
+    Prompt tokens served from the provider prompt cache
+
+    OpenAI caches prompt prefixes (from 1024 tokens, in 128 token steps) and reports the reused
+    part as usage.prompt_tokens_details.cached_tokens.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage: Any) -> int:
+        """
+        Record the usage of one completion
+
+        Args:
+            usage: `response.usage` of a chat completion (may be None)
+
+        Returns:
+            Number of cached prompt tokens of the call
+        """
+        if usage is None:
+            return 0
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+
+        with self._lock:
+            self.calls += 1
+            self.cached_calls += 1 if cached_tokens else 0
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.cached_tokens += cached_tokens
+        return cached_tokens
+
+    def format_stats(self) -> str:
+        with self._lock:
+            token_rate = self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            return (
+                f"🧾 {self.name}: {self.cached_tokens}/{self.prompt_tokens} prompt tokens cached ({token_rate:.1%}), "
+                f"{self.cached_calls}/{self.calls} calls hit"
+            )
+
+
+provider_cache_usage = ProviderCacheUsage(name="OpenAI prompt cache")
@@ -22,7 +22,7 @@ class SimpleFallbackAgent(Agent):
     def get_system_prompt(self) -> str:
         return self.build_prompt("CHARACTER_BASE_T3RN")
 
-    def execute(self, user_message: str) -> AgentResult:
+    async def execute_async(self, user_message: str) -> AgentResult:
         fallback_response = random.choice(T3RN_MALFUNCTION_MESSAGES)
 
         old_messages = self.memory_manager.prepare_messages_for_agent()
@@ -1,15 +1,16 @@
+import asyncio
 import json
-import os
 import random
 import time
-from typing import List, Type
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Set, Tuple, Type
 
-import openai
 from openai import NOT_GIVEN
 from openai.types.chat import (
     ChatCompletion,
     ChatCompletionMessageParam,
     ChatCompletionMessageToolCall,
+    ChatCompletionToolParam,
 )
 
 from agents.agent_prompts import T3RN_FINAL_ITERATION_PROMPT
@@ -33,22 +34,51 @@ from agents.modules.module import (
     build_system_instructions_from_tools,
     get_tool_by_name,
 )
+from agents.prompt_cache import PROMPT_LAYOUTS, provider_cache_usage, system_prompt_cache
+from agents.tool_results import tool_result_content
+from async_runtime import run_in_executor
+from cancellation import TurnCancelled, check_cancelled, remaining_budget, run_with_timeout
 from channel_logger import ChannelLogger
+from llm_clients import get_async_openai_client
 from session import Session
 from tool import T3RNTool
-from tools.db_get_champions_list import db_get_champions_list_text
+from tools.db_get_champions_list import db_get_champions_roster
+from tools.db_rag_common import RagToolSpec, execute_universal_rag_batch
 from workload_config import AGENT_CONFIG
 
+# Sync tool calls of all sessions run on this pool. A timeout cannot stop a running thread: the
+# cancel scope aborts its database queries, other blocking calls keep their worker until they
+# return, so the pool is sized for hung calls as well ([T3RNAgent] tool_workers)
+_tool_executor = ThreadPoolExecutor(max_workers=AGENT_CONFIG.getint("T3RNAgent", "tool_workers", fallback=16), thread_name_prefix="t3rn-tool")
+# Seconds a tool call may take unless the tool sets its own timeout
+DEFAULT_TOOL_TIMEOUT = AGENT_CONFIG.getfloat("T3RNAgent", "tool_timeout", fallback=20.0)
+# Expected seconds of one LLM call; a tool iteration needs two (tool calls, then the final answer)
+LLM_CALL_BUDGET = AGENT_CONFIG.getfloat("T3RNAgent", "llm_call_budget", fallback=4.0)
+
+# legacy: character first, rolled every message; prefix_stable: static content first, character fixed per session
+PROMPT_LAYOUT = AGENT_CONFIG.get("PromptCache", "layout", fallback="legacy")
+if PROMPT_LAYOUT not in PROMPT_LAYOUTS:
+    raise ValueError(f"Unknown prompt layout '{PROMPT_LAYOUT}', available: {', '.join(PROMPT_LAYOUTS)}")
+
+
+def tool_error_result(function_name: str, message: str) -> dict:
+    """Result of a failed tool call, returned to the LLM instead of aborting the turn"""
+    return {
+        "status": "error",
+        "message": message,
+        "internal_info": {"function_name": function_name, "error": message},
+    }
+
 
 class T3RNAgent(Agent):
     def __init__(self, session: "Session", channel_logger: "ChannelLogger"):
         super().__init__(session, channel_logger)
 
-        self.openai_client = None
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.openai_client = openai.OpenAI(api_key=api_key)
+        # Token count of the last system prompt, for context budgeting
+        self.system_prompt_tokens = 0
+        # Tools and their schemas are built once, the agent lives as long as its session
+        self.tools: Optional[List[T3RNTool]] = None
+        self.tool_schemas: Tuple["ChatCompletionToolParam", ...] = ()
 
         self.MODULES: List[T3RNModule] = []
 
@@ -78,13 +108,32 @@ class T3RNAgent(Agent):
         self.MODULES.append(module)
         self.channel_logger.log_to_logs(f"✅ Module {module_name} is loaded")
 
-    def collect_tools(self) -> List["T3RNTool"]:
-        tools: List["T3RNTool"] = []
+    def begin_turn(self, channel_logger: "ChannelLogger") -> None:
+        super().begin_turn(channel_logger)
         for module in self.MODULES:
-            tools.extend(module.define_tools(self.session_data))
-        return tools
+            module.channel_logger = channel_logger
+
+    async def commit_turn_async(self, result: AgentResult) -> None:
+        await super().commit_turn_async(result)
+
+        for module in self.MODULES:
+            self.session_data = module.after_user_message(self.session_data)
+
+    def collect_tools(self) -> List["T3RNTool"]:
+        # Tools only depend on the session object, which outlives every message
+        if self.tools is None:
+            tools: List["T3RNTool"] = []
+            for module in self.MODULES:
+                tools.extend(module.define_tools(self.session_data))
+            self.tools = tools
+            self.tool_schemas = tuple(tool.get_function_schema() for tool in tools)
+        return self.tools
 
     def _get_character(self):
+        # A character kept for the whole session keeps the prompt prefix identical between messages
+        if PROMPT_LAYOUT == "prefix_stable" and self.session_data.character is not None:
+            return self.session_data.character
+
         t3rn_weight = AGENT_CONFIG.getfloat("T3RNAgent", "t3rn_character_weight", fallback=0.5)
         t4rn_weight = 1.0 - t3rn_weight
 
@@ -92,18 +141,51 @@ class T3RNAgent(Agent):
             ["CHARACTER_BASE_T3RN", "CHARACTER_BASE_T4RN"],
             weights=[t3rn_weight, t4rn_weight],
         )[0]
+        self.session_data.character = character_prompt
         return character_prompt
 
     def get_system_prompt(self, tools: List["T3RNTool"]) -> str:
-        self.champions_list = db_get_champions_list_text()
-        champions_and_bosses = f"""# CHAMPIONS LIST:\n{self.champions_list}"""
-        tool_prompts = build_system_instructions_from_tools(tools)
+        champions_list, roster_version = db_get_champions_roster()
+        self.champions_list = champions_list
 
         character_prompt = self._get_character()
 
         if hasattr(self, "channel_logger") and self.channel_logger:
             self.channel_logger.log_to_logs(f"🎲 Selected character: {character_prompt}")
 
+        # Every input of the prompt: it is only reassembled when one of them changes
+        cache_key = (
+            character_prompt if PROMPT_LAYOUT == "legacy" else None,
+            tuple(module.__class__.__name__ for module in self.MODULES),
+            tuple((tool.name, tool.system_prompt) for tool in tools),
+            roster_version,
+        )
+        prompt, cached = system_prompt_cache.get(cache_key, lambda: self._build_system_prompt(character_prompt, champions_list, tools))
+        self.system_prompt_tokens = prompt.tokens
+
+        if hasattr(self, "channel_logger") and self.channel_logger:
+            self.channel_logger.log_to_logs(f"🧾 System prompt v{prompt.version}: {prompt.tokens} tokens ({'cached' if cached else 'assembled'})")
+
+        return prompt.text
+
+    def _build_system_prompt(self, character_prompt: str, champions_list: str, tools: List["T3RNTool"]) -> str:
+        champions_and_bosses = f"""# CHAMPIONS LIST:\n{champions_list}"""
+        tool_prompts = build_system_instructions_from_tools(tools)
+
+        if PROMPT_LAYOUT == "prefix_stable":
+            # Static content only, the character follows in its own message (see layout_messages)
+            return self.build_prompt(
+                "GAME_CONTEXT",
+                "QUESTION_ANALYZER_INITIAL_TASK",
+                "QUESTION_ANALYZER_RULES",
+                "CONTENT_RESTRICTIONS",
+                "TOOL_RESULTS_ANALYSIS",
+                "MOBILE_FORMAT",
+                "CHAMPIONS_AND_BOSSES",
+                champions_and_bosses,
+                tool_prompts,
+            )
+
         return self.build_prompt(
             character_prompt,
             "GAME_CONTEXT",
@@ -117,49 +199,94 @@ class T3RNAgent(Agent):
             "MOBILE_FORMAT",
         )
 
-    def call_llm(
+    def layout_messages(
+        self,
+        tools: List["T3RNTool"],
+        start_messages: List["ChatCompletionMessageParam"],
+        history: List["ChatCompletionMessageParam"],
+        turn_messages: List["ChatCompletionMessageParam"],
+    ) -> List["ChatCompletionMessageParam"]:
+        """
+        Order the conversation sent to the LLM according to PROMPT_LAYOUT
+
+        prefix_stable orders content from the most static to the most dynamic, so the provider
+        prompt cache can reuse the longest possible prefix: static system prompt (shared by all
+        sessions), session character, conversation history (append-only), module start
+        injections (screen, summary, greetings), then the messages of this turn.
+
+        Args:
+            tools: Tools available to the agent
+            start_messages: Messages injected by modules at the start of the conversation
+            history: Previous messages of the conversation
+            turn_messages: Injections around the user message and the user message itself
+
+        Returns:
+            Messages preceding the LLM iterations of this turn
+        """
+        system_prompt = self.get_system_prompt(tools)
+        system_messages: List["ChatCompletionMessageParam"] = [{"role": "system", "content": system_prompt}]
+
+        if PROMPT_LAYOUT == "prefix_stable":
+            system_messages.append({"role": "system", "content": self.build_prompt(self.session_data.character)})
+            return system_messages + history + start_messages + turn_messages
+
+        return system_messages + start_messages + history + turn_messages
+
+    def _completion_arguments(
+        self,
+        messages: List["ChatCompletionMessageParam"],
+        tools: List["T3RNTool"],
+        use_tools: bool,
+        use_json: bool,
+    ) -> Dict[str, Any]:
+        return dict(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=AGENT_CONFIG.getfloat("T3RNAgent", "agent_temperature"),
+            max_completion_tokens=AGENT_CONFIG.getint("T3RNAgent", "max_completion_tokens"),
+            tools=self.tool_schemas if tools is self.tools else [tool.get_function_schema() for tool in tools],
+            tool_choice="auto" if use_tools else "none",
+            response_format={"type": "json_object"} if use_json else NOT_GIVEN,
+        )
+
+    def _log_completion(self, messages: List["ChatCompletionMessageParam"], response: "ChatCompletion", elapsed_time: float) -> None:
+        prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+        completion_tokens = response.usage.completion_tokens if response.usage else 0
+        total_tokens = response.usage.total_tokens if response.usage else 0
+        cached_tokens = provider_cache_usage.record(response.usage)
+        self.turn_tokens += total_tokens
+
+        self.channel_logger.log_to_logs(
+            f"⚡ gpt-4o-mini completed in {elapsed_time:.3f}s ({prompt_tokens}+{completion_tokens}={total_tokens} tokens, {cached_tokens} cached)"
+        )
+
+        self._log_state(
+            messages,
+            chat_response_to_str(response),
+        )
+
+    async def call_llm_async(
         self,
         messages: List["ChatCompletionMessageParam"],
         tools: List["T3RNTool"],
         use_tools: bool = True,
         use_json: bool = False,
     ) -> "ChatCompletion":
-        if self.openai_client is not None:
-            try:
-                start_time = time.time()
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    temperature=AGENT_CONFIG.getfloat("T3RNAgent", "agent_temperature"),
-                    max_completion_tokens=AGENT_CONFIG.getint("T3RNAgent", "max_completion_tokens"),
-                    tools=[tool.get_function_schema() for tool in tools],
-                    tool_choice="auto" if use_tools else "none",
-                    response_format={"type": "json_object"} if use_json else NOT_GIVEN,
-                )
-
-                elapsed_time = time.time() - start_time
-
-                prompt_tokens = response.usage.prompt_tokens if response.usage else 0
-                completion_tokens = response.usage.completion_tokens if response.usage else 0
-                total_tokens = response.usage.total_tokens if response.usage else 0
-
-                self.channel_logger.log_to_logs(
-                    f"⚡ gpt-4o-mini completed in {elapsed_time:.3f}s ({prompt_tokens}+{completion_tokens}={total_tokens} tokens)"
-                )
-
-                self._log_state(
-                    messages,
-                    chat_response_to_str(response),
-                )
-
-                return response
-
-            except Exception as e:
-                self.channel_logger.log_to_logs(f"❌ OpenAI API call failed: {str(e)}")
-                raise Exception(f"T3rnAgent OpenAI API call failed: {str(e)}")
-        else:
+        """Chat completion on the shared AsyncOpenAI client, cancelling the task aborts the HTTP request"""
+        async_client = get_async_openai_client()
+        if async_client is None:
             raise Exception("OpenAI API not available or not configured")
 
+        try:
+            start_time = time.time()
+            response = await async_client.chat.completions.create(**self._completion_arguments(messages, tools, use_tools, use_json))
+            self._log_completion(messages, response, time.time() - start_time)
+            return response
+
+        except Exception as e:
+            self.channel_logger.log_to_logs(f"❌ OpenAI API call failed: {str(e)}")
+            raise Exception(f"T3rnAgent OpenAI API call failed: {str(e)}")
+
     def _is_tool_result_error(self, result_str: str) -> bool:
         import json
 
@@ -169,115 +296,307 @@ class T3RNAgent(Agent):
         except (json.JSONDecodeError, TypeError):
             return result_str.strip().lower().startswith(("error:", "tool execution error:"))
 
-    def process_and_execute_tools(
+    def execute_rag_tool_batch(self, requests: Dict[int, Tuple[str, "RagToolSpec"]]) -> Dict[int, dict]:
+        """
+        Run RAG tool calls of one LLM response together (one embedding batch, one SQL round trip)
+
+        Args:
+            requests: Tool call index -> (query, RAG spec of the tool)
+
+        Returns:
+            Tool results keyed by tool call index
+        """
+        results = execute_universal_rag_batch(list(requests.values()))
+        return dict(zip(requests.keys(), results))
+
+    def _rag_batch_requests(self, calls: Dict[int, Tuple["T3RNTool", dict]]) -> Dict[int, Tuple[str, "RagToolSpec"]]:
+        """RAG tool calls that can run as one batch (empty if fewer than two)"""
+        requests: Dict[int, Tuple[str, "RagToolSpec"]] = {}
+        for idx, (tool, function_args) in calls.items():
+            if tool.rag_spec is None:
+                continue
+            query = function_args.get(tool.rag_spec.query_parameter)
+            if isinstance(query, str):
+                requests[idx] = (query, tool.rag_spec)
+
+        return requests if len(requests) >= 2 else {}
+
+    @staticmethod
+    async def _timed_call_async(awaitable: Awaitable[Any]) -> Tuple[Any, float]:
+        start_time = time.time()
+        result = await awaitable
+        return result, time.time() - start_time
+
+    def _parse_tool_calls(
         self,
         tool_calls: List["ChatCompletionMessageToolCall"],
         tools: List["T3RNTool"],
+    ) -> Tuple[Dict[int, Tuple["T3RNTool", dict]], Dict[int, Any], Set[int]]:
+        """
+        Resolve tool calls to tools and arguments
+
+        Returns:
+            Executable calls by index, error results of invalid calls, indexes of invalid calls
+        """
+        calls: Dict[int, Tuple["T3RNTool", dict]] = {}
+        results: Dict[int, Any] = {}
+        failed: Set[int] = set()
+
+        for idx, tool_call in enumerate(tool_calls):
+            function_name = tool_call.function.name
+            function_args = tool_call.function.arguments
+
+            if isinstance(function_args, str):
+                try:
+                    function_args = json.loads(function_args)
+                except json.JSONDecodeError as e:
+                    results[idx] = tool_error_result(function_name, f"Invalid JSON in arguments: {str(e)}")
+                    failed.add(idx)
+                    continue
+
+            tool_function = get_tool_by_name(tools, function_name)
+            if tool_function is None:
+                results[idx] = tool_error_result(function_name, f"Unknown tool: {function_name}")
+                failed.add(idx)
+                continue
+
+            calls[idx] = (tool_function, function_args if isinstance(function_args, dict) else {})
+
+        return calls, results, failed
+
+    async def process_and_execute_tools_async(
+        self,
+        tool_calls: List["ChatCompletionMessageToolCall"],
+        tools: List["T3RNTool"],
+        context: Iterable["ChatCompletionMessageParam"] = (),
     ) -> List["ChatCompletionMessageParam"]:
-        result_messages: List["ChatCompletionMessageParam"] = []
+        """
+        Execute the tool calls of one LLM response concurrently
+
+        Sync tools run on a bounded thread pool (RAG tool calls together as one batch). Every call
+        runs in its own cancel scope with its own timeout: a failing or timed out call yields an
+        error result for that call only and its in-flight database queries are cancelled.
+        Calls with a result in the session tool result store are not run (see
+        agents.tool_results), context are the messages the LLM saw. Result messages keep the
+        order of tool_calls.
+        """
         if not tool_calls:
             self.channel_logger.log_to_logs("⚠️ No tool calls provided")
             return []
 
         self.channel_logger.log_to_logs(f"🔧 Will execute {len(tool_calls)} tools total (including complementary)")
 
-        for idx, tool_call in enumerate(tool_calls):
-            function_name = tool_call.function.name
-            function_args = tool_call.function.arguments
+        start_time = time.time()
+        calls, results, failed = self._parse_tool_calls(tool_calls, tools)
+        results.update(self._stored_tool_results(calls, context))
+        pending_calls = {idx: call for idx, call in calls.items() if idx not in results}
+
+        batch_requests = self._rag_batch_requests(pending_calls)
+        batch_task: Optional[asyncio.Future] = None
+        if batch_requests:
+            batch_task = asyncio.ensure_future(self._timed_call_async(run_in_executor(_tool_executor, self.execute_rag_tool_batch, batch_requests)))
+            self.channel_logger.log_to_logs(f"🔧 Batching {len(batch_requests)} RAG tool calls")
 
+        async def run_call(idx: int, tool_function: "T3RNTool", function_args: dict) -> float:
+            timeout = tool_function.timeout if tool_function.timeout is not None else DEFAULT_TOOL_TIMEOUT
             try:
-                if isinstance(function_args, str):
-                    try:
-                        function_args = json.loads(function_args)
-                    except json.JSONDecodeError as e:
-                        error_msg = f"Invalid JSON in arguments: {str(e)}"
-                        self.channel_logger.log_to_tools(error_msg)
-                        # TODO more soft error handling
-                        raise Exception(f"Tool execution failed: {error_msg}")
-
-                tool_function = get_tool_by_name(tools, function_name)
-
-                if tool_function is None:
-                    error_msg = f"Unknown tool: {function_name}"
-                    # TODO more soft error handling
-                    raise Exception(f"Tool execution failed: {error_msg}")
-
-                start_time = time.time()
-                try:
-                    result = tool_function(**function_args)
-                except Exception as e:
-                    raise Exception(f"Tool execution failed in dramatic way: {e}")
+                if batch_task is not None and idx in batch_requests:
+                    # The batch is shared by several calls, a timeout of one call must not cancel it
+                    batch_results, elapsed_time = await run_with_timeout(
+                        asyncio.shield(batch_task), timeout, f"Tool {tool_function.name} timed out after {timeout:.1f}s"
+                    )
+                    result, elapsed_time = batch_results[idx], elapsed_time / len(batch_requests)
+                else:
+                    result, elapsed_time = await run_with_timeout(
+                        self._timed_call_async(tool_function.call_async(_tool_executor, **function_args)),
+                        timeout,
+                        f"Tool {tool_function.name} timed out after {timeout:.1f}s",
+                    )
+                self.channel_logger.log_to_logs(f"🔧 {tool_function.name} executed in {elapsed_time:.3f}s ({len(str(result))} chars)")
+            except TurnCancelled as e:
+                result, elapsed_time = tool_error_result(tool_function.name, str(e)), 0.0
+                failed.add(idx)
+            except Exception as e:
+                result, elapsed_time = tool_error_result(tool_function.name, f"Tool execution failed: {str(e)}"), 0.0
+                failed.add(idx)
+            results[idx] = result
+            return elapsed_time
 
-                elapsed_time = time.time() - start_time
+        tool_times = await asyncio.gather(
+            *(run_call(idx, tool_function, function_args) for idx, (tool_function, function_args) in pending_calls.items())
+        )
 
-                self.channel_logger.log_to_logs(f"🔧 {function_name} executed in {elapsed_time:.3f}s ({len(str(result))} chars)")
-                self.channel_logger.log_tool_call(function_name, function_args, result, idx + 1)
+        self.channel_logger.log_to_logs(
+            f"🔧 {len(tool_calls)} tools finished in {time.time() - start_time:.3f}s (sum of tool times {sum(tool_times):.3f}s)"
+        )
+        self._store_tool_results(pending_calls, results, failed)
 
-                result_messages.append(
-                    {
-                        "role": "assistant",
-                        "function_call": {
-                            "name": function_name,
-                            "arguments": tool_call.function.arguments
-                            if isinstance(tool_call.function.arguments, str)
-                            else json.dumps(tool_call.function.arguments),
-                        },
-                    }
-                )
-                result_messages.append(
-                    {
-                        "role": "function",
-                        "name": function_name,
-                        "content": str(json.dumps(result)) if isinstance(result, dict) else str(result),
-                    }
-                )
+        return self._tool_result_messages(tool_calls, calls, results, failed)
 
-            except Exception as e:
-                self.channel_logger.log_to_logs(f"❌ Error during tool execute: {e}")
-                self.channel_logger.log_to_tools(f"❌ Error during tool execute: {e}")
-                raise Exception(f"Tool execution failed: {str(e)}")
+    def _stored_tool_results(
+        self,
+        calls: Dict[int, Tuple["T3RNTool", dict]],
+        context: Iterable["ChatCompletionMessageParam"],
+    ) -> Dict[int, Any]:
+        """Results of calls answered from the session tool result store, by tool call index"""
+        context = list(context)
+        results: Dict[int, Any] = {}
+        for idx, (tool_function, function_args) in calls.items():
+            result = self.memory_manager.tool_results.get(tool_function.name, function_args, context)
+            if result is not None:
+                results[idx] = result
+                kind = "reference" if result.get("cached") else "stored result"
+                self.channel_logger.log_to_logs(f"♻️ {tool_function.name} answered with {kind} from earlier in the session")
+        return results
+
+    def _store_tool_results(self, calls: Dict[int, Tuple["T3RNTool", dict]], results: Dict[int, Any], failed: Set[int]) -> None:
+        for idx, (tool_function, function_args) in calls.items():
+            if idx not in failed:
+                self.memory_manager.tool_results.put(tool_function.name, function_args, results[idx])
+
+    def _tool_result_messages(
+        self,
+        tool_calls: List["ChatCompletionMessageToolCall"],
+        calls: Dict[int, Tuple["T3RNTool", dict]],
+        results: Dict[int, Any],
+        failed: Set[int],
+    ) -> List["ChatCompletionMessageParam"]:
+        """Log tool results and turn them into messages, in the order of tool_calls"""
+        result_messages: List["ChatCompletionMessageParam"] = []
+        for idx, tool_call in enumerate(tool_calls):
+            function_name = tool_call.function.name
+            result = results[idx]
+            if idx in failed:
+                self.channel_logger.log_to_logs(f"❌ Error during tool execute: {result['message']}")
+                self.channel_logger.log_to_tools(f"❌ Error during tool execute: {result['message']}")
 
-        return result_messages
+            self.channel_logger.log_tool_call(function_name, calls[idx][1] if idx in calls else tool_call.function.arguments, result, idx + 1)
 
-    def execute(self, user_message: str) -> AgentResult:
-        self.channel_logger.log_to_logs("🚀 T3rnAgent starting with internal tool loop")
+            result_messages.append(
+                {
+                    "role": "assistant",
+                    "function_call": {
+                        "name": function_name,
+                        "arguments": tool_call.function.arguments
+                        if isinstance(tool_call.function.arguments, str)
+                        else json.dumps(tool_call.function.arguments),
+                    },
+                }
+            )
+            result_messages.append(
+                {
+                    "role": "function",
+                    "name": function_name,
+                    "content": tool_result_content(result),
+                }
+            )
+
+        return result_messages
 
+    def _begin_execute(self, user_message: str) -> Tuple[List["T3RNTool"], List["ChatCompletionMessageParam"]]:
+        """Start of a turn: tools and history of the conversation"""
         if self.memory_manager is None:
             raise Exception("MemoryManager not set - should be passed from session")
 
         self.memory_manager.memory["last_user_message"] = user_message
+        self.memory_manager.tool_results.begin_turn()
 
         for module in self.MODULES:
             self.session_data = module.before_user_message(self.session_data)
 
-        tools = self.collect_tools()
+        return self.collect_tools(), self.memory_manager.prepare_messages_for_agent()
+
+    def _iteration_messages(
+        self,
+        prompt_messages: List["ChatCompletionMessageParam"],
+        current_messages: List["ChatCompletionMessageParam"],
+        final_iteration: bool,
+    ) -> List["ChatCompletionMessageParam"]:
+        if final_iteration:
+            return (
+                prompt_messages
+                + current_messages
+                + [
+                    {
+                        "role": "system",
+                        "content": T3RN_FINAL_ITERATION_PROMPT,
+                    }
+                ]
+            )
+        return prompt_messages + current_messages
+
+    def _is_final_iteration(self, iteration: int, max_iterations: int) -> bool:
+        """Last iteration (no tools) by count, or earlier when the deadline leaves no time for another tool round"""
+        if iteration >= max_iterations:
+            return True
+
+        remaining = remaining_budget()
+        if remaining is not None and remaining < 2 * LLM_CALL_BUDGET:
+            self.channel_logger.log_to_logs(f"⏱️ {remaining:.1f}s left, forcing final answer in iteration {iteration}")
+            return True
+        return False
+
+    def _final_result(
+        self,
+        response: "ChatCompletion",
+        memory_messages: List["ChatCompletionMessageParam"],
+        current_messages: List["ChatCompletionMessageParam"],
+        iteration: int,
+    ) -> AgentResult:
+        response_content = chat_response_to_str(response, content_only=True)
+
+        current_messages.append({"role": "assistant", "content": response_content})
 
-        memory_messages = self.memory_manager.prepare_messages_for_agent()
+        self.channel_logger.log_to_logs(f"✅ T3RNAgent completed after {iteration} iterations")
 
-        # Messages added to the beginning of the conversation
-        system_messages: List["ChatCompletionMessageParam"] = []
-        # Messages from the current iterations of LLM (e.g. tool calls and responses)
-        current_messages: List["ChatCompletionMessageParam"] = []
+        return AgentResult(memory_messages + current_messages)
 
-        # system messages are always on the begining of the conv.
-        system_prompt = self.get_system_prompt(tools)
-        system_messages.append({"role": "system", "content": system_prompt})
+    def _failed_result(self, messages: List["ChatCompletionMessageParam"], iteration: int, error: Exception) -> AgentResult:
+        # T3RNAgent failed - let workload_agent_system handle fallback
+        self.channel_logger.log_to_logs(f"🚨 T3RNAgent failed: {str(error)}")
 
-        for module in self.MODULES:
-            system_messages.extend(module.inject_start_and_log(self.session_data))
+        result = AgentResult(messages)
+        result.error_content = f"T3RN AGENT ERROR: Failed in iteration {iteration} - {str(error)}"
 
-        for module in self.MODULES:
-            memory_messages.extend(module.inject_before_user_message_and_log(self.session_data))
+        return result
 
-        memory_messages.append({"role": "user", "content": user_message})
+    async def execute_async(self, user_message: str) -> AgentResult:
+        """
+        Answer user_message with the tool loop on the async stack (AsyncOpenAI, async module hooks and tools)
 
-        for module in self.MODULES:
-            memory_messages.extend(module.inject_after_user_message_and_log(self.session_data))
+        Module injections run concurrently. Cancelling the task (or the cancel scope of the turn)
+        aborts the in-flight OpenAI request and the database queries of running tools.
+        """
+        self.channel_logger.log_to_logs("🚀 T3rnAgent starting with internal async tool loop")
+
+        tools, memory_messages = self._begin_execute(user_message)
+        history_length = len(memory_messages)
+
+        # Messages from the current iterations of LLM (e.g. tool calls and responses)
+        current_messages: List["ChatCompletionMessageParam"] = []
+
+        start_groups, before_groups, after_groups = await asyncio.gather(
+            asyncio.gather(*(module.inject_start_and_log_async(self.session_data) for module in self.MODULES)),
+            asyncio.gather(*(module.inject_before_user_message_and_log_async(self.session_data) for module in self.MODULES)),
+            asyncio.gather(*(module.inject_after_user_message_and_log_async(self.session_data) for module in self.MODULES)),
+        )
+
+        # Messages injected by modules at the beginning of the conversation (not stored in memory)
+        start_messages = [message for group in start_groups for message in group]
+        memory_messages.extend(message for group in before_groups for message in group)
+        memory_messages.append({"role": "user", "content": user_message})
+        memory_messages.extend(message for group in after_groups for message in group)
 
         self.channel_logger.log_to_logs(f"🧠 Memory: {len(memory_messages)} context messages loaded")
 
+        # The champion roster may be queried from the database
+        prompt_messages = await asyncio.to_thread(
+            self.layout_messages, tools, start_messages, memory_messages[:history_length], memory_messages[history_length:]
+        )
+
         MAX_ITERATIONS = AGENT_CONFIG.getint("T3RNAgent", "max_iterations")
         iteration = 0
+        messages = prompt_messages
 
         try:
             while iteration < MAX_ITERATIONS:
@@ -285,50 +604,21 @@ class T3RNAgent(Agent):
                 self.channel_logger.log_to_logs(f"🔄 T3rnAgent iteration {iteration}")
 
                 try:
-                    if iteration == MAX_ITERATIONS:
-                        messages = (
-                            system_messages
-                            + memory_messages
-                            + current_messages
-                            + [
-                                {
-                                    "role": "system",
-                                    "content": T3RN_FINAL_ITERATION_PROMPT,
-                                }
-                            ]
-                        )
-
-                        response = self.call_llm(messages, tools=tools, use_tools=False)
-                    else:
-                        messages = system_messages + memory_messages + current_messages
-                        response = self.call_llm(messages, tools=tools, use_tools=True)
+                    check_cancelled()
+                    final_iteration = self._is_final_iteration(iteration, MAX_ITERATIONS)
+                    messages = self._iteration_messages(prompt_messages, current_messages, final_iteration=final_iteration)
+                    response = await self.call_llm_async(messages, tools=tools, use_tools=not final_iteration)
 
                     tool_calls = chat_response_toolcalls(response)
 
-                    if iteration < MAX_ITERATIONS and len(tool_calls) > 0:
+                    if not final_iteration and len(tool_calls) > 0:
                         self.channel_logger.log_to_logs(f"🔧 T3RNAgent requested {len(tool_calls)} tools")
 
-                        tools_executed = self.process_and_execute_tools(tool_calls, tools)
-
-                        current_messages.extend(tools_executed)
+                        current_messages.extend(await self.process_and_execute_tools_async(tool_calls, tools, messages))
 
                         continue
 
-                    response_content = chat_response_to_str(response, content_only=True)
-
-                    current_messages.append({"role": "assistant", "content": response_content})
-
-                    self.channel_logger.log_to_logs(f"✅ T3RNAgent completed after {iteration} iterations")
-
-                    messages = memory_messages + current_messages
-                    result = AgentResult(messages)
-
-                    self.memory_manager.finalize_current_cycle(result.messages)
-
-                    for module in self.MODULES:
-                        self.session_data = module.after_user_message(self.session_data)
-
-                    return result
+                    return self._final_result(response, memory_messages, current_messages, iteration)
 
                 except Exception as llm_error:
                     self.channel_logger.log_to_logs(f"❌ T3RNAgent error in iteration {iteration}: {str(llm_error)}")
@@ -338,10 +628,4 @@ class T3RNAgent(Agent):
             raise Exception("T3RNAgent loop logic error")
 
         except Exception as main_error:
-            # T3RNAgent failed - let workload_agent_system handle fallback
-            self.channel_logger.log_to_logs(f"🚨 T3RNAgent failed: {str(main_error)}")
-
-            result = AgentResult(messages)
-            result.error_content = f"T3RN AGENT ERROR: Failed in iteration {iteration} - {str(main_error)}"
-
-            return result
+            return self._failed_result(messages, iteration, main_error)
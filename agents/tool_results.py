@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tool Results
+Per-session store of tool results, honoring the cache duration tools declare in their results
+
+Tools declare how long a result stays valid with "llm_cache_duration" (user messages) and/or
+"llm_cache_seconds" in the returned dict. A repeated call with the same (normalized) arguments
+is answered from the store without running the tool. While the first result is still in the
+conversation the repeat call only gets a short reference, so its payload is not duplicated in
+the prompt.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from openai.types.chat import ChatCompletionMessageParam
+
+from tool_cache import normalize_arguments
+
+ToolResultKey = Tuple[str, str]
+
+
+def tool_result_content(result: Any) -> str:
+    """Content of the function message of a tool result"""
+    return str(json.dumps(result)) if isinstance(result, dict) else str(result)
+
+
+@dataclass
+class StoredToolResult:
+    tool_name: str
+    result: dict
+    content: str
+    # Turn the result was stored in, it is valid up to turn + duration_turns
+    turn: int
+    duration_turns: Optional[int]
+    expires_at: Optional[float]
+
+    def expired(self, turn: int, now: float) -> bool:
+        if self.duration_turns is not None and turn > self.turn + self.duration_turns:
+            return True
+        return self.expires_at is not None and now >= self.expires_at
+
+    def reference(self) -> dict:
+        """Result of a repeated call whose first result is still in the conversation"""
+        return {
+            "status": "success",
+            "message": f"Unchanged result of the earlier {self.tool_name} call with the same arguments, use that result from the conversation",
+            "cached": True,
+        }
+
+
+class ToolResultStore:
+    """Tool results of one session with their declared lifetime"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[ToolResultKey, StoredToolResult] = {}
+        self.turn = 0
+        self.hits = 0
+        self.references = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tool_name: str, arguments: dict) -> ToolResultKey:
+        return tool_name, json.dumps(normalize_arguments(arguments), sort_keys=True, default=str)
+
+    def begin_turn(self) -> None:
+        """Start a new user message, results past their duration are dropped"""
+        with self._lock:
+            self.turn += 1
+            now = time.time()
+            self._entries = {key: entry for key, entry in self._entries.items() if not entry.expired(self.turn, now)}
+
+    def get(self, tool_name: str, arguments: dict, context: Iterable["ChatCompletionMessageParam"] = ()) -> Optional[dict]:
+        """
+        Stored result of a call, as a reference if its payload is already in context
+
+        Args:
+            tool_name: Name of the tool
+            arguments: Arguments of the call
+            context: Messages the LLM sees with this call
+
+        Returns:
+            The result (or reference) to answer the call with, None if the tool must run
+        """
+        with self._lock:
+            entry = self._entries.get(self.key(tool_name, arguments))
+            if entry is not None and entry.expired(self.turn, time.time()):
+                del self._entries[self.key(tool_name, arguments)]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        in_context = any(message.get("role") == "function" and message.get("content") == entry.content for message in context)
+        if in_context:
+            with self._lock:
+                self.references += 1
+            return entry.reference()
+        return entry.result
+
+    def put(self, tool_name: str, arguments: dict, result: Any) -> bool:
+        """
+        Store a successful result that declares a cache duration
+
+        Returns:
+            Whether the result was stored
+        """
+        if not isinstance(result, dict) or result.get("status") == "error":
+            return False
+
+        duration_turns = result.get("llm_cache_duration")
+        duration_seconds = result.get("llm_cache_seconds")
+        if not isinstance(duration_turns, int) and not isinstance(duration_seconds, (int, float)):
+            return False
+
+        with self._lock:
+            self._entries[self.key(tool_name, arguments)] = StoredToolResult(
+                tool_name=tool_name,
+                result=result,
+                content=tool_result_content(result),
+                turn=self.turn,
+                duration_turns=duration_turns if isinstance(duration_turns, int) else None,
+                expires_at=time.time() + duration_seconds if isinstance(duration_seconds, (int, float)) else None,
+            )
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def format_stats(self) -> str:
+        with self._lock:
+            lookups = self.hits + self.misses
+            hit_rate = self.hits / lookups if lookups else 0.0
+            return (
+                f"♻️ Session tool results: {self.hits}/{lookups} hits ({hit_rate:.1%}), "
+                f"{self.references} answered by reference, {len(self._entries)} stored"
+            )
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Async Runtime
+Process-wide event loop on a background thread for the async agent stack
+
+Synchronous callers (the socket loop, process_llm_agents) submit coroutines with
+run_coroutine. All async work shares one long-lived loop, so the connections of the shared
+AsyncOpenAI client (llm_clients) are reused between messages.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Coroutine, Optional
+
+# Logger
+logger = logging.getLogger("AsyncRuntime")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Shared event loop, started on a daemon thread on first use"""
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True)
+            thread.start()
+            _loop, _loop_thread = loop, thread
+            logger.info("Async runtime event loop started")
+        return _loop
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the shared loop and wait for its result
+
+    Args:
+        coroutine: Coroutine to run
+        timeout: Seconds to wait; on timeout the coroutine is cancelled and TimeoutError raised
+
+    Returns:
+        Result of the coroutine
+    """
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        coroutine.close()
+        raise RuntimeError("run_coroutine called from the async runtime loop, await the coroutine instead")
+
+    future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"Coroutine did not finish within {timeout:.1f}s")
+
+
+async def run_in_executor(executor: Optional[Executor], function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    asyncio.to_thread on a given (bounded) executor
+
+    The function runs in a copy of the caller's context, so it inherits the current cancel
+    scope like asyncio.to_thread workers do.
+
+    Args:
+        executor: Pool to run on (None - default executor of the loop)
+        function: Blocking function to call
+
+    Returns:
+        Result of the function
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(context.run, function, *args, **kwargs))
@@ -0,0 +1,10 @@
+"""
+Benchmarks
+Standalone performance scripts, run from the project root with `python -m benchmarks.<name>`
+"""
+
+from typing import Dict
+
+
+def format_stats(name: str, stats: Dict[str, float]) -> str:
+    return f"{name:<48} mean={stats['mean_ms']:>9.3f}ms  p50={stats['p50_ms']:>9.3f}ms  p99={stats['p99_ms']:>9.3f}ms"
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Agent Turn Overhead Benchmark
+Per-message cost of the T3RN agent framework without network time
+
+Usage:
+    python -m benchmarks.bench_agent_turn [--repeat 200] [--history 6]
+
+Compares building the agent, its modules and tool list on every message with the agent kept
+for the session (workload_agent_system.session_agent). The OpenAI client returns a canned final
+answer and the modules that query the database or the embedder (roster, proactive smalltalk,
+greetings) are stubbed, so only prompt assembly, tool schemas, message layout and bookkeeping
+are measured.
+"""
+
+import argparse
+import logging
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest import mock
+
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.completion_usage import CompletionUsage
+
+from agents import t3rn_agent
+from agents.memory_manager import MemoryManager
+from agents.modules.proactive_smalltalk import ProactiveSmalltalk
+from agents.t3rn_agent import T3RNAgent
+from benchmarks import format_stats
+from channel_logger import ChannelLogger
+from latency import measure
+from session import Session
+from workload_agent_system import session_agent
+
+ROSTER = ", ".join(f"Champion {number}" for number in range(120))
+
+
+class CannedCompletions:
+    """chat.completions of an AsyncOpenAI client answering instantly"""
+
+    def __init__(self):
+        self.response = ChatCompletion(
+            id="bench",
+            object="chat.completion",
+            created=0,
+            model="gpt-4o-mini",
+            choices=[Choice(index=0, finish_reason="stop", message=ChatCompletionMessage(role="assistant", content="Beep boop, here you go."))],
+            usage=CompletionUsage(prompt_tokens=3000, completion_tokens=10, total_tokens=3010),
+        )
+
+    async def create(self, **kwargs):
+        return self.response
+
+
+def make_session(history: int) -> Session:
+    channel_logger = ChannelLogger(None, 1, 1)
+    session = Session(created_at=0.0, last_activity=0.0, session_id=1)
+    session.memory_manager = MemoryManager(channel_logger)
+    session.memory_manager.memory["running_messages"] = seed_history(history)
+    return session
+
+
+def seed_history(history: int) -> list:
+    messages = []
+    for number in range(history):
+        messages.append({"role": "user", "content": f"Question {number} about champions?"})
+        messages.append({"role": "assistant", "content": f"Answer {number} about champions."})
+    return messages
+
+
+def run_turn(session: Session, history: int, reuse: bool) -> None:
+    if not reuse:
+        session.agents.clear()
+
+    agent = session_agent(T3RNAgent, session, ChannelLogger(None, session.session_id, 1))
+
+    result = agent.execute("Tell me about Champion 7")
+    assert result.final_answer is not None, result.error_content
+
+    # Keep the conversation the same size between runs (no summarization)
+    session.memory_manager.memory["running_messages"] = seed_history(history)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--history", type=int, default=6, help="User/assistant exchanges in the conversation")
+    args = parser.parse_args()
+
+    # Console output of the channel logger is not part of the turn
+    logging.getLogger("ChannelLogger").setLevel(logging.WARNING)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(t3rn_agent, "db_get_champions_roster", return_value=(ROSTER, "bench")))
+        stack.enter_context(mock.patch.object(ProactiveSmalltalk, "inject_after_user_message", return_value=[]))
+        openai_client = SimpleNamespace(chat=SimpleNamespace(completions=CannedCompletions()))
+        stack.enter_context(mock.patch.object(t3rn_agent, "get_async_openai_client", return_value=openai_client))
+
+        session = make_session(args.history)
+        agent = T3RNAgent(session, ChannelLogger(None, 1, 1))
+        tools = agent.collect_tools()
+
+        print(f"=== Agent turn overhead ({len(tools)} tools, {args.history} exchanges of history, no network) ===")
+        print(format_stats("agent + modules construction", measure(lambda: T3RNAgent(session, ChannelLogger(None, 1, 1)), args.repeat)))
+        print(format_stats("tool schemas built per LLM iteration", measure(lambda: [tool.get_function_schema() for tool in tools], args.repeat)))
+        print(format_stats("turn, new agent per message", measure(lambda: run_turn(session, args.history, reuse=False), args.repeat)))
+        print(format_stats("turn, agent reused for the session", measure(lambda: run_turn(session, args.history, reuse=True), args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Vector Quantization Benchmark
+Recall@k, latency and size of halfvec, binary and Matryoshka-truncated searches with full-precision rescoring
+
+Usage:
+    python -m benchmarks.bench_quantization [--storages full,halfvec,binary,halfvec:256] [--k 4] [--rerank-factor 4]
+                                            [--snapshot] [--json report.json]
+
+The searches mirror the SQL of vector_quantization.VectorStorage in NumPy: candidates are the
+top k * rerank_factor rows of the reduced representation, rescored with the float32 matrix.
+By default the synthetic corpus of benchmarks.rag_retrieval is used. Its hashed embeddings are
+sparse and not Matryoshka-trained, so binary and truncated representations only give meaningful
+recall with --snapshot, which loads the snapshots exported from the database
+(python db_manage.py export-snapshot). NumPy has no BLAS kernels for float16, so halfvec
+latency here is not representative; `python db_manage.py quantization-report` measures recall,
+latency and index size against pgvector itself.
+"""
+
+import argparse
+import json
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks import format_stats
+from benchmarks.rag_retrieval.corpus import build_corpus
+from latency import measure
+from vector_index import SNAPSHOT_DIR, SNAPSHOT_TABLES, VectorSnapshot, normalize_rows
+from vector_quantization import DEFAULT_RERANK_FACTOR, VectorStorage
+
+# Number of set bits of every byte value, hamming distance of packed bit vectors is a lookup + sum
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class QuantizedMatrix:
+    """In-memory equivalent of a quantized HNSW search (exhaustive instead of graph traversal)"""
+
+    def __init__(self, matrix: np.ndarray, storage: VectorStorage):
+        self.storage = storage
+        self.matrix = matrix
+        reduced = normalize_rows(matrix[:, : storage.dimensions])
+        if storage.mode == "binary":
+            self.reduced = np.packbits(reduced > 0.0, axis=1)
+        elif storage.mode == "halfvec":
+            self.reduced = reduced.astype(np.float16)
+        else:
+            self.reduced = reduced
+
+    def _distances(self, query: np.ndarray) -> np.ndarray:
+        reduced_query = query[: self.storage.dimensions]
+        if self.storage.mode == "binary":
+            packed = np.packbits(reduced_query > 0.0)
+            return POPCOUNT[np.bitwise_xor(self.reduced, packed)].sum(axis=1, dtype=np.int32).astype(np.float32)
+
+        reduced_query = reduced_query / max(float(np.linalg.norm(reduced_query)), 1e-12)
+        return -(self.reduced @ reduced_query.astype(self.reduced.dtype)).astype(np.float32)
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        if self.storage.is_exact:
+            scores = self.matrix @ query
+            top = np.argpartition(-scores, k - 1)[:k]
+            return top[np.argsort(-scores[top])].tolist()
+
+        fetch = min(k * self.storage.rerank_factor, len(self.matrix))
+        distances = self._distances(query)
+        candidates = np.argpartition(distances, fetch - 1)[:fetch]
+
+        # Full-precision rescoring of the candidates
+        scores = self.matrix[candidates] @ query
+        return candidates[np.argsort(-scores)[:k]].tolist()
+
+
+def load_tables(snapshot: bool, queries: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Table name -> (normalized matrix, normalized query matrix)"""
+    if not snapshot:
+        corpus = build_corpus(queries_per_family=queries)
+        return {
+            table: (normalize_rows(corpus.matrices[table]), normalize_rows(np.stack([query.embedding for query in corpus.queries[table]])))
+            for table in SNAPSHOT_TABLES
+        }
+
+    rng = np.random.default_rng(7)
+    tables = {}
+    for table in SNAPSHOT_TABLES:
+        try:
+            loaded = VectorSnapshot.load(SNAPSHOT_DIR, table)
+        except Exception as e:
+            print(f"No snapshot for {table} in {SNAPSHOT_DIR} ({str(e)}), run `python db_manage.py export-snapshot` first")
+            continue
+
+        matrix = np.array(loaded.matrix, dtype=np.float32)
+        # Queries: rows with some noise, so they are not exact self matches
+        sample = rng.choice(len(matrix), size=min(queries, len(matrix)), replace=False)
+        noisy = matrix[sample] + rng.normal(scale=0.05, size=(len(sample), matrix.shape[1])).astype(np.float32)
+        tables[table] = (matrix, normalize_rows(noisy))
+    return tables
+
+
+def evaluate(matrix: np.ndarray, queries: np.ndarray, storage: VectorStorage, k: int, repeat: int) -> Dict[str, Any]:
+    exact = QuantizedMatrix(matrix, VectorStorage())
+    quantized = QuantizedMatrix(matrix, storage)
+
+    recalls = []
+    for query in queries:
+        expected = set(exact.search(query, k))
+        recalls.append(len(expected.intersection(quantized.search(query, k))) / k)
+
+    return {
+        "storage": storage.label,
+        "bytes_per_vector": storage.bytes_per_vector,
+        "recall": float(np.mean(recalls)),
+        **measure(lambda: quantized.search(queries[0], k), repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storages", default="full,halfvec,binary,full:512,halfvec:256,binary:512", help="Comma separated mode[:dimensions]")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rerank-factor", type=int, default=DEFAULT_RERANK_FACTOR)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--snapshot", action="store_true", help="Use exported database snapshots instead of the synthetic corpus")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    storages = [VectorStorage.parse(value, rerank_factor=args.rerank_factor) for value in args.storages.split(",") if value.strip()]
+
+    report: Dict[str, Any] = {"k": args.k, "rerank_factor": args.rerank_factor, "source": "snapshot" if args.snapshot else "synthetic", "tables": {}}
+    for table, (matrix, queries) in load_tables(args.snapshot, args.queries).items():
+        print(f"=== {table} ({len(matrix)} rows x {matrix.shape[1]} dims, {len(queries)} queries, recall@{args.k}) ===")
+        results = []
+        for storage in storages:
+            result = evaluate(matrix, queries, storage, args.k, args.repeat)
+            results.append(result)
+            print(format_stats(f"{storage.label:<12} recall={result['recall']:.4f} {storage.bytes_per_vector:>5}B/vec", result))
+        report["tables"][table] = results
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
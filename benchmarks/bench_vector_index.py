@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark
+In-process memory-mapped snapshot search vs pgvector
+
+Usage:
+    python -m benchmarks.bench_vector_index [--rows 5000] [--dim 768] [--k 4] [--db]
+
+Without --db a synthetic snapshot is written to a temporary directory and the snapshot search
+(unfiltered and section-filtered) is compared with a full argsort over an in-memory matrix.
+With --db the exported snapshots (python db_manage.py export-snapshot) are compared with
+pgvector queries against the configured database: latency of both and recall@k of pgvector,
+using the exact snapshot search as ground truth.
+"""
+
+import argparse
+import tempfile
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks import format_stats
+from db_postgres import execute_query, initialize_postgres_db, to_pgvector
+from latency import measure
+from vector_index import SNAPSHOT_DIR, SNAPSHOT_TABLES, VectorSnapshot, write_snapshot
+
+SECTIONS = ["BATTLES", "BOSSES", "CHAMPIONS", "GAMEPLAY", "LOCATIONS", "MECHANICS"]
+
+
+def run_offline(rows: int, dim: int, k: int, repeat: int) -> None:
+    rng = np.random.default_rng(42)
+    embeddings = rng.normal(size=(rows, dim)).astype(np.float32)
+    payloads = [
+        {"id": i, "chunk_text": f"chunk {i}", "metadata": {}, "sections": [SECTIONS[i % len(SECTIONS)]], "searchable": True} for i in range(rows)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_snapshot(directory, "bench", embeddings, payloads)
+        snapshot = VectorSnapshot.load(directory, "bench")
+        in_memory = np.array(snapshot.matrix)
+
+        queries = rng.normal(size=(repeat, dim)).astype(np.float32)
+        query = queries[0]
+
+        def full_sort():
+            scores = in_memory @ (query / np.linalg.norm(query))
+            return np.argsort(-scores)[:k]
+
+        exact = [set(np.argsort(-(in_memory @ (q / np.linalg.norm(q))))[:k].tolist()) for q in queries]
+        found = [{index for index, _ in snapshot.search(q, k)} for q in queries]
+        recall = np.mean([len(e & f) / k for e, f in zip(exact, found)])
+
+        print(f"=== Snapshot search ({rows} rows x {dim} dims, k={k}) ===")
+        print(format_stats("in-memory matmul + full argsort", measure(full_sort, repeat)))
+        print(format_stats("mmap matmul + argpartition", measure(lambda: snapshot.search(query, k), repeat)))
+        print(format_stats(f"mmap + section filter (1/{len(SECTIONS)} rows)", measure(lambda: snapshot.search(query, k, section="BOSSES"), repeat)))
+        print(f"recall@{k} vs full sort: {recall:.4f}")
+
+
+def run_database(k: int, queries: int, repeat: int) -> None:
+    if not initialize_postgres_db():
+        print("Cannot connect to PostgreSQL, skipping database benchmark")
+        return
+
+    rng = np.random.default_rng(7)
+
+    for table in SNAPSHOT_TABLES:
+        try:
+            snapshot = VectorSnapshot.load(SNAPSHOT_DIR, table)
+        except Exception as e:
+            print(f"No snapshot for {table} in {SNAPSHOT_DIR} ({str(e)}), run `python db_manage.py export-snapshot` first")
+            continue
+
+        # Queries: snapshot rows with some noise, so they are not exact self matches
+        sample = rng.choice(len(snapshot.rows), size=min(queries, len(snapshot.rows)), replace=False)
+        query_vectors: List[np.ndarray] = [snapshot.embedding(i) + rng.normal(scale=0.05, size=snapshot.dimension).astype(np.float32) for i in sample]
+
+        def pgvector_ids(query: np.ndarray) -> List:
+            rows = execute_query(f"SELECT id FROM {table} ORDER BY embedding <=> %s::vector LIMIT %s", (to_pgvector(query), k))
+            return [row["id"] for row in rows]
+
+        def snapshot_ids(query: np.ndarray) -> List:
+            return [snapshot.rows[index]["id"] for index, _ in snapshot.search(query, k)]
+
+        recalls = []
+        for query in query_vectors:
+            expected = {str(i) for i in snapshot_ids(query)}
+            recalls.append(len(expected & {str(i) for i in pgvector_ids(query)}) / max(len(expected), 1))
+
+        query = query_vectors[0]
+        print(f"=== {table} ({len(snapshot.rows)} rows, k={k}) ===")
+        print(format_stats("pgvector (remote query)", measure(lambda: pgvector_ids(query), repeat)))
+        print(format_stats("memory-mapped snapshot", measure(lambda: snapshot_ids(query), repeat)))
+        print(f"pgvector recall@{k} vs exact snapshot search: {np.mean(recalls):.4f} ({len(recalls)} queries)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--db", action="store_true", help="Also compare exported snapshots with pgvector on the configured database")
+    args = parser.parse_args()
+
+    run_offline(args.rows, args.dim, args.k, args.repeat)
+
+    if args.db:
+        load_dotenv()
+        run_database(args.k, args.queries, max(args.repeat // 10, 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Vector Transfer Benchmark
+Text vectors with Python parsing vs NumPy adapters and binary vector_send() results
+
+Usage:
+    python -m benchmarks.bench_vector_transfer [--rows 50] [--dim 768] [--db]
+
+Without --db the wire formats PostgreSQL would send are generated locally and only the
+client-side encode/decode cost is measured. With --db the QA search query is executed
+against the configured database (POSTGRES_* environment variables) in both shapes.
+"""
+
+import argparse
+
+import numpy as np
+import psycopg2
+from dotenv import load_dotenv
+
+from benchmarks import format_stats
+from db_postgres import NumpyVectorAdapter, _cast_vector, decode_vector, execute_query, initialize_postgres_db, to_pgvector
+from latency import measure
+
+
+def _legacy_encode(embedding: list) -> str:
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def _legacy_decode(value: str) -> np.ndarray:
+    return np.array([float(x) for x in value.strip("[]").split(",")])
+
+
+def run_offline(rows: int, dim: int, repeat: int) -> None:
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(rows, dim)).astype(np.float32)
+    query = vectors[0].tolist()
+
+    # What PostgreSQL sends for `embedding` (text output) and `vector_send(embedding)` (bytea, hex output)
+    text_rows = ["[" + ",".join(map(str, vector)) + "]" for vector in vectors]
+    binary_rows = ["\\x" + (np.array([dim, 0], dtype=">i2").tobytes() + vector.astype(">f4").tobytes()).hex() for vector in vectors]
+
+    def decode_binary_rows():
+        return [decode_vector(psycopg2.BINARY(value, None)) for value in binary_rows]
+
+    assert np.allclose(decode_binary_rows()[0], vectors[0])
+    assert np.allclose(_legacy_decode(text_rows[0]), vectors[0], atol=1e-6)
+
+    print(f"=== Query vector encode ({dim} dims) ===")
+    print(format_stats("legacy str join of Python floats", measure(lambda: _legacy_encode(query), repeat)))
+    print(format_stats("NumpyVectorAdapter (float32 repr)", measure(lambda: NumpyVectorAdapter(to_pgvector(query)).getquoted(), repeat)))
+
+    print(f"=== Result decode ({rows} rows x {dim} dims) ===")
+    print(format_stats("legacy strip/split -> Python floats -> np.array", measure(lambda: [_legacy_decode(v) for v in text_rows], repeat)))
+    print(format_stats("text typecaster (np.fromstring)", measure(lambda: [_cast_vector(v, None) for v in text_rows], repeat)))
+    print(format_stats("binary vector_send + np.frombuffer", measure(decode_binary_rows, repeat)))
+
+
+def run_database(rows: int, repeat: int) -> None:
+    if not initialize_postgres_db():
+        print("Cannot connect to PostgreSQL, skipping database benchmark")
+        return
+
+    sample = execute_query("SELECT vector_send(embedding) AS embedding FROM rag_qa_vectors LIMIT 1")
+    if not sample:
+        print("rag_qa_vectors is empty, skipping database benchmark")
+        return
+
+    query = decode_vector(sample[0]["embedding"])
+    assert query is not None
+
+    def legacy():
+        results = execute_query(
+            "SELECT id, 1 - (embedding <=> %s::vector) AS similarity, chunk_text, embedding::text AS embedding "
+            "FROM rag_qa_vectors ORDER BY similarity DESC LIMIT %s",
+            (_legacy_encode(query.tolist()), rows),
+        )
+        return [_legacy_decode(r["embedding"]) for r in results]
+
+    def binary():
+        results = execute_query(
+            "SELECT id, 1 - (embedding <=> %s::vector) AS similarity, chunk_text, vector_send(embedding) AS embedding "
+            "FROM rag_qa_vectors ORDER BY similarity DESC LIMIT %s",
+            (to_pgvector(query), rows),
+        )
+        return [decode_vector(r["embedding"]) for r in results]
+
+    print(f"=== rag_qa_vectors search round trip ({rows} rows) ===")
+    print(format_stats("text vectors + Python parsing", measure(legacy, repeat)))
+    print(format_stats("NumPy adapter + binary vector_send", measure(binary, repeat)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--db", action="store_true", help="Also benchmark queries against the configured database")
+    args = parser.parse_args()
+
+    run_offline(args.rows, args.dim, args.repeat)
+
+    if args.db:
+        load_dotenv()
+        run_database(args.rows, max(args.repeat // 10, 10))
+
+
+if __name__ == "__main__":
+    main()
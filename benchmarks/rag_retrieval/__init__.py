@@ -0,0 +1,9 @@
+"""
+RAG Retrieval Benchmark
+Recall@k, MRR and latency of every retrieval path on a synthetic corpus, as a JSON report
+
+Usage:
+    python -m benchmarks.rag_retrieval [--output report.json] [--compare baseline.json] [--offline]
+
+See benchmarks/rag_retrieval/__main__.py for all options.
+"""
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+RAG Retrieval Benchmark
+Recall@k, MRR and p50/p99 latency of the retrieval paths against exact brute-force ground truth
+
+The synthetic corpus is loaded into its own schema (default rag_bench) of the configured
+PostgreSQL database (POSTGRES_* environment variables, pgvector required); connections use
+search_path=<schema>,public so production tables are never read or written.
+
+Usage:
+    python -m benchmarks.rag_retrieval [--queries 100] [--k 4] [--index hnsw] [--qa-sections]
+                                       [--output report.json] [--compare baseline.json]
+    python -m benchmarks.rag_retrieval --offline   # in-process paths only, no database
+
+--compare prints per-path deltas against an earlier report and exits with status 1 when
+recall@k or MRR of a path dropped by more than --max-drop.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks.rag_retrieval.corpus import Query, SyntheticCorpus, build_corpus
+from latency import latency_stats
+
+RAG_TABLES = ("rag_vectors", "rag_qa_vectors")
+
+
+def evaluate(
+    name: str,
+    corpus: SyntheticCorpus,
+    table: str,
+    search: Callable[[Query], List[Any]],
+    truth: Callable[[Query], List[int]],
+    to_indexes: Callable[[List[Any]], List[int]],
+    warmup: int = 3,
+) -> Dict[str, Any]:
+    """Run `search` for every query of the table's family and score it against `truth`"""
+    queries = corpus.queries[table]
+    for query in queries[:warmup]:
+        search(query)
+
+    timings: List[float] = []
+    recalls: List[float] = []
+    reciprocal_ranks: List[float] = []
+    empty = 0
+
+    for query in queries:
+        start_time = time.perf_counter()
+        results = search(query)
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+        found = to_indexes(results)
+        expected = truth(query)
+        if not found:
+            empty += 1
+        if expected:
+            recalls.append(len(set(expected) & set(found)) / len(expected))
+        reciprocal_ranks.append(1.0 / (found.index(query.target) + 1) if query.target in found else 0.0)
+
+    result = {
+        "queries": len(queries),
+        "recall_at_k": float(np.mean(recalls)) if recalls else None,
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "empty_results": empty,
+        **latency_stats(timings),
+    }
+    recall = f"{result['recall_at_k']:.4f}" if result["recall_at_k"] is not None else "   n/a"
+    print(f"{name:<28} recall@k={recall}  mrr={result['mrr']:.4f}  p50={result['p50_ms']:>8.3f}ms  p99={result['p99_ms']:>8.3f}ms")
+    return result
+
+
+def rows_to_indexes(corpus: SyntheticCorpus, table: str, key: str = "chunk_text") -> Callable[[List[Any]], List[int]]:
+    text_index = corpus.text_index(table)
+    return lambda rows: [text_index[row[key]] for row in rows if row[key] in text_index]
+
+
+def run_offline(corpus: SyntheticCorpus, k: int) -> Dict[str, Any]:
+    """In-process paths: memory-mapped snapshot search and BM25"""
+    from lexical_index import BM25Index
+    from vector_index import VectorSnapshot, write_snapshot
+
+    paths: Dict[str, Any] = {}
+
+    def identity(indexes: List[int]) -> List[int]:
+        return indexes
+
+    with tempfile.TemporaryDirectory() as directory:
+        for table in RAG_TABLES:
+            write_snapshot(directory, table, corpus.matrices[table], corpus.tables[table])
+            snapshot = VectorSnapshot.load(directory, table)
+            bm25 = BM25Index(corpus.tables[table])
+
+            paths[f"snapshot:{table}"] = evaluate(
+                f"snapshot:{table}",
+                corpus,
+                table,
+                lambda query, snapshot=snapshot: [index for index, _ in snapshot.search(query.embedding, k, section=query.section)],
+                lambda query, table=table: corpus.exact_top_k(table, query.embedding, k, section=query.section),
+                identity,
+            )
+            paths[f"bm25:{table}"] = evaluate(
+                f"bm25:{table}",
+                corpus,
+                table,
+                lambda query, bm25=bm25: [index for index, _ in bm25.search(query.text, k, section=query.section)],
+                lambda query, table=table: corpus.exact_top_k(table, query.embedding, k, section=query.section),
+                identity,
+            )
+
+    return paths
+
+
+def load_corpus(corpus: SyntheticCorpus, schema: str) -> None:
+    """(Re)create the benchmark schema and insert the corpus"""
+    import psycopg2.extras
+
+    from db_postgres import borrow_connection, to_pgvector
+
+    dimension = corpus.dimension
+    with borrow_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {schema}")
+
+        for table in RAG_TABLES:
+            cursor.execute(f"CREATE TABLE {schema}.{table} (id integer PRIMARY KEY, chunk_text text, metadata jsonb, embedding vector({dimension}))")
+            psycopg2.extras.execute_values(
+                cursor,
+                f"INSERT INTO {schema}.{table} (id, chunk_text, metadata, embedding) VALUES %s",
+                [
+                    (row["id"], row["chunk_text"], psycopg2.extras.Json(row["metadata"]), to_pgvector(vector))
+                    for row, vector in zip(corpus.tables[table], corpus.matrices[table])
+                ],
+            )
+
+        cursor.execute(
+            f"CREATE TABLE {schema}.smalltalk_vectors (id integer PRIMARY KEY, topic text, category text, knowledge_text text, "
+            f"short_knowledge_text text, embedding vector({dimension}), topic_embedding vector({dimension}))"
+        )
+        psycopg2.extras.execute_values(
+            cursor,
+            f"INSERT INTO {schema}.smalltalk_vectors (id, topic, category, knowledge_text, short_knowledge_text, embedding, topic_embedding) VALUES %s",
+            [
+                (
+                    row["id"],
+                    row["topic"],
+                    row["category"],
+                    row["knowledge_text"],
+                    row["short_knowledge_text"],
+                    to_pgvector(vector),
+                    to_pgvector(topic),
+                )
+                for row, vector, topic in zip(
+                    corpus.tables["smalltalk_vectors"], corpus.matrices["smalltalk_vectors"], corpus.matrices["smalltalk_topics"]
+                )
+            ],
+        )
+
+        for table in (*RAG_TABLES, "smalltalk_vectors"):
+            cursor.execute(f"ANALYZE {schema}.{table}")
+        cursor.close()
+
+
+def run_database(corpus: SyntheticCorpus, args: argparse.Namespace) -> Optional[Dict[str, Any]]:
+    # Connections of this process only see the benchmark schema (and public for the vector type)
+    os.environ["POSTGRES_OPTIONS"] = f"-c search_path={args.schema},public"
+
+    import db_manage
+    import tools.db_rag_common as rag_common
+    import vector_index
+    from db_postgres import initialize_postgres_db
+    from tools.db_rag_get_smalltalk import db_rag_get_smalltalk_from_embedding
+
+    if not initialize_postgres_db():
+        print("Cannot connect to PostgreSQL, skipping database paths")
+        return None
+
+    print(f"Loading corpus into schema {args.schema} ...")
+    load_corpus(corpus, args.schema)
+
+    if args.qa_sections:
+        db_manage.sync_qa_sections(argparse.Namespace(skip_partial_indexes=args.index != "hnsw", m=args.m, ef_construction=args.ef_construction))
+    if args.index == "hnsw":
+        db_manage.create_hnsw_index(argparse.Namespace(table=None, replace=False, storage=None, m=args.m, ef_construction=args.ef_construction))
+
+    # Measure the database paths themselves: no semantic cache, no snapshot, BM25 built from the benchmark schema
+    rag_common.rag_search_cache.enabled = False
+    vector_index.RAG_SEARCH_BACKEND = "pgvector"
+    rag_common.SNAPSHOT_DIR = os.path.join(tempfile.gettempdir(), "rag_bench_no_snapshot")
+    rag_common._lexical_indexes.clear()
+    rag_common._lexical_index_failures.clear()
+    rag_common._qa_sections_column_present = None
+
+    k = args.k
+    threshold = args.threshold
+    rag_indexes = rows_to_indexes(corpus, "rag_vectors")
+    qa_indexes = rows_to_indexes(corpus, "rag_qa_vectors")
+
+    def truth(table: str, with_section: bool, use_threshold: bool = True) -> Callable[[Query], List[int]]:
+        return lambda query: corpus.exact_top_k(
+            table, query.embedding, k, section=query.section if with_section else None, threshold=threshold if use_threshold else None
+        )
+
+    paths: Dict[str, Any] = {}
+    print(f"=== Database paths (k={k}, threshold={threshold}, index={args.index}) ===")
+
+    paths["rag_search"] = evaluate(
+        "rag_search",
+        corpus,
+        "rag_vectors",
+        lambda query: rag_common.execute_rag_search(query.embedding, search_qa=False, threshold=threshold, limit=k),
+        truth("rag_vectors", False),
+        rag_indexes,
+    )
+    paths["rag_search_section"] = evaluate(
+        "rag_search_section",
+        corpus,
+        "rag_vectors",
+        lambda query: rag_common.execute_rag_search(query.embedding, chunk_section=query.section, search_qa=False, threshold=threshold, limit=k),
+        truth("rag_vectors", True),
+        rag_indexes,
+    )
+    paths["qa_search"] = evaluate(
+        "qa_search",
+        corpus,
+        "rag_qa_vectors",
+        lambda query: rag_common.execute_rag_search(query.embedding, search_qa=True, threshold=threshold, limit=k),
+        truth("rag_qa_vectors", False),
+        qa_indexes,
+    )
+    paths["qa_search_section"] = evaluate(
+        "qa_search_section",
+        corpus,
+        "rag_qa_vectors",
+        lambda query: rag_common.execute_rag_search(query.embedding, chunk_section=query.section, search_qa=True, threshold=threshold, limit=k),
+        truth("rag_qa_vectors", True),
+        qa_indexes,
+    )
+    paths["combined_search_section"] = evaluate(
+        "combined_search_section",
+        corpus,
+        "rag_vectors",
+        lambda query: rag_common.execute_rag_searches(query.embedding, chunk_section=query.section, threshold=threshold, limit=k)[False],
+        truth("rag_vectors", True),
+        rag_indexes,
+    )
+    paths["hybrid_search_section"] = evaluate(
+        "hybrid_search_section",
+        corpus,
+        "rag_vectors",
+        lambda query: rag_common.hybrid_rag_searches(query.text, query.embedding, query.section, (False,), threshold=threshold, limit=k)[False],
+        truth("rag_vectors", True),
+        rag_indexes,
+    )
+    paths["search_qa_similarity"] = evaluate(
+        "search_qa_similarity",
+        corpus,
+        "rag_qa_vectors",
+        lambda query: rag_common.search_qa_similarity(query.embedding, limit=k),
+        truth("rag_qa_vectors", False, use_threshold=False),
+        lambda rows: [row["id"] - 1 for row in rows],
+    )
+    paths["smalltalk_search"] = evaluate(
+        "smalltalk_search",
+        corpus,
+        "smalltalk_vectors",
+        lambda query: db_rag_get_smalltalk_from_embedding(query.embedding.tolist(), RAG_SMALLTALK_SEARCH_LIMIT=k),
+        truth("smalltalk_vectors", False, use_threshold=False),
+        lambda rows: [row["id"] - 1 for row in rows],
+    )
+
+    return paths
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], max_drop: float) -> bool:
+    """Print metric deltas against a baseline report, False if a path regressed"""
+    print(f"=== Compared with {baseline.get('git_commit') or 'baseline'} ===")
+    ok = True
+
+    for name, result in report["paths"].items():
+        previous = baseline.get("paths", {}).get(name)
+        if previous is None:
+            print(f"{name:<28} new path")
+            continue
+
+        deltas = []
+        for metric in ("recall_at_k", "mrr"):
+            if result.get(metric) is None or previous.get(metric) is None:
+                continue
+            delta = result[metric] - previous[metric]
+            deltas.append(f"{metric}={delta:+.4f}")
+            if delta < -max_drop:
+                ok = False
+                deltas[-1] += " REGRESSION"
+
+        p50_change = (result["p50_ms"] / previous["p50_ms"] - 1.0) if previous.get("p50_ms") else 0.0
+        deltas.append(f"p50={p50_change:+.1%}")
+        print(f"{name:<28} " + "  ".join(deltas))
+
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=40, help="Entities per chunk_section")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per table family")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--threshold", type=float, default=0.0, help="Similarity threshold of thresholded paths")
+    parser.add_argument("--schema", default="rag_bench")
+    parser.add_argument("--index", choices=("none", "hnsw"), default="hnsw")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--qa-sections", action="store_true", help="Run sync-qa-sections (denormalized QA section filter) on the corpus")
+    parser.add_argument("--offline", action="store_true", help="Only measure in-process paths (no database)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare with")
+    parser.add_argument("--max-drop", type=float, default=0.02, help="Allowed recall@k / MRR drop before --compare fails")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    corpus = build_corpus(entities_per_section=args.entities, queries_per_family=args.queries, dimension=args.dim, seed=args.seed)
+    print(
+        f"Corpus: {len(corpus.tables['rag_vectors'])} rag_vectors, {len(corpus.tables['rag_qa_vectors'])} rag_qa_vectors, "
+        f"{len(corpus.tables['smalltalk_vectors'])} smalltalk_vectors rows ({args.dim} dims)"
+    )
+
+    print(f"=== In-process paths (k={args.k}) ===")
+    paths = run_offline(corpus, args.k)
+    if not args.offline:
+        paths.update(run_database(corpus, args) or {})
+
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "corpus": {table: len(rows) for table, rows in corpus.tables.items()},
+        "paths": paths,
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare_reports(report, baseline, args.max_drop):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
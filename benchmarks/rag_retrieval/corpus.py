@@ -0,0 +1,146 @@
+"""
+Synthetic corpus shaped like the RAG tables, with brute-force ground truth
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from embedder import HashedEmbeddingBackend
+from vector_index import section_row_sets
+
+SECTIONS = ("BATTLES", "BOSSES", "CHAMPIONS", "GAMEPLAY", "LOCATIONS", "MECHANICS")
+SYLLABLES = ("ka", "ro", "vex", "dra", "mi", "tor", "zul", "an", "pe", "qui", "lo", "sen", "ath", "gri", "nox", "bel")
+
+
+@dataclass
+class Query:
+    text: str
+    embedding: np.ndarray
+    target: int
+    section: Optional[str] = None
+
+
+@dataclass
+class SyntheticCorpus:
+    dimension: int
+    tables: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    matrices: Dict[str, np.ndarray] = field(default_factory=dict)
+    queries: Dict[str, List[Query]] = field(default_factory=dict)
+
+    def text_index(self, table: str) -> Dict[str, int]:
+        key = "knowledge_text" if table == "smalltalk_vectors" else "chunk_text"
+        return {row[key]: index for index, row in enumerate(self.tables[table])}
+
+    def exact_top_k(self, table: str, query: np.ndarray, k: int, section: Optional[str] = None, threshold: Optional[float] = None) -> List[int]:
+        """Brute-force top-k row indexes (searchable rows of the section, similarity >= threshold)"""
+        if table == "smalltalk_vectors":
+            # Smalltalk search ranks rows by the best of both embedding columns
+            scores = np.maximum(self.matrices[table] @ query, self.matrices["smalltalk_topics"] @ query)
+            candidates = np.arange(len(scores))
+        else:
+            all_rows, section_rows = section_row_sets(self.tables[table])
+            candidates = all_rows if section is None else section_rows.get(section, np.empty(0, dtype=np.int64))
+            scores = self.matrices[table][candidates] @ query
+
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [int(candidates[i]) for i in order if threshold is None or scores[i] >= threshold]
+
+
+def _word(rng: np.random.Generator, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES, size=syllables))
+
+
+def build_corpus(
+    entities_per_section: int = 40,
+    chunks_per_entity: int = 4,
+    qa_per_entity: int = 3,
+    smalltalk_rows: int = 120,
+    queries_per_family: int = 100,
+    dimension: int = 768,
+    seed: int = 42,
+) -> SyntheticCorpus:
+    """
+    Build rag_vectors, rag_qa_vectors and smalltalk_vectors rows with hashed embeddings
+
+    Every entity has `chunks_per_entity` regular chunks plus one QA chunk in rag_vectors
+    (excluded from non-QA searches like in production) and `qa_per_entity` rows in
+    rag_qa_vectors. Queries reuse the entity name and a few words of a target row.
+    """
+    rng = np.random.default_rng(seed)
+    backend = HashedEmbeddingBackend(dimension=dimension)
+    corpus = SyntheticCorpus(dimension=dimension)
+
+    shared_vocabulary = [_word(rng, 2) for _ in range(300)]
+    section_vocabulary = {section: [_word(rng, 3) for _ in range(120)] for section in SECTIONS}
+
+    def sentence(section: str, words: int) -> str:
+        vocabulary = section_vocabulary[section] if rng.random() < 0.6 else shared_vocabulary
+        return " ".join(rng.choice(vocabulary, size=words))
+
+    rag_rows: List[Dict[str, Any]] = []
+    qa_rows: List[Dict[str, Any]] = []
+    for section in SECTIONS:
+        for number in range(entities_per_section):
+            entity = f"{_word(rng, 2).capitalize()} {section[:3].lower()}_{number}"
+            for chunk in range(chunks_per_entity + 1):
+                is_qa = chunk == chunks_per_entity
+                chunk_name = f"{entity} {'QA' if is_qa else 'part'} {chunk}"
+                text = f"{entity}. " + ". ".join(sentence(section, 8) for _ in range(4)) + f". ({chunk_name})"
+                rag_rows.append(
+                    {
+                        "id": len(rag_rows) + 1,
+                        "chunk_text": text,
+                        "metadata": {"entity_name": entity, "chunk_section": section, "chunk_name": chunk_name},
+                        "sections": [section],
+                        "searchable": not is_qa,
+                    }
+                )
+            for question in range(qa_per_entity):
+                text = f"Q: {entity} {sentence(section, 5)}? A: {sentence(section, 12)}. (question {question})"
+                qa_rows.append(
+                    {"id": len(qa_rows) + 1, "chunk_text": text, "metadata": {"entity_name": entity}, "sections": [section], "searchable": True}
+                )
+
+    smalltalk: List[Dict[str, Any]] = []
+    for number in range(smalltalk_rows):
+        section = SECTIONS[number % len(SECTIONS)]
+        topic = f"{_word(rng, 2).capitalize()} {sentence(section, 2)}"
+        knowledge = f"{topic}: " + ". ".join(sentence(section, 10) for _ in range(3)) + f". (fact {number})"
+        smalltalk.append(
+            {
+                "id": number + 1,
+                "topic": topic,
+                "category": section.lower(),
+                "knowledge_text": knowledge,
+                "short_knowledge_text": knowledge[:120],
+            }
+        )
+
+    corpus.tables = {"rag_vectors": rag_rows, "rag_qa_vectors": qa_rows, "smalltalk_vectors": smalltalk}
+    corpus.matrices = {
+        "rag_vectors": np.array(backend.embed_batch([row["chunk_text"] for row in rag_rows]), dtype=np.float32),
+        "rag_qa_vectors": np.array(backend.embed_batch([row["chunk_text"] for row in qa_rows]), dtype=np.float32),
+        "smalltalk_vectors": np.array(backend.embed_batch([row["knowledge_text"] for row in smalltalk]), dtype=np.float32),
+        "smalltalk_topics": np.array(backend.embed_batch([row["topic"] for row in smalltalk]), dtype=np.float32),
+    }
+
+    def make_queries(table: str, rows: List[Dict[str, Any]], text_key: str) -> List[Query]:
+        targets = [index for index, row in enumerate(rows) if row.get("searchable", True)]
+        queries = []
+        for target in rng.choice(targets, size=min(queries_per_family, len(targets)), replace=False):
+            row = rows[int(target)]
+            words = row[text_key].replace(".", " ").split()
+            entity = (row.get("metadata") or {}).get("entity_name") or row.get("topic", "")
+            text = f"{entity} " + " ".join(rng.choice(words, size=min(4, len(words)), replace=False))
+            sections = row.get("sections") or [None]
+            queries.append(Query(text=text, embedding=np.array(backend.embed(text), dtype=np.float32), target=int(target), section=sections[0]))
+        return queries
+
+    corpus.queries = {
+        "rag_vectors": make_queries("rag_vectors", rag_rows, "chunk_text"),
+        "rag_qa_vectors": make_queries("rag_qa_vectors", qa_rows, "chunk_text"),
+        "smalltalk_vectors": make_queries("smalltalk_vectors", smalltalk, "knowledge_text"),
+    }
+    return corpus
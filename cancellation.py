@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Cancellation
+Cooperative cancellation of agent turns across the event loop and worker threads
+
+Async agent turns and tool calls run inside a CancelScope held in a context variable, which
+asyncio tasks and asyncio.to_thread workers inherit. When a scope is cancelled (deadline,
+timeout or cancelled task), its callbacks abort in-flight work that cannot observe asyncio
+cancellation, e.g. PostgreSQL queries of worker threads (connection.cancel()), and blocking
+code can stop early with check_cancelled(). HTTP calls of the async OpenAI client are
+cancelled with their task directly.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, List, Optional
+
+# Logger
+logger = logging.getLogger("Cancellation")
+
+
+class TurnCancelled(Exception):
+    """Raised when work of a cancelled scope (deadline, timeout) is started or interrupted"""
+
+
+class CancelScope:
+    """Cancellation state shared by a turn (or tool call) and everything it runs"""
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancelScope"] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+        self.reason: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return any(scope.reason is not None for scope in self._chain())
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline of this scope or its parents (None without deadline)"""
+        remaining = self.deadline - time.monotonic() if self.deadline is not None else None
+        parent_remaining = self.parent.remaining() if self.parent is not None else None
+        if remaining is None or parent_remaining is None:
+            return remaining if parent_remaining is None else parent_remaining
+        return min(remaining, parent_remaining)
+
+    def cancel(self, reason: str) -> None:
+        """Cancel the scope and run its callbacks (once, from the calling thread)"""
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                # The cancelled work (e.g. a PostgreSQL query) keeps running until it ends on its own
+                logger.warning(f"Cancel callback failed ({reason}): {str(e)}")
+
+    def check(self) -> None:
+        if not self.cancelled:
+            remaining = self.remaining()
+            if remaining is not None and remaining <= 0:
+                self.cancel("Deadline exceeded")
+
+        reasons = [scope.reason for scope in self._chain() if scope.reason is not None]
+        if reasons:
+            raise TurnCancelled(reasons[0])
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], Any]) -> Iterator[None]:
+        """Run callback if the scope (or a parent) is cancelled while the block runs"""
+        scopes = self._chain()
+        for scope in scopes:
+            with scope._lock:
+                scope._callbacks.append(callback)
+        try:
+            self.check()
+            yield
+        finally:
+            for scope in scopes:
+                with scope._lock:
+                    if callback in scope._callbacks:
+                        scope._callbacks.remove(callback)
+
+    def _chain(self) -> List["CancelScope"]:
+        scopes: List[CancelScope] = []
+        scope: Optional[CancelScope] = self
+        while scope is not None:
+            scopes.append(scope)
+            scope = scope.parent
+        return scopes
+
+
+_current_scope: ContextVar[Optional[CancelScope]] = ContextVar("cancel_scope", default=None)
+
+
+def current_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
+
+
+def check_cancelled() -> None:
+    """Raise TurnCancelled if the current scope was cancelled or its deadline passed"""
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.check()
+
+
+@contextmanager
+def enter_scope(scope: CancelScope) -> Iterator[CancelScope]:
+    """Make scope the current scope of the block (tasks and worker threads started in it inherit it)"""
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left until the deadline of the current scope (None outside of scopes or without deadline)"""
+    scope = _current_scope.get()
+    return scope.remaining() if scope is not None else None
+
+
+@contextmanager
+def cancel_callback(callback: Callable[[], Any]) -> Iterator[None]:
+    """Register callback on the current scope for the duration of the block (no-op outside of scopes)"""
+    scope = _current_scope.get()
+    if scope is None:
+        yield
+        return
+
+    with scope.on_cancel(callback):
+        yield
+
+
+async def run_with_timeout(awaitable: Awaitable[Any], timeout: Optional[float], reason: str) -> Any:
+    """
+    Await in a new cancel scope (child of the current one) with a timeout
+
+    Args:
+        awaitable: Coroutine to run, it runs as a task that inherits the new scope
+        timeout: Seconds before the scope is cancelled (None - only the parent deadline applies)
+        reason: Message of the TurnCancelled raised on timeout
+
+    Returns:
+        Result of the awaitable
+    """
+    parent = _current_scope.get()
+    scope = CancelScope(timeout, parent=parent)
+    remaining = scope.remaining()
+
+    token = _current_scope.set(scope)
+    try:
+        task = asyncio.ensure_future(awaitable)
+    finally:
+        _current_scope.reset(token)
+
+    try:
+        return await asyncio.wait_for(task, timeout=max(remaining, 0.0) if remaining is not None else None)
+    except asyncio.TimeoutError:
+        scope.cancel(reason)
+        raise TurnCancelled(reason)
+    except asyncio.CancelledError:
+        scope.cancel("Cancelled")
+        raise
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Context Packer
+Token-budgeted packing of RAG chunks into tool results
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from workload_config import AGENT_CONFIG
+
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Logger
+logger = logging.getLogger("ContextPacker")
+
+SECTION = "ContextPacking"
+
+PACKING_ENABLED = AGENT_CONFIG.getboolean(SECTION, "enable", fallback=True)
+DEFAULT_TOKEN_BUDGET = AGENT_CONFIG.getint(SECTION, "default_budget", fallback=600)
+# Share of a tool budget reserved for QA chunks (unused similarity budget goes to QA as well)
+QA_BUDGET_SHARE = AGENT_CONFIG.getfloat(SECTION, "qa_share", fallback=0.4)
+# Chunks of the same entity with word-set Jaccard similarity above this value are duplicates
+ENTITY_DUPLICATE_SIMILARITY = AGENT_CONFIG.getfloat(SECTION, "entity_duplicate_similarity", fallback=0.5)
+# Chunks of any entity above this value are duplicates
+DUPLICATE_SIMILARITY = AGENT_CONFIG.getfloat(SECTION, "duplicate_similarity", fallback=0.85)
+# A chunk is only truncated if at least this many tokens remain in the budget
+MIN_TRUNCATED_TOKENS = AGENT_CONFIG.getint(SECTION, "min_truncated_tokens", fallback=40)
+
+CHUNK_SEPARATOR = "\n\n"
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_PATTERN = re.compile(r"\w+")
+
+_encoding = None
+if TIKTOKEN_AVAILABLE:
+    try:
+        _encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens from characters: {str(e)}")
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (o200k_base encoding of gpt-4o models, ~4 characters per token without tiktoken)"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def tool_token_budget(function_name: str) -> int:
+    """Token budget of a tool result ([ContextPacking] <function_name> = N overrides default_budget)"""
+    return AGENT_CONFIG.getint(SECTION, function_name, fallback=DEFAULT_TOKEN_BUDGET)
+
+
+@dataclass
+class PackingStats:
+    chunks_in: int = 0
+    chunks_out: int = 0
+    duplicates: int = 0
+    truncated: int = 0
+    dropped: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+    def add(self, other: "PackingStats") -> None:
+        for field in ("chunks_in", "chunks_out", "duplicates", "truncated", "dropped", "tokens_in", "tokens_out"):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_out": self.chunks_out,
+            "duplicates": self.duplicates,
+            "truncated": self.truncated,
+            "dropped": self.dropped,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def _score(row: Dict[str, Any]) -> float:
+    return float(row.get("rrf_score", row.get("similarity") or 0.0))
+
+
+def _entity(row: Dict[str, Any]) -> Any:
+    metadata = row.get("metadata") or {}
+    return metadata.get("entity_name")
+
+
+def _jaccard(first: frozenset, second: frozenset) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of whole sentences within max_tokens (empty if even the first sentence does not fit)"""
+    # Cut points at the end of each sentence, the original formatting of the kept prefix is preserved
+    cuts = [match.start() for match in SENTENCE_BOUNDARY.finditer(text)] + [len(text)]
+
+    low, high = 0, len(cuts)
+    while low < high:
+        middle = (low + high) // 2
+        if count_tokens(text[: cuts[middle]]) <= max_tokens:
+            low = middle + 1
+        else:
+            high = middle
+
+    return text[: cuts[low - 1]].rstrip() if low > 0 else ""
+
+
+def pack_chunks(results: List[Dict[str, Any]], budget: int) -> Tuple[str, PackingStats, int]:
+    """
+    Pack RAG rows (chunk_text, metadata, similarity, optional rrf_score) into at most `budget` tokens
+
+    Rows are ordered by score and near-duplicates are dropped. A row that does not fit is
+    truncated at a sentence boundary if enough budget remains, otherwise dropped.
+
+    Returns:
+        Packed text, statistics and unused budget
+    """
+    stats = PackingStats(chunks_in=len(results))
+    stats.tokens_in = count_tokens(CHUNK_SEPARATOR.join(row["chunk_text"] for row in results))
+
+    kept: List[Tuple[Any, frozenset]] = []
+    parts: List[str] = []
+    remaining = budget
+    separator_tokens = count_tokens(CHUNK_SEPARATOR)
+
+    for row in sorted(results, key=_score, reverse=True):
+        text = row["chunk_text"]
+        words = frozenset(WORD_PATTERN.findall(text.lower()))
+        entity = _entity(row)
+
+        if any(
+            (entity is not None and entity == kept_entity and _jaccard(words, kept_words) >= ENTITY_DUPLICATE_SIMILARITY)
+            or _jaccard(words, kept_words) >= DUPLICATE_SIMILARITY
+            for kept_entity, kept_words in kept
+        ):
+            stats.duplicates += 1
+            continue
+
+        available = remaining - (separator_tokens if parts else 0)
+        tokens = count_tokens(text)
+        if tokens > available:
+            truncated = truncate_to_tokens(text, available) if available >= MIN_TRUNCATED_TOKENS else ""
+            if not truncated:
+                stats.dropped += 1
+                continue
+            text = truncated
+            tokens = count_tokens(text)
+            stats.truncated += 1
+
+        kept.append((entity, words))
+        parts.append(text)
+        remaining = available - tokens
+
+    packed = CHUNK_SEPARATOR.join(parts)
+    stats.chunks_out = len(parts)
+    stats.tokens_out = count_tokens(packed)
+    return packed, stats, max(remaining, 0)
+
+
+def pack_rag_results(
+    similarity_results: List[Dict[str, Any]],
+    qa_results: List[Dict[str, Any]],
+    function_name: str,
+) -> Tuple[str, str, PackingStats]:
+    """
+    Pack similarity and QA rows of one RAG tool call into the tool's token budget
+
+    Returns:
+        Similarity content, QA content and combined statistics
+    """
+    budget = tool_token_budget(function_name)
+    similarity_budget = int(budget * (1.0 - QA_BUDGET_SHARE)) if qa_results else budget
+
+    similarity_content, stats, unused = pack_chunks(similarity_results, similarity_budget)
+    qa_content, qa_stats, _ = pack_chunks(qa_results, budget - similarity_budget + unused)
+    stats.add(qa_stats)
+
+    packing_totals.record(stats)
+    if stats.tokens_saved > 0:
+        logger.info(
+            f"{function_name}: packed {stats.chunks_out}/{stats.chunks_in} chunks into {stats.tokens_out} tokens "
+            f"(budget {budget}, saved {stats.tokens_saved}, {stats.duplicates} duplicates, {stats.truncated} truncated)"
+        )
+    return similarity_content, qa_content, stats
+
+
+class PackingTotals:
+    """Process-wide packing statistics (reported on the Caches channel)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.stats = PackingStats()
+
+    def record(self, stats: PackingStats) -> None:
+        with self._lock:
+            self.calls += 1
+            self.stats.add(stats)
+
+    def format_stats(self) -> str:
+        with self._lock:
+            if not PACKING_ENABLED:
+                return "✂️ RAG context packing: disabled"
+            ratio = self.stats.tokens_saved / self.stats.tokens_in if self.stats.tokens_in else 0.0
+            return (
+                f"✂️ RAG context packing: {self.calls} tool results, {self.stats.tokens_out}/{self.stats.tokens_in} tokens "
+                f"(saved {self.stats.tokens_saved}, {ratio:.1%}), {self.stats.duplicates} duplicates, {self.stats.truncated} truncated"
+            )
+
+
+packing_totals = PackingTotals()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Database Management
+Maintenance commands for RAG tables (indexes, migrations, reports)
+
+Usage:
+    python db_manage.py create-fts-indexes
+    python db_manage.py create-hnsw-index [--table rag_qa_vectors] [--m 16] [--ef-construction 64] [--replace] [--storage halfvec]
+    python db_manage.py hnsw-report [--table rag_qa_vectors] [--k 10] [--queries 50] [--ef-search 10,20,40,80,160] [--json report.json]
+    python db_manage.py quantization-report [--table rag_vectors] [--storages full,halfvec,binary:512] [--rerank-factor 4] [--json report.json]
+    python db_manage.py sync-qa-sections [--skip-partial-indexes]
+    python db_manage.py export-snapshot [--dir data/vector_snapshot] [--table rag_qa_vectors]
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from db_postgres import (
+    apply_vector_search_settings,
+    borrow_connection,
+    close_postgres_connection,
+    decode_vector,
+    execute_command,
+    execute_query,
+    initialize_postgres_db,
+)
+from latency import latency_stats
+from tools.db_rag_common import FULL_TEXT_SEARCH_CONFIG, QA_SECTIONS_COLUMN, QA_SECTIONS_RECHECK_INTERVAL, RAG_QUERY_VECTOR, fetch_rag_rows
+from vector_index import SNAPSHOT_DIR, SNAPSHOT_TABLES, write_snapshot
+from vector_quantization import DEFAULT_RERANK_FACTOR, QUANTIZED_TABLES, VectorStorage, vector_storage
+from workload_config import AGENT_CONFIG
+
+# Logger
+logger = logging.getLogger("DBManage")
+
+# GIN indexes used by the full-text fallback: index name -> (table, text column)
+FULL_TEXT_INDEXES = {
+    "rag_vectors_chunk_text_fts_idx": ("rag_vectors", "chunk_text"),
+    "rag_qa_vectors_chunk_text_fts_idx": ("rag_qa_vectors", "chunk_text"),
+    "smalltalk_vectors_knowledge_text_fts_idx": ("smalltalk_vectors", "knowledge_text"),
+}
+
+# HNSW indexes (cosine distance) used by `ORDER BY <column> <=> query LIMIT k` searches: index name -> (table, vector column)
+HNSW_INDEXES = {
+    "rag_vectors_embedding_hnsw_idx": ("rag_vectors", "embedding"),
+    "rag_qa_vectors_embedding_hnsw_idx": ("rag_qa_vectors", "embedding"),
+    "smalltalk_vectors_embedding_hnsw_idx": ("smalltalk_vectors", "embedding"),
+    "smalltalk_vectors_topic_embedding_hnsw_idx": ("smalltalk_vectors", "topic_embedding"),
+}
+
+
+def create_fts_indexes(args: argparse.Namespace) -> None:
+    """Create GIN indexes over to_tsvector() expressions used by the full-text fallback"""
+    for index_name, (table, column) in FULL_TEXT_INDEXES.items():
+        logger.info(f"Creating full-text index {index_name} on {table}({column})")
+        execute_command(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING GIN (to_tsvector('{FULL_TEXT_SEARCH_CONFIG}', {column}))")
+        execute_command(f"ANALYZE {table}")
+
+
+def create_hnsw_index(args: argparse.Namespace) -> None:
+    """
+    Create HNSW cosine indexes on the RAG vector columns
+
+    Tables configured for a quantized representation ([VectorQuantization], or --storage) get an
+    expression index on it instead; the full-precision index can be dropped once searches use it.
+    """
+    for index_name, (table, column) in HNSW_INDEXES.items():
+        if args.table and table != args.table:
+            continue
+
+        storage = VectorStorage.parse(args.storage) if args.storage else vector_storage(table)
+        if not storage.is_exact and table not in QUANTIZED_TABLES:
+            logger.warning(f"{table} is always searched with full precision, skipping {storage.label} index")
+            continue
+        index_name = storage.index_name(index_name)
+
+        if args.replace:
+            logger.info(f"Dropping {index_name}")
+            execute_command(f"DROP INDEX IF EXISTS {index_name}")
+
+        logger.info(f"Creating HNSW index {index_name} on {table}({column}, {storage.label}) with m={args.m}, ef_construction={args.ef_construction}")
+        start_time = time.perf_counter()
+        execute_command(storage.index_sql(index_name, table, column), (args.m, args.ef_construction))
+        execute_command(f"ANALYZE {table}")
+        logger.info(f"{index_name} ready in {time.perf_counter() - start_time:.1f}s")
+
+
+def _nearest_ids(cursor, table: str, column: str, query: Any, k: int) -> List[Any]:
+    cursor.execute(f"SELECT id FROM {table} ORDER BY {column} <=> %s::vector LIMIT %s", (query, k))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _uses_index(cursor, table: str, column: str, query: Any, k: int) -> bool:
+    cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT id FROM {table} ORDER BY {column} <=> %s::vector LIMIT %s", (query, k))
+    (plan,) = cursor.fetchone()
+    return "Index Scan" in json.dumps(plan)
+
+
+def hnsw_report(args: argparse.Namespace) -> None:
+    """
+    Measure recall@k and latency of HNSW searches for several ef_search values
+
+    Query vectors are sampled from the table itself, ground truth comes from an exact
+    (sequential scan) search with index scans disabled on the same connection.
+    """
+    ef_search_values = [int(value) for value in args.ef_search.split(",") if value.strip()]
+    report: Dict[str, Any] = {"table": args.table, "column": args.column, "k": args.k, "results": []}
+
+    with borrow_connection() as connection:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            f"SELECT vector_send({args.column}) FROM {args.table} WHERE {args.column} IS NOT NULL ORDER BY random() LIMIT %s", (args.queries,)
+        )
+        queries = [decode_vector(row[0]) for row in cursor.fetchall()]
+        if not queries:
+            logger.warning(f"{args.table} is empty, nothing to report")
+            return
+        report["queries"] = len(queries)
+
+        try:
+            cursor.execute("SET enable_indexscan = off")
+            exact_timings: List[float] = []
+            ground_truth = []
+            for query in queries:
+                start_time = time.perf_counter()
+                ground_truth.append(set(_nearest_ids(cursor, args.table, args.column, query, args.k)))
+                exact_timings.append((time.perf_counter() - start_time) * 1000)
+        finally:
+            cursor.execute("RESET enable_indexscan")
+
+        report["exact"] = latency_stats(exact_timings)
+        print(f"=== {args.table}.{args.column}: {len(queries)} queries, recall@{args.k} ===")
+        print(f"{'exact (seq scan)':<20} recall=1.0000  p50={report['exact']['p50_ms']:>8.2f}ms  p99={report['exact']['p99_ms']:>8.2f}ms")
+
+        try:
+            for ef_search in ef_search_values:
+                apply_vector_search_settings(connection, ef_search=ef_search)
+                index_used = _uses_index(cursor, args.table, args.column, queries[0], args.k)
+
+                timings: List[float] = []
+                recalls: List[float] = []
+                for query, expected in zip(queries, ground_truth):
+                    start_time = time.perf_counter()
+                    found = _nearest_ids(cursor, args.table, args.column, query, args.k)
+                    timings.append((time.perf_counter() - start_time) * 1000)
+                    recalls.append(len(expected.intersection(found)) / len(expected) if expected else 1.0)
+
+                result = {"ef_search": ef_search, "index_used": index_used, "recall": sum(recalls) / len(recalls), **latency_stats(timings)}
+                report["results"].append(result)
+                print(
+                    f"{'ef_search=' + str(ef_search):<20} recall={result['recall']:.4f}  p50={result['p50_ms']:>8.2f}ms  p99={result['p99_ms']:>8.2f}ms"
+                    + ("" if index_used else "  (no index scan!)")
+                )
+        finally:
+            apply_vector_search_settings(connection)
+
+        cursor.close()
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+        logger.info(f"Report written to {args.json}")
+
+
+def quantization_report(args: argparse.Namespace) -> None:
+    """
+    Measure recall@k, latency and index size of quantized searches against exact search
+
+    Query vectors are sampled from the table itself, ground truth comes from an exact
+    (sequential scan) search. Representations without an index are measured as sequential
+    scans, their recall is still meaningful.
+    """
+    storages = [VectorStorage.parse(value, rerank_factor=args.rerank_factor) for value in args.storages.split(",") if value.strip()]
+    base_index_name = next(name for name, (table, column) in HNSW_INDEXES.items() if table == args.table and column == "embedding")
+    report: Dict[str, Any] = {"table": args.table, "k": args.k, "rerank_factor": args.rerank_factor, "results": []}
+
+    with borrow_connection() as connection:
+        cursor = connection.cursor()
+
+        cursor.execute(f"SELECT vector_send(embedding) FROM {args.table} WHERE embedding IS NOT NULL ORDER BY random() LIMIT %s", (args.queries,))
+        queries = [decode_vector(row[0]) for row in cursor.fetchall()]
+        if not queries:
+            logger.warning(f"{args.table} is empty, nothing to report")
+            return
+        report["queries"] = len(queries)
+
+        try:
+            cursor.execute("SET enable_indexscan = off")
+            ground_truth = [set(_nearest_ids(cursor, args.table, "embedding", query, args.k)) for query in queries]
+        finally:
+            cursor.execute("RESET enable_indexscan")
+
+        print(f"=== {args.table}: {len(queries)} queries, recall@{args.k}, rerank factor {args.rerank_factor} ===")
+        for storage in storages:
+            sql = "WITH q AS (SELECT %s::vector AS embedding) " + storage.candidates_sql(
+                columns=f"id, 1 - (embedding <=> {RAG_QUERY_VECTOR}) AS similarity",
+                source=args.table,
+                column="embedding",
+                query=RAG_QUERY_VECTOR,
+            )
+
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, (queries[0],) + storage.limit_params(args.k))
+            (plan,) = cursor.fetchone()
+            index_used = "Index Scan" in json.dumps(plan)
+
+            cursor.execute("SELECT pg_relation_size(to_regclass(%s))", (storage.index_name(base_index_name),))
+            (index_bytes,) = cursor.fetchone()
+
+            timings: List[float] = []
+            recalls: List[float] = []
+            for query, expected in zip(queries, ground_truth):
+                start_time = time.perf_counter()
+                cursor.execute(sql, (query,) + storage.limit_params(args.k))
+                found = [row[0] for row in cursor.fetchall()]
+                timings.append((time.perf_counter() - start_time) * 1000)
+                recalls.append(len(expected.intersection(found)) / len(expected) if expected else 1.0)
+
+            result = {
+                "storage": storage.label,
+                "bytes_per_vector": storage.bytes_per_vector,
+                "index_bytes": index_bytes,
+                "index_used": index_used,
+                "recall": sum(recalls) / len(recalls),
+                **latency_stats(timings),
+            }
+            report["results"].append(result)
+            index_size = f"{index_bytes / 1024 / 1024:>8.1f}MB" if index_bytes is not None else "  (none)"
+            print(
+                f"{storage.label:<14} recall={result['recall']:.4f}  p50={result['p50_ms']:>8.2f}ms  p99={result['p99_ms']:>8.2f}ms  "
+                f"index={index_size}  {storage.bytes_per_vector:>5}B/vector" + ("" if index_used else "  (no index scan)")
+            )
+
+        cursor.close()
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+        logger.info(f"Report written to {args.json}")
+
+
+# Schema keeping rag_qa_vectors.chunk_sections equal to the chunk_sections of the row's entity in rag_vectors.
+# Triggers keep it current for any ingestion path: QA rows get their sections on insert, entity sections
+# are recomputed when rag_vectors rows change (rows are only rewritten if their sections actually changed).
+QA_SECTIONS_SCHEMA = [
+    f"ALTER TABLE rag_qa_vectors ADD COLUMN IF NOT EXISTS {QA_SECTIONS_COLUMN} text[] NOT NULL DEFAULT '{{}}'",
+    "CREATE INDEX IF NOT EXISTS rag_vectors_entity_name_idx ON rag_vectors ((metadata->>'entity_name'))",
+    "CREATE INDEX IF NOT EXISTS rag_vectors_chunk_section_idx ON rag_vectors ((metadata->>'chunk_section'))",
+    "CREATE INDEX IF NOT EXISTS rag_qa_vectors_entity_name_idx ON rag_qa_vectors ((metadata->>'entity_name'))",
+    f"CREATE INDEX IF NOT EXISTS rag_qa_vectors_chunk_sections_idx ON rag_qa_vectors USING GIN ({QA_SECTIONS_COLUMN})",
+    """
+    CREATE OR REPLACE FUNCTION rag_entity_sections(entity text) RETURNS text[] LANGUAGE sql STABLE AS $$
+        SELECT coalesce(
+            array_agg(DISTINCT metadata->>'chunk_section' ORDER BY metadata->>'chunk_section')
+                FILTER (WHERE metadata->>'chunk_section' IS NOT NULL),
+            '{}'
+        )
+        FROM rag_vectors
+        WHERE metadata->>'entity_name' = entity
+    $$
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION rag_qa_vectors_set_sections() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.{QA_SECTIONS_COLUMN} := rag_entity_sections(NEW.metadata->>'entity_name');
+        RETURN NEW;
+    END
+    $$
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION rag_vectors_sync_qa_sections() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        entity text;
+    BEGIN
+        FOREACH entity IN ARRAY ARRAY[
+            CASE WHEN TG_OP <> 'INSERT' THEN OLD.metadata->>'entity_name' END,
+            CASE WHEN TG_OP <> 'DELETE' THEN NEW.metadata->>'entity_name' END
+        ] LOOP
+            CONTINUE WHEN entity IS NULL;
+            UPDATE rag_qa_vectors
+            SET {QA_SECTIONS_COLUMN} = rag_entity_sections(entity)
+            WHERE metadata->>'entity_name' = entity
+            AND {QA_SECTIONS_COLUMN} <> rag_entity_sections(entity);
+        END LOOP;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS rag_qa_vectors_sections_trg ON rag_qa_vectors",
+    """
+    CREATE TRIGGER rag_qa_vectors_sections_trg
+    BEFORE INSERT OR UPDATE OF metadata ON rag_qa_vectors
+    FOR EACH ROW EXECUTE FUNCTION rag_qa_vectors_set_sections()
+    """,
+    "DROP TRIGGER IF EXISTS rag_vectors_qa_sections_trg ON rag_vectors",
+    """
+    CREATE TRIGGER rag_vectors_qa_sections_trg
+    AFTER INSERT OR UPDATE OF metadata OR DELETE ON rag_vectors
+    FOR EACH ROW EXECUTE FUNCTION rag_vectors_sync_qa_sections()
+    """,
+]
+
+
+def sync_qa_sections(args: argparse.Namespace) -> None:
+    """
+    Denormalize chunk_section into rag_qa_vectors (column, triggers, backfill, indexes)
+
+    QA section searches then filter on `chunk_sections @> ARRAY[section]` instead of a
+    DISTINCT subquery over rag_vectors, and each section gets a partial HNSW index.
+    """
+    for statement in QA_SECTIONS_SCHEMA:
+        execute_command(statement)
+
+    updated = execute_command(
+        f"UPDATE rag_qa_vectors SET {QA_SECTIONS_COLUMN} = rag_entity_sections(metadata->>'entity_name') "
+        f"WHERE {QA_SECTIONS_COLUMN} <> rag_entity_sections(metadata->>'entity_name')"
+    )
+    logger.info(f"Backfilled {QA_SECTIONS_COLUMN} of {updated} rag_qa_vectors rows")
+
+    if not args.skip_partial_indexes:
+        # Partial indexes are built for the configured search representation of rag_qa_vectors
+        storage = vector_storage("rag_qa_vectors")
+        sections = execute_query(
+            "SELECT DISTINCT metadata->>'chunk_section' AS section FROM rag_vectors WHERE metadata->>'chunk_section' IS NOT NULL"
+        )
+        for row in sections:
+            section = row["section"]
+            index_name = storage.index_name(f"rag_qa_vectors_{re.sub(r'[^a-z0-9]+', '_', section.lower())}_hnsw_idx")
+            logger.info(f"Creating partial HNSW index {index_name} for section {section}")
+            # Predicate must match qa_section_filter() literally for the planner to pick the index
+            execute_command(
+                storage.index_sql(index_name, "rag_qa_vectors", "embedding", where=f"{QA_SECTIONS_COLUMN} @> ARRAY[%s]::text[]"),
+                (args.m, args.ef_construction, section),
+            )
+
+    execute_command("ANALYZE rag_qa_vectors")
+    execute_command("ANALYZE rag_vectors")
+    logger.info(
+        f"Running servers switch to {QA_SECTIONS_COLUMN} within {QA_SECTIONS_RECHECK_INTERVAL:.0f}s ([RagSearch] qa_sections_recheck_interval)"
+    )
+
+
+def export_snapshot(args: argparse.Namespace) -> None:
+    """Export RAG tables to memory-mappable snapshots used by [RagSearch] backend = memory"""
+    for table in SNAPSHOT_TABLES:
+        if args.table and table != args.table:
+            continue
+
+        rows = fetch_rag_rows(table, include_embeddings=True)
+        if not rows:
+            logger.warning(f"{table} is empty or cannot be read, snapshot not written")
+            continue
+
+        embeddings = [row.pop("embedding") for row in rows]
+        write_snapshot(args.dir, table, embeddings, rows)
+        logger.info(f"Exported {len(rows)} rows of {table} to {args.dir}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RAG database management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fts_parser = subparsers.add_parser("create-fts-indexes", help="Create GIN full-text indexes for the embedding outage fallback")
+    fts_parser.set_defaults(func=create_fts_indexes)
+
+    hnsw_parser = subparsers.add_parser("create-hnsw-index", help="Create HNSW cosine indexes on RAG vector columns")
+    hnsw_parser.add_argument("--table", help="Only index this table (default: all RAG vector tables)")
+    hnsw_parser.add_argument("--m", type=int, default=AGENT_CONFIG.getint("VectorIndex", "m", fallback=16))
+    hnsw_parser.add_argument("--ef-construction", type=int, default=AGENT_CONFIG.getint("VectorIndex", "ef_construction", fallback=64))
+    hnsw_parser.add_argument("--replace", action="store_true", help="Drop and rebuild existing indexes (e.g. with new build parameters)")
+    hnsw_parser.add_argument("--storage", help="Index representation, e.g. halfvec, binary:512 (default: [VectorQuantization] of each table)")
+    hnsw_parser.set_defaults(func=create_hnsw_index)
+
+    report_parser = subparsers.add_parser("hnsw-report", help="Report recall@k and latency of HNSW searches per ef_search")
+    report_parser.add_argument("--table", default="rag_qa_vectors")
+    report_parser.add_argument("--column", default="embedding")
+    report_parser.add_argument("--k", type=int, default=10)
+    report_parser.add_argument("--queries", type=int, default=50)
+    report_parser.add_argument("--ef-search", default="10,20,40,80,160", help="Comma separated ef_search values")
+    report_parser.add_argument("--json", help="Write the report to this JSON file")
+    report_parser.set_defaults(func=hnsw_report)
+
+    quantization_parser = subparsers.add_parser("quantization-report", help="Report recall@k, latency and index size of quantized searches")
+    quantization_parser.add_argument("--table", default="rag_vectors", choices=QUANTIZED_TABLES)
+    quantization_parser.add_argument("--k", type=int, default=10)
+    quantization_parser.add_argument("--queries", type=int, default=50)
+    quantization_parser.add_argument(
+        "--storages", default="full,halfvec,binary,halfvec:256,binary:512", help="Comma separated representations (mode or mode:dimensions)"
+    )
+    quantization_parser.add_argument("--rerank-factor", type=int, default=DEFAULT_RERANK_FACTOR)
+    quantization_parser.add_argument("--json", help="Write the report to this JSON file")
+    quantization_parser.set_defaults(func=quantization_report)
+
+    sections_parser = subparsers.add_parser("sync-qa-sections", help="Denormalize chunk_section into rag_qa_vectors and keep it in sync")
+    sections_parser.add_argument("--skip-partial-indexes", action="store_true", help="Do not create per-section partial HNSW indexes")
+    sections_parser.add_argument("--m", type=int, default=AGENT_CONFIG.getint("VectorIndex", "m", fallback=16))
+    sections_parser.add_argument("--ef-construction", type=int, default=AGENT_CONFIG.getint("VectorIndex", "ef_construction", fallback=64))
+    sections_parser.set_defaults(func=sync_qa_sections)
+
+    snapshot_parser = subparsers.add_parser("export-snapshot", help="Export RAG tables to memory-mapped snapshots for the in-process index")
+    snapshot_parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    snapshot_parser.add_argument("--table", choices=SNAPSHOT_TABLES, help="Only export this table")
+    snapshot_parser.set_defaults(func=export_snapshot)
+
+    return parser
+
+
+def main() -> int:
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    args = build_parser().parse_args()
+
+    if not initialize_postgres_db():
+        logger.error("Cannot connect to PostgreSQL")
+        return 1
+
+    try:
+        args.func(args)
+    except Exception as e:
+        logger.error(f"Command {args.command} failed: {str(e)}")
+        return 1
+    finally:
+        close_postgres_connection()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
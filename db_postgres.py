@@ -6,21 +6,110 @@ Manages PostgreSQL database connection for the application
 
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
+import numpy as np
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
+
+from cancellation import cancel_callback, check_cancelled
+from workload_config import AGENT_CONFIG
 
 # Logger
 logger = logging.getLogger("PGSQLHandler")
 
-# Global database connection
-POSTGRES_CONNECTION: Optional[psycopg2.extensions.connection] = None
+# Global pool of database connections (shared by the main loop, prefetch and tool threads)
+POSTGRES_POOL: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+# ThreadedConnectionPool raises when exhausted - callers wait on this semaphore instead
+_POOL_SLOTS: Optional[threading.BoundedSemaphore] = None
+
+# HNSW search settings applied to every pooled connection (see [VectorIndex] in config.ini)
+HNSW_EF_SEARCH = AGENT_CONFIG.getint("VectorIndex", "ef_search", fallback=40)
+HNSW_ITERATIVE_SCAN = AGENT_CONFIG.get("VectorIndex", "iterative_scan", fallback="relaxed_order")
+
+
+class VectorConnection(psycopg2.extensions.connection):
+    """Connection that remembers whether pgvector typecasters were registered on it"""
+
+    vector_types_registered = False
+
+
+class NumpyVectorAdapter:
+    """Adapt float32 NumPy arrays to pgvector literals (shortest float32 repr, no Python float round trip)"""
+
+    def __init__(self, value: np.ndarray):
+        self.value = value
+
+    def getquoted(self) -> bytes:
+        return ("'[" + ",".join(map(str, self.value.astype(np.float32, copy=False).ravel())) + "]'").encode("ascii")
+
+
+psycopg2.extensions.register_adapter(np.ndarray, NumpyVectorAdapter)
+
+
+def to_pgvector(embedding: List[float] | np.ndarray) -> np.ndarray:
+    """Convert an embedding to a float32 array, passed to queries as a vector parameter"""
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def decode_vector(value: memoryview | bytes | None) -> Optional[np.ndarray]:
+    """
+    Decode binary pgvector value selected with vector_send(column)
+
+    Format: int16 dimension, int16 unused, dimension x big-endian float4
+    """
+    if value is None:
+        return None
+    return np.frombuffer(value, dtype=">f4", offset=4).astype(np.float32)
+
+
+def _cast_vector(value: str | None, cursor) -> Optional[np.ndarray]:
+    if value is None:
+        return None
+    return np.fromstring(value[1:-1], dtype=np.float32, sep=",")
+
+
+def register_vector_adapters(connection: psycopg2.extensions.connection) -> None:
+    """Return `vector` columns selected in text form as float32 NumPy arrays on this connection"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT to_regtype('vector')::oid")
+    (vector_oid,) = cursor.fetchone() or [None]
+    cursor.close()
+
+    if vector_oid:
+        vector_type = psycopg2.extensions.new_type((vector_oid,), "VECTOR", _cast_vector)
+        psycopg2.extensions.register_type(vector_type, connection)
+        apply_vector_search_settings(connection)
+
+
+def apply_vector_search_settings(connection: psycopg2.extensions.connection, ef_search: Optional[int] = None) -> None:
+    """
+    Set HNSW search parameters for this session
+
+    iterative_scan (pgvector >= 0.8) lets filtered searches keep scanning the index until LIMIT rows
+    pass the WHERE clause instead of returning fewer rows than requested.
+    Settings unknown to the installed pgvector version are skipped.
+    """
+    settings = [("hnsw.ef_search", str(ef_search or HNSW_EF_SEARCH))]
+    if HNSW_ITERATIVE_SCAN and HNSW_ITERATIVE_SCAN != "off":
+        settings.append(("hnsw.iterative_scan", HNSW_ITERATIVE_SCAN))
+
+    cursor = connection.cursor()
+    for name, value in settings:
+        try:
+            cursor.execute("SELECT set_config(%s, %s, false)", (name, value))
+        except Exception as e:
+            logger.warning(f"Cannot set {name}={value}: {str(e)}")
+    cursor.close()
 
 
 def initialize_postgres_db():
-    """Initialize PostgreSQL database connection (keep it open for regular queries)"""
-    global POSTGRES_CONNECTION
+    """Initialize PostgreSQL connection pool (keep it open for regular queries)"""
+    global POSTGRES_POOL, _POOL_SLOTS
 
     try:
         # Get database configuration from environment
@@ -29,17 +118,34 @@ def initialize_postgres_db():
         user = os.environ["POSTGRES_USER"]
         password = os.environ["POSTGRES_PASSWORD"]
         database = os.environ["POSTGRES_DB"]
+        pool_size = int(os.environ.get("POSTGRES_POOL_SIZE", "8"))
+        # Optional libpq options, e.g. "-c search_path=rag_bench,public" (used by the retrieval benchmark)
+        options = os.environ.get("POSTGRES_OPTIONS") or None
+
+        logger.info(f"Opening PostgreSQL connection pool: {host}:{port}/{database} (max {pool_size} connections)")
 
-        logger.info(f"Opening PostgreSQL database connection: {host}:{port}/{database}")
+        close_postgres_connection()
 
         # Connect to database
-        POSTGRES_CONNECTION = psycopg2.connect(host=host, port=port, user=user, password=password, database=database)
+        POSTGRES_POOL = psycopg2.pool.ThreadedConnectionPool(
+            1,
+            pool_size,
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=database,
+            options=options,
+            connection_factory=VectorConnection,
+        )
+        _POOL_SLOTS = threading.BoundedSemaphore(pool_size)
 
         # Test connection
-        cursor = POSTGRES_CONNECTION.cursor()
-        cursor.execute("SELECT version()")
-        (version,) = cursor.fetchone() or ["Unknown version"]
-        cursor.close()
+        with borrow_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT version()")
+            (version,) = cursor.fetchone() or ["Unknown version"]
+            cursor.close()
 
         logger.info("PostgreSQL database connected successfully")
         logger.info(f"PostgreSQL version: {version}")
@@ -50,10 +156,41 @@ def initialize_postgres_db():
         import traceback
 
         logger.error(traceback.format_exc())
-        POSTGRES_CONNECTION = None
+        POSTGRES_POOL = None
         return False
 
 
+@contextmanager
+def borrow_connection() -> Iterator[psycopg2.extensions.connection]:
+    """Borrow a connection from the pool (autocommit, so pooled connections never sit idle in transaction)"""
+    if POSTGRES_POOL is None or POSTGRES_POOL.closed:
+        raise ValueError("PostgreSQL connection not initialized. Call initialize_postgres_db() first.")
+
+    check_cancelled()
+
+    pool = POSTGRES_POOL
+    slots = _POOL_SLOTS
+    if slots is not None:
+        slots.acquire()
+
+    try:
+        connection = pool.getconn()
+        try:
+            if not connection.autocommit:
+                connection.autocommit = True
+            if isinstance(connection, VectorConnection) and not connection.vector_types_registered:
+                register_vector_adapters(connection)
+                connection.vector_types_registered = True
+            # A cancelled agent turn aborts the running query (QueryCanceledError in this thread)
+            with cancel_callback(connection.cancel):
+                yield connection
+        finally:
+            pool.putconn(connection, close=bool(connection.closed))
+    finally:
+        if slots is not None:
+            slots.release()
+
+
 def execute_query(query: str, params: tuple | list | None = None) -> List[Dict[str, Any]]:
     """
     Execute a raw SQL query on the PostgreSQL database
@@ -65,48 +202,81 @@ def execute_query(query: str, params: tuple | list | None = None) -> List[Dict[s
     Returns:
         List of dictionaries representing rows
     """
-    global POSTGRES_CONNECTION
-    if POSTGRES_CONNECTION is None:
+    if POSTGRES_POOL is None:
         raise ValueError("PostgreSQL connection not initialized. Call initialize_postgres_db() first.")
 
     # Make sure connection is established
-    if not POSTGRES_CONNECTION or POSTGRES_CONNECTION.closed:
+    if POSTGRES_POOL.closed:
         if not initialize_postgres_db():
             logger.error("Failed to initialize PostgreSQL database connection")
             return []
 
     try:
-        cursor = POSTGRES_CONNECTION.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with borrow_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
 
-        rows = cursor.fetchall()
-        result = [dict(row) for row in rows]
-        cursor.close()
-        return result
+            rows = cursor.fetchall()
+            result = [dict(row) for row in rows]
+            cursor.close()
+            return result
 
     except Exception as e:
         logger.error(f"Error executing query: {str(e)}")
         import traceback
 
         logger.error(traceback.format_exc())
-        if POSTGRES_CONNECTION:
-            POSTGRES_CONNECTION.rollback()
         return []
 
 
+def execute_command(query: str, params: tuple | list | None = None) -> int:
+    """
+    Execute a SQL statement that does not return rows (DDL, UPDATE, maintenance)
+
+    Args:
+        query: SQL statement to execute
+        params: Optional parameters for parameterized statements
+
+    Returns:
+        Number of affected rows (-1 if not applicable)
+    """
+    if POSTGRES_POOL is None or POSTGRES_POOL.closed:
+        if not initialize_postgres_db():
+            raise ValueError("PostgreSQL connection not initialized. Call initialize_postgres_db() first.")
+
+    with borrow_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        rowcount = cursor.rowcount
+        cursor.close()
+        return rowcount
+
+
 def get_postgres_database_info() -> List[str]:
     info = []
 
-    if not POSTGRES_CONNECTION or POSTGRES_CONNECTION.closed:
+    if POSTGRES_POOL is None or POSTGRES_POOL.closed:
         info.append("⚠️  PostgreSQL database not connected")
         return info
 
     try:
-        cursor = POSTGRES_CONNECTION.cursor()
+        with borrow_connection() as connection:
+            info.extend(_database_info(connection))
+    except Exception as e:
+        info.append(f"⚠️  Error getting PostgreSQL info: {str(e)}")
+
+    return info
+
+
+def _database_info(connection: psycopg2.extensions.connection) -> List[str]:
+    info = []
+
+    try:
+        cursor = connection.cursor()
 
         # Get database version
         cursor.execute("SELECT version()")
@@ -166,10 +336,11 @@ def get_postgres_database_info() -> List[str]:
 
 
 def close_postgres_connection():
-    """Close the PostgreSQL database connection"""
-    global POSTGRES_CONNECTION
+    """Close all PostgreSQL connections of the pool"""
+    global POSTGRES_POOL
 
-    if POSTGRES_CONNECTION and not POSTGRES_CONNECTION.closed:
-        POSTGRES_CONNECTION.close()
-        POSTGRES_CONNECTION = None
+    if POSTGRES_POOL is not None and not POSTGRES_POOL.closed:
+        POSTGRES_POOL.closeall()
         logger.info("PostgreSQL database connection closed")
+
+    POSTGRES_POOL = None
@@ -1,12 +1,323 @@
+#!/usr/bin/env python3
+"""
+Embedder
+Pluggable embedding backends (Ollama HTTP, in-process CPU model, deterministic hashed features)
+"""
+
+import hashlib
+import logging
 import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
 from typing import List, Optional
 
-import requests
+import numpy as np
+
+from llm_clients import get_http_session
+from workload_config import AGENT_CONFIG
+
+try:
+    from sentence_transformers import SentenceTransformer
+
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+# Logger
+logger = logging.getLogger("Embedder")
 
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "https://localhost:11434")
 
-def embed_ollama(text: str, model: str) -> List[float]:
-    response = requests.post(OLLAMA_HOST + "/api/embeddings", json={"model": model, "prompt": text}, timeout=30)
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+DEFAULT_EMBEDDING_DIMENSION = 768
+
+
+class EmbeddingCompatibilityError(ValueError):
+    """Raised when embeddings of a backend cannot be compared with stored vectors"""
+
+
+class CircuitBreaker:
+    """
+    Fail-fast guard for the embedding service.
+
+    After `failure_threshold` consecutive failures (errors or calls slower than `slow_call_seconds`)
+    the breaker opens and requests are rejected immediately. After `reset_seconds` a single
+    trial request is let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0, slow_call_seconds: float = 2.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected_calls = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_seconds:
+                # Let a single trial request through
+                self.state = self.HALF_OPEN
+                return True
+
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self, elapsed: float = 0.0) -> None:
+        if elapsed > self.slow_call_seconds:
+            self.record_failure(f"slow call ({elapsed:.2f}s)")
+            return
+
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Embedding circuit breaker closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self, reason: str = "") -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Embedding circuit breaker opened after {self.consecutive_failures} failures: {reason}")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == self.OPEN and time.time() - self.opened_at < self.reset_seconds
+
+
+class EmbeddingBackend(ABC):
+    """
+    Base class for embedding backends.
+
+    Every backend declares the dimension of the vectors it produces and whether they are
+    L2-normalized, so RAG tables and caches can verify they hold comparable vectors.
+    """
+
+    name: str = "abstract"
+
+    def __init__(self, model: str, dimension: int, normalized: bool):
+        self.model = model
+        self.dimension = dimension
+        self.normalized = normalized
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifier of the vector space produced by this backend (used in cache keys)"""
+        return f"{self.name}:{self.model}:{self.dimension}"
+
+    @abstractmethod
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text, raises on failure"""
+        pass
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts, backends with native batching should override it"""
+        return [self.embed(text) for text in texts]
+
+    def check_compatible(self, dimension: int, normalized: Optional[bool] = None, source: str = "vectors") -> None:
+        """Raise EmbeddingCompatibilityError if vectors of this backend cannot be compared with `source`"""
+        if dimension != self.dimension:
+            raise EmbeddingCompatibilityError(
+                f"Embedding backend {self.fingerprint} produces {self.dimension}-dim vectors, {source} has {dimension}-dim vectors"
+            )
+        if normalized and not self.normalized:
+            raise EmbeddingCompatibilityError(f"Embedding backend {self.fingerprint} does not produce normalized vectors required by {source}")
+
+    def describe(self) -> str:
+        return f"{self.fingerprint} (normalized={self.normalized})"
+
+
+class OllamaEmbeddingBackend(EmbeddingBackend):
+    """Embeddings served by Ollama over HTTP"""
+
+    name = "ollama"
+
+    def __init__(
+        self,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        dimension: int = DEFAULT_EMBEDDING_DIMENSION,
+        host: str = OLLAMA_HOST,
+        timeout: float = 30,
+    ):
+        super().__init__(model, dimension, normalized=False)
+        self.host = host
+        self.timeout = timeout
+
+    def embed(self, text: str) -> List[float]:
+        return embed_ollama(text, self.model, host=self.host, timeout=self.timeout)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        response = get_http_session().post(self.host + "/api/embed", json={"model": self.model, "input": texts}, timeout=self.timeout)
+        if response.status_code != 200:
+            raise Exception(f"Failed to get embeddings: {response.text}")
+
+        return response.json()["embeddings"]
+
+
+class LocalModelEmbeddingBackend(EmbeddingBackend):
+    """In-process CPU embedding model (sentence-transformers) for air-gapped nodes"""
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = "nomic-ai/nomic-embed-text-v1.5",
+        dimension: int = DEFAULT_EMBEDDING_DIMENSION,
+        prefix: str = "",
+        normalized: bool = False,
+    ):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers is required for the local embedding backend")
+
+        super().__init__(model, dimension, normalized=normalized)
+        self.prefix = prefix
+        self._model: Optional["SentenceTransformer"] = None
+        self._lock = threading.Lock()
+
+    def _get_model(self) -> "SentenceTransformer":
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Loading local embedding model {self.model}")
+                self._model = SentenceTransformer(self.model, device="cpu", trust_remote_code=True)
+
+                model_dimension = self._model.get_sentence_embedding_dimension()
+                if model_dimension is not None and model_dimension < self.dimension:
+                    raise EmbeddingCompatibilityError(f"Local model {self.model} produces {model_dimension}-dim vectors, {self.dimension} requested")
+            return self._model
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        vectors = self._get_model().encode(
+            [self.prefix + text for text in texts],
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalized,
+        )
+        return [vector[: self.dimension].tolist() for vector in vectors]
+
+
+class HashedEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic hashed-feature embedder for CI, load tests and benchmarks.
+
+    Words and word bigrams are hashed (blake2b, stable across processes) into signed
+    buckets and the vector is L2-normalized. Texts sharing vocabulary get similar vectors.
+    """
+
+    name = "hashed"
+
+    TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, model: str = "hashed-bigrams", dimension: int = DEFAULT_EMBEDDING_DIMENSION):
+        super().__init__(model, dimension, normalized=True)
+
+    def _features(self, text: str) -> List[str]:
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+    def embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+
+        for feature in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.dimension] += sign
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0.0:
+            vector /= norm
+
+        return vector.tolist()
+
+
+EMBEDDING_BACKENDS = {
+    OllamaEmbeddingBackend.name: OllamaEmbeddingBackend,
+    LocalModelEmbeddingBackend.name: LocalModelEmbeddingBackend,
+    HashedEmbeddingBackend.name: HashedEmbeddingBackend,
+}
+
+
+def create_embedding_backend(backend_name: Optional[str] = None) -> EmbeddingBackend:
+    """Create embedding backend configured in the [Embedder] section of config.ini"""
+    section = "Embedder"
+    backend_name = backend_name or AGENT_CONFIG.get(section, "backend", fallback=OllamaEmbeddingBackend.name)
+    dimension = AGENT_CONFIG.getint(section, "dimension", fallback=DEFAULT_EMBEDDING_DIMENSION)
+
+    if backend_name == OllamaEmbeddingBackend.name:
+        return OllamaEmbeddingBackend(
+            model=os.getenv("EMBEDDING_MODEL_ID", AGENT_CONFIG.get(section, "model", fallback=DEFAULT_EMBEDDING_MODEL)),
+            dimension=dimension,
+            timeout=AGENT_CONFIG.getfloat(section, "timeout", fallback=30),
+        )
+    if backend_name == LocalModelEmbeddingBackend.name:
+        return LocalModelEmbeddingBackend(
+            model=AGENT_CONFIG.get(section, "local_model", fallback="nomic-ai/nomic-embed-text-v1.5"),
+            dimension=dimension,
+            prefix=AGENT_CONFIG.get(section, "local_prefix", fallback=""),
+        )
+    if backend_name == HashedEmbeddingBackend.name:
+        return HashedEmbeddingBackend(dimension=dimension)
+
+    raise ValueError(f"Unknown embedding backend '{backend_name}', available: {', '.join(EMBEDDING_BACKENDS)}")
+
+
+_EMBEDDING_BACKEND: Optional[EmbeddingBackend] = None
+_EMBEDDING_BACKEND_LOCK = threading.Lock()
+
+embedding_circuit_breaker = CircuitBreaker(
+    failure_threshold=AGENT_CONFIG.getint("Embedder", "breaker_failure_threshold", fallback=3),
+    reset_seconds=AGENT_CONFIG.getfloat("Embedder", "breaker_reset_seconds", fallback=30.0),
+    slow_call_seconds=AGENT_CONFIG.getfloat("Embedder", "breaker_slow_call_seconds", fallback=2.0),
+)
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    """Return process-wide embedding backend (created lazily from config)"""
+    global _EMBEDDING_BACKEND
+
+    if _EMBEDDING_BACKEND is None:
+        with _EMBEDDING_BACKEND_LOCK:
+            if _EMBEDDING_BACKEND is None:
+                _EMBEDDING_BACKEND = create_embedding_backend()
+                logger.info(f"Embedding backend: {_EMBEDDING_BACKEND.describe()}")
+
+    return _EMBEDDING_BACKEND
+
+
+def set_embedding_backend(backend: EmbeddingBackend) -> None:
+    """Replace process-wide embedding backend (benchmarks, load tests)"""
+    global _EMBEDDING_BACKEND
+
+    with _EMBEDDING_BACKEND_LOCK:
+        _EMBEDDING_BACKEND = backend
+    logger.info(f"Embedding backend: {backend.describe()}")
+
+
+def embed_ollama(text: str, model: str, host: str = OLLAMA_HOST, timeout: float = 30) -> List[float]:
+    response = get_http_session().post(host + "/api/embeddings", json={"model": model, "prompt": text}, timeout=timeout)
     if response.status_code != 200:
         raise Exception(f"Failed to get embeddings: {response.text}")
 
@@ -15,9 +326,42 @@ def embed_ollama(text: str, model: str) -> List[float]:
     return embedding
 
 
+def embedding_available() -> bool:
+    """False while the embedding circuit breaker is open - callers should use non-vector fallbacks"""
+    return not embedding_circuit_breaker.is_open
+
+
 def embd(text: str) -> Optional[List[float]]:
+    if not embedding_circuit_breaker.allow_request():
+        logger.debug("Embedding circuit breaker is open, skipping embedding request")
+        return None
+
+    backend = get_embedding_backend()
+    start_time = time.time()
     try:
-        return embed_ollama(text, "nomic-embed-text")
+        embedding = backend.embed(text)
     except Exception as e:
-        print(f"Error generating embeddings: {e}")
+        logger.error(f"Error generating embeddings with {backend.fingerprint}: {e}")
+        embedding_circuit_breaker.record_failure(str(e))
+        return None
+
+    embedding_circuit_breaker.record_success(time.time() - start_time)
+    return embedding
+
+
+def embd_batch(texts: List[str]) -> Optional[List[List[float]]]:
+    if not embedding_circuit_breaker.allow_request():
+        logger.debug("Embedding circuit breaker is open, skipping batch embedding request")
         return None
+
+    backend = get_embedding_backend()
+    start_time = time.time()
+    try:
+        embeddings = backend.embed_batch(texts)
+    except Exception as e:
+        logger.error(f"Error generating batch embeddings with {backend.fingerprint}: {e}")
+        embedding_circuit_breaker.record_failure(str(e))
+        return None
+
+    embedding_circuit_breaker.record_success(time.time() - start_time)
+    return embeddings
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Hedging
+Latency of agent turns and the effect and cost of hedged FallbackAgent turns
+
+When enabled, the agent cascade (workload_agent_system) starts a FallbackAgent turn once the
+T3RN turn runs longer than its latency quantile; the first answer wins and the other turn is
+cancelled. Its RAG preload can also start speculatively with every message.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Deque, Optional
+
+from workload_config import AGENT_CONFIG
+
+SECTION = "AgentSystem"
+
+
+class LatencyWindow:
+    """Latencies (seconds) of the last `size` samples"""
+
+    def __init__(self, size: int = 200):
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """Nearest-rank percentile (quantile in 0..1), None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = min(max(math.ceil(quantile * len(samples)), 1), len(samples))
+        return samples[rank - 1]
+
+
+class HedgeStats:
+    """
+    Hedged turns, their winners and extra tokens, and the tail latency of answers
+
+    T3RN latencies of turns lost to a hedge are recorded as their running time at cancellation
+    (a lower bound), so the hedge delay does not drift down as slow turns get cancelled.
+    """
+
+    def __init__(self, name: str, window: int = 200):
+        self.name = name
+
+        self._lock = threading.Lock()
+        # T3RN turns that answered (or lost to a hedge), source of the hedge delay
+        self.t3rn_latency = LatencyWindow(window)
+        # Time to answer of the whole cascade
+        self.message_latency = LatencyWindow(window)
+        self.hedges = 0
+        self.fallback_wins = 0
+        # Tokens of hedged FallbackAgent turns and of T3RN turns cancelled by a winning hedge
+        self.hedge_tokens = 0
+        self.abandoned_tokens = 0
+        self.preloads = 0
+        self.preloads_used = 0
+
+    def hedge_delay(self, quantile: float, min_samples: int) -> Optional[float]:
+        """Seconds after which a T3RN turn is hedged (None until min_samples turns were measured)"""
+        if len(self.t3rn_latency) < min_samples:
+            return None
+        return self.t3rn_latency.percentile(quantile)
+
+    def record_hedge(self, fallback_won: bool, hedge_tokens: int, abandoned_tokens: int) -> None:
+        with self._lock:
+            self.hedges += 1
+            self.fallback_wins += 1 if fallback_won else 0
+            self.hedge_tokens += hedge_tokens
+            self.abandoned_tokens += abandoned_tokens
+
+    def record_preload(self, used: bool) -> None:
+        with self._lock:
+            self.preloads += 1
+            self.preloads_used += 1 if used else 0
+
+    def format_stats(self) -> str:
+        def seconds(value: Optional[float]) -> str:
+            return f"{value:.2f}s" if value is not None else "-"
+
+        with self._lock:
+            return (
+                f"🏁 {self.name}: {self.hedges} hedges ({self.fallback_wins} won by fallback), "
+                f"{self.hedge_tokens} hedge tokens, {self.abandoned_tokens} abandoned T3RN tokens, "
+                f"{self.preloads_used}/{self.preloads} preloads used, "
+                f"p95/p99 T3RN {seconds(self.t3rn_latency.percentile(0.95))}/{seconds(self.t3rn_latency.percentile(0.99))} "
+                f"vs answer {seconds(self.message_latency.percentile(0.95))}/{seconds(self.message_latency.percentile(0.99))}"
+            )
+
+
+hedge_stats = HedgeStats(name="Fallback hedging", window=AGENT_CONFIG.getint(SECTION, "latency_window", fallback=200))
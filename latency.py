@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Latency
+Latency statistics shared by db_manage.py reports and the benchmarks
+"""
+
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+def measure(function: Callable[[], Any], repeat: int = 100, warmup: int = 3) -> Dict[str, float]:
+    """Call `function` repeatedly and return latency statistics in milliseconds"""
+    for _ in range(warmup):
+        function()
+
+    timings: List[float] = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    return latency_stats(timings)
+
+
+def latency_stats(timings_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(timings_ms, dtype=np.float64)
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "runs": len(timings_ms),
+    }
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Lexical Index
+In-memory BM25 inverted index over RAG chunk texts and reciprocal-rank fusion helpers
+"""
+
+import re
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+from vector_index import section_row_sets
+
+# Identifiers such as d1_m1_b1 are kept as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunk_text of snapshot-style rows (see vector_index.write_snapshot).
+
+    Per-posting BM25 weights are precomputed when the index is built, so a query is a sum of
+    the posting weight arrays of its terms followed by argpartition over the candidate rows.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        self.rows = rows
+        self.k1 = k1
+        self.b = b
+
+        documents = [tokenize(row.get("chunk_text") or "") for row in rows]
+        lengths = np.array([len(tokens) for tokens in documents], dtype=np.float32)
+        average_length = float(lengths.mean()) if len(rows) else 0.0
+
+        term_frequencies: Dict[str, Dict[int, int]] = {}
+        for index, tokens in enumerate(documents):
+            for token in tokens:
+                postings = term_frequencies.setdefault(token, {})
+                postings[index] = postings.get(index, 0) + 1
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, postings in term_frequencies.items():
+            document_ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            frequencies = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            idf = np.log(1.0 + (len(rows) - len(postings) + 0.5) / (len(postings) + 0.5))
+            normalization = k1 * (1.0 - b + b * lengths[document_ids] / max(average_length, 1.0))
+            weights = idf * frequencies * (k1 + 1.0) / (frequencies + normalization)
+            self._postings[term] = (document_ids, weights.astype(np.float32))
+
+        self._all_rows, self._section_rows = section_row_sets(rows)
+
+    @property
+    def terms(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str, limit: int, section: str | None = None) -> List[Tuple[int, float]]:
+        """
+        Top-k rows by BM25 score (rows without any query term are never returned)
+
+        Args:
+            query: Free text query
+            limit: Number of results
+            section: Only search rows of this chunk_section
+
+        Returns:
+            List of (row index, score) sorted by score descending
+        """
+        candidates = self._all_rows if section is None else self._section_rows.get(section, np.empty(0, dtype=np.int64))
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self._postings]
+        if limit <= 0 or len(candidates) == 0 or not terms:
+            return []
+
+        scores = np.zeros(len(self.rows), dtype=np.float32)
+        for term in terms:
+            document_ids, weights = self._postings[term]
+            scores[document_ids] += weights
+
+        candidate_scores = scores[candidates]
+        matching = np.flatnonzero(candidate_scores > 0.0)
+        if len(matching) == 0:
+            return []
+
+        k = min(limit, len(matching))
+        top = matching[np.argpartition(-candidate_scores[matching], k - 1)[:k]]
+        top = top[np.argsort(-candidate_scores[top])]
+        return list(zip(candidates[top].tolist(), candidate_scores[top].astype(float).tolist()))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse ranked lists of keys: score(key) = sum over lists of 1 / (k + rank), rank starting at 1
+
+    Returns:
+        List of (key, fused score) sorted by score descending (ties keep first-seen order)
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
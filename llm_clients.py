@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+LLM Clients
+Process-wide keep-alive async OpenAI and HTTP clients
+
+Agents, memory managers and the Ollama embedder share these clients instead of building a
+client (and a connection pool) per turn or per session, so TLS connections are reused
+between messages. Connection reuse of every client is counted for the caches channel.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from workload_config import AGENT_CONFIG
+
+try:
+    import openai
+
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+try:
+    import httpx
+
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# Logger
+logger = logging.getLogger("LLMClients")
+
+SECTION = "LLMClients"
+
+
+class ConnectionStats:
+    """Requests sent and connections opened by one client"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def format_stats(self) -> str:
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            reuse_rate = reused / self.requests if self.requests else 0.0
+            return f"{self.name} {self.requests} requests / {self.connections} connections ({reuse_rate:.1%} reused)"
+
+
+class ClientRegistry:
+    """
+    Lazily created, long-lived clients
+
+    The OpenAI client is None when the openai package or OPENAI_API_KEY is missing, callers keep
+    their existing "OpenAI not available" handling.
+    """
+
+    def __init__(self):
+        self.max_connections = AGENT_CONFIG.getint(SECTION, "max_connections", fallback=20)
+        self.max_keepalive_connections = AGENT_CONFIG.getint(SECTION, "max_keepalive_connections", fallback=10)
+        self.keepalive_expiry = AGENT_CONFIG.getfloat(SECTION, "keepalive_expiry", fallback=60.0)
+        self.connect_timeout = AGENT_CONFIG.getfloat(SECTION, "connect_timeout", fallback=5.0)
+        self.read_timeout = AGENT_CONFIG.getfloat(SECTION, "read_timeout", fallback=60.0)
+        self.max_retries = AGENT_CONFIG.getint(SECTION, "max_retries", fallback=2)
+        self.http_pool_size = AGENT_CONFIG.getint(SECTION, "http_pool_size", fallback=10)
+
+        self._lock = threading.Lock()
+        self._async_openai: Optional["openai.AsyncOpenAI"] = None
+        self._http_session: Optional[requests.Session] = None
+        self.stats: Dict[str, ConnectionStats] = {"openai": ConnectionStats("openai")}
+
+    def _httpx_options(self) -> Dict[str, Any]:
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+        }
+
+    def async_openai_client(self) -> Optional["openai.AsyncOpenAI"]:
+        """Shared asynchronous OpenAI client (its connections belong to the event loop that uses them first)"""
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not OPENAI_AVAILABLE or not api_key:
+            return None
+
+        with self._lock:
+            if self._async_openai is None:
+                stats = self.stats["openai"]
+
+                # httpcore reports a connect event only when a new connection is opened
+                async def trace(event_name: str, info: dict) -> None:
+                    if event_name == "connection.connect_tcp.complete":
+                        stats.record_connection()
+
+                async def on_request(request: "httpx.Request") -> None:
+                    stats.record_request()
+                    request.extensions["trace"] = trace
+
+                # Without httpx the client keeps the default pool of the openai package (not counted)
+                http_client = httpx.AsyncClient(event_hooks={"request": [on_request]}, **self._httpx_options()) if HTTPX_AVAILABLE else None
+                self._async_openai = openai.AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=self.max_retries)
+                logger.info(f"Shared async OpenAI client created (max {self.max_connections} connections)")
+            return self._async_openai
+
+    def http_session(self) -> requests.Session:
+        """Shared keep-alive requests session (Ollama embeddings)"""
+        with self._lock:
+            if self._http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.http_pool_size, pool_maxsize=self.http_pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._http_session = session
+            return self._http_session
+
+    def _http_stats(self) -> ConnectionStats:
+        # urllib3 pools count the connections they open and the requests they send
+        stats = ConnectionStats("http")
+        if self._http_session is None:
+            return stats
+
+        pools = self._http_session.get_adapter("https://").poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                stats.requests += pool.num_requests
+                stats.connections += pool.num_connections
+        return stats
+
+    def format_stats(self) -> str:
+        clients = [self.stats["openai"], self._http_stats()]
+        return "🔌 Clients: " + ", ".join(stats.format_stats() for stats in clients)
+
+    def close(self) -> None:
+        """Close all clients (shutdown), they are recreated on the next use"""
+        with self._lock:
+            if self._http_session is not None:
+                self._http_session.close()
+            # The async client is closed by the garbage collector, it cannot be awaited here
+            self._async_openai = None
+            self._http_session = None
+
+
+client_registry = ClientRegistry()
+
+
+def get_async_openai_client() -> Optional["openai.AsyncOpenAI"]:
+    return client_registry.async_openai_client()
+
+
+def get_http_session() -> requests.Session:
+    return client_registry.http_session()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+RAG Prefetch
+Speculative embedding and RAG searches started as soon as a process message arrives
+"""
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from openai.types.chat import ChatCompletionMessageParam
+
+from embedder import embd, embedding_available
+from tools.db_rag_common import conversation_to_text, search_qa_similarity
+from tools.db_rag_get_general_knowledge import db_rag_get_general_knowledge
+from tools.db_rag_get_smalltalk import db_rag_get_smalltalk_from_embedding
+from workload_config import AGENT_CONFIG
+
+if TYPE_CHECKING:
+    from session import Session
+
+# Logger
+logger = logging.getLogger("RagPrefetch")
+
+SECTION = "RagPrefetch"
+
+PREFETCH_ENABLED = AGENT_CONFIG.getboolean(SECTION, "enable", fallback=True)
+PREFETCH_WAIT_TIMEOUT = AGENT_CONFIG.getfloat(SECTION, "wait_timeout", fallback=10.0)
+# Must match the limits used by ProactiveSmalltalk so prefetched rows can be reused as-is
+PREFETCH_SMALLTALK_LIMIT = AGENT_CONFIG.getint(SECTION, "smalltalk_limit", fallback=4)
+PREFETCH_QA_LIMIT = AGENT_CONFIG.getint(SECTION, "qa_limit", fallback=4)
+
+_executor = ThreadPoolExecutor(max_workers=AGENT_CONFIG.getint(SECTION, "max_workers", fallback=4), thread_name_prefix="rag-prefetch")
+
+
+class RagPrefetch:
+    """
+    Per-turn speculative RAG work.
+
+    Searches run in the background while the agent builds its prompt:
+    * general_knowledge - db_rag_get_general_knowledge(user text), also warms the query embedding
+      and RAG search caches used by the RAG tools
+    * conversation_embedding - embedding of the last exchange (as computed by ProactiveSmalltalk)
+    * smalltalk / qa - smalltalk and QA vector searches for the conversation embedding
+    """
+
+    def __init__(self, user_text: str, conversation: List["ChatCompletionMessageParam"]):
+        self.user_text = user_text
+        self.conversation_text = conversation_to_text(conversation)
+        self.started_at = time.time()
+        self.futures: Dict[str, Future] = {}
+
+    def start(self) -> "RagPrefetch":
+        self._submit("general_knowledge", db_rag_get_general_knowledge, self.user_text)
+        embedding_future = self._submit("conversation_embedding", embd, self.conversation_text)
+        self._submit("smalltalk", self._after_embedding, embedding_future, self._search_smalltalk)
+        self._submit("qa", self._after_embedding, embedding_future, self._search_qa)
+        return self
+
+    def _submit(self, name: str, function: Callable[..., Any], *args: Any) -> Future:
+        future = _executor.submit(function, *args)
+        self.futures[name] = future
+        return future
+
+    @staticmethod
+    def _after_embedding(embedding_future: Future, search: Callable[[List[float]], Any]) -> Any:
+        embedding = embedding_future.result()
+        if embedding is None:
+            return None
+        return search(embedding)
+
+    @staticmethod
+    def _search_smalltalk(embedding: List[float]) -> List[dict]:
+        return db_rag_get_smalltalk_from_embedding(embedding, RAG_SMALLTALK_SEARCH_LIMIT=PREFETCH_SMALLTALK_LIMIT)
+
+    @staticmethod
+    def _search_qa(embedding: List[float]) -> List[dict]:
+        return search_qa_similarity(embedding, limit=PREFETCH_QA_LIMIT)
+
+    def matches_conversation(self, conversation: List["ChatCompletionMessageParam"]) -> bool:
+        """True if prefetched conversation results were computed for the same exchange"""
+        return conversation_to_text(conversation) == self.conversation_text
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Wait for a prefetched result (it is already in flight, so waiting is never slower than recomputing)
+
+        Returns:
+            Result or None if the task is unknown, failed or did not finish in time
+        """
+        future = self.futures.get(name)
+        if future is None:
+            return None
+
+        try:
+            return future.result(timeout=PREFETCH_WAIT_TIMEOUT if timeout is None else timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Prefetch '{name}' did not finish in time")
+            return None
+        except Exception as e:
+            logger.error(f"Prefetch '{name}' failed: {str(e)}")
+            return None
+
+    def cancel(self) -> None:
+        for future in self.futures.values():
+            future.cancel()
+
+
+def start_rag_prefetch(session: "Session") -> Optional[RagPrefetch]:
+    """Start speculative RAG searches for the session's current user message"""
+    text = session.user_message.strip() if session.user_message else ""
+
+    if not PREFETCH_ENABLED or not text:
+        return None
+
+    if not embedding_available():
+        logger.info("Embedding circuit breaker is open, skipping RAG prefetch")
+        return None
+
+    if session.memory_manager is not None:
+        conversation = session.memory_manager.last_exchange(text)
+    else:
+        conversation = [{"role": "user", "content": text}]
+
+    return RagPrefetch(text, conversation).start()
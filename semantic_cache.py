@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Semantic Cache
+Approximate cache keyed by query embeddings (cosine distance within epsilon)
+"""
+
+import threading
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+
+def normalize_vector(vector: List[float] | np.ndarray) -> np.ndarray:
+    """Return vector as unit length float32 array (zero vectors are returned unchanged)"""
+    array = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(array))
+    if norm == 0.0:
+        return array
+    return array / norm
+
+
+class _Bucket:
+    """Ring buffer of normalized query embeddings sharing the same search parameters"""
+
+    def __init__(self, dimension: int, capacity: int):
+        self.dimension = dimension
+        self.matrix = np.zeros((capacity, dimension), dtype=np.float32)
+        self.values: List[Any] = [None] * capacity
+        self.count = 0
+        self.next_slot = 0
+
+    def lookup(self, query: np.ndarray) -> tuple[float, Any]:
+        if self.count == 0:
+            return -1.0, None
+
+        scores = self.matrix[: self.count] @ query
+        best = int(np.argmax(scores))
+        return float(scores[best]), self.values[best]
+
+    def insert(self, query: np.ndarray, value: Any) -> None:
+        slot = self.next_slot
+        self.matrix[slot] = query
+        self.values[slot] = value
+        self.next_slot = (slot + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+
+
+class SemanticSearchCache:
+    """
+    Cache for search results keyed by (query embedding, search parameters).
+
+    A lookup hits when a previously stored embedding with identical parameters has
+    cosine similarity >= 1 - epsilon with the new one. Stored embeddings are kept as
+    a normalized float32 matrix per parameter set, so a lookup is a single matmul.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, epsilon: float = 0.02, max_buckets: int = 64, enabled: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.epsilon = epsilon
+        self.enabled = enabled
+
+        self._buckets: LRUCache = LRUCache(maxsize=max_buckets)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.exact_hits = 0
+        self._hit_similarity_sum = 0.0
+        self._hit_similarity_min = 1.0
+
+    def get(self, embedding: List[float] | np.ndarray, params: Hashable) -> Optional[Any]:
+        """Return cached value for a near-duplicate embedding or None"""
+        if not self.enabled:
+            return None
+
+        query = normalize_vector(embedding)
+
+        with self._lock:
+            bucket: Optional[_Bucket] = self._buckets.get(params)
+            if bucket is None or bucket.dimension != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarity, value = bucket.lookup(query)
+            if similarity < 1.0 - self.epsilon:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if similarity >= 1.0 - 1e-6:
+                self.exact_hits += 1
+            self._hit_similarity_sum += similarity
+            self._hit_similarity_min = min(self._hit_similarity_min, similarity)
+            return value
+
+    def put(self, embedding: List[float] | np.ndarray, params: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        query = normalize_vector(embedding)
+
+        with self._lock:
+            bucket: Optional[_Bucket] = self._buckets.get(params)
+            if bucket is None or bucket.dimension != query.shape[0]:
+                # New parameter set (or embedding backend changed dimension) - start fresh
+                bucket = _Bucket(query.shape[0], self.max_entries)
+                self._buckets[params] = bucket
+            bucket.insert(query, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "epsilon": self.epsilon,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "avg_hit_similarity": self._hit_similarity_sum / self.hits if self.hits else None,
+                "min_hit_similarity": self._hit_similarity_min if self.hits else None,
+                "entries": sum(bucket.count for bucket in self._buckets.values()),
+            }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        if not stats["enabled"]:
+            return f"🗃️ {self.name}: disabled"
+
+        line = (
+            f"🗃️ {self.name}: {stats['hits']}/{stats['hits'] + stats['misses']} hits ({stats['hit_rate']:.1%}), "
+            f"{stats['exact_hits']} exact, {stats['entries']} entries, eps={self.epsilon}"
+        )
+        if stats["avg_hit_similarity"] is not None:
+            line += f", hit similarity avg={stats['avg_hit_similarity']:.4f} min={stats['min_hit_similarity']:.4f}"
+        return line
@@ -1,9 +1,11 @@
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional
 
 if TYPE_CHECKING:
+    from agents.base_agent import Agent
     from agents.memory_manager import MemoryManager
     from game_state_parser.parser import GameStateParser
+    from rag_prefetch import RagPrefetch
 
 
 @dataclass
@@ -17,6 +19,13 @@ class Session:
     user_message: Optional[str] = None
     memory_manager: Optional["MemoryManager"] = None
     game_state: Optional["GameStateParser"] = None
+    rag_prefetch: Optional["RagPrefetch"] = None
+    # Character prompt fragment of the agent (CHARACTER_BASE_T3RN / CHARACTER_BASE_T4RN)
+    character: Optional[str] = None
+    # Seconds to answer a message, set by the settings message ([AgentSystem] message_deadline if None)
+    message_deadline: Optional[float] = None
+    # Agents (with their modules and tools) reused for every message, keyed by class name
+    agents: Dict[str, "Agent"] = field(default_factory=dict)
 
     def get_memory(self):
         if self.memory_manager is None:
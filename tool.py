@@ -1,15 +1,27 @@
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Any, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
 
 from openai.types.chat import ChatCompletionToolParam
 from openai.types.shared_params.function_parameters import FunctionParameters
 
+from async_runtime import run_in_executor
+from cancellation import check_cancelled
+from tool_cache import ToolCachePolicy, normalize_arguments, tool_response_cache
+
+if TYPE_CHECKING:
+    from tools.db_rag_common import RagToolSpec
+
 
 @dataclass
 class T3RNTool:
     """
     Represents a tool function for the T3RN agent.
     This tool can be dependent on current session of LLM agent.
+    Tools backed by execute_universal_rag set rag_spec, so parallel calls can be batched.
+    Tools with native async implementations set async_function, the async agent loop runs
+    other tools on worker threads.
+    Pure read-only tools set cache, their responses are shared between sessions (tool_cache).
     """
 
     name: str
@@ -17,9 +29,43 @@ class T3RNTool:
     description: str
     system_prompt: str
     parameters: FunctionParameters
+    rag_spec: Optional["RagToolSpec"] = None
+    # Seconds a call may take before the agent answers with an error result ([T3RNAgent] tool_timeout if None)
+    timeout: Optional[float] = None
+    async_function: Optional[Callable[..., Awaitable[dict | str]]] = None
+    cache: Optional[ToolCachePolicy] = None
 
     def __call__(self, *args: Any, **kwds: Any) -> dict | str:
-        return self.function(*args, **kwds)
+        if self.cache is None or args:
+            return self.function(*args, **kwds)
+        return tool_response_cache.get_or_call(
+            self.name, self.cache_arguments(kwds), self.cache.ttl, lambda: self.function(**kwds), self.cache.cacheable
+        )
+
+    async def call_async(self, executor: Optional[Executor] = None, /, **kwargs: Any) -> dict | str:
+        """
+        Call the tool from the async agent loop (inherits the cancel scope of the calling task)
+
+        Args:
+            executor: Pool for sync tools (None - default executor of the event loop)
+        """
+        check_cancelled()
+        if self.cache is not None:
+            # Cached calls use the sync function, waiting for a coalesced call blocks a worker thread
+            return await run_in_executor(executor, self, **kwargs)
+        if self.async_function is not None:
+            return await self.async_function(**kwargs)
+        return await run_in_executor(executor, self.function, **kwargs)
+
+    def cache_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Arguments identifying a call in the tool cache: schema defaults filled in, strings normalized"""
+        properties = self.parameters.get("properties", {}) if isinstance(self.parameters, dict) else {}
+        defaults = {name: schema["default"] for name, schema in properties.items() if isinstance(schema, dict) and "default" in schema}
+        key_arguments = normalize_arguments({**defaults, **arguments})
+        for name in self.cache.unordered if self.cache is not None else ():
+            if isinstance(key_arguments.get(name), list):
+                key_arguments[name] = sorted(key_arguments[name], key=str)
+        return key_arguments
 
     def get_function_schema(self) -> "ChatCompletionToolParam":
         return {
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tool Cache
+Responses of deterministic read-only tools shared between sessions
+
+Tools declare themselves cacheable with a ToolCachePolicy (T3RNTool.cache). Their responses are
+kept in an in-process LRU and, when [ToolCache] redis_url is set and the redis package is
+installed, in Redis shared by all worker processes. Concurrent misses of the same call are
+coalesced: one caller runs the tool, the others wait for its response (in-process with an
+in-flight table, across processes with a short Redis lock).
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+
+from workload_config import AGENT_CONFIG
+
+try:
+    import redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Logger
+logger = logging.getLogger("ToolCache")
+
+SECTION = "ToolCache"
+
+
+def normalize_arguments(arguments: Any) -> Any:
+    """Arguments with case, surrounding and repeated whitespace of strings ignored"""
+    if isinstance(arguments, str):
+        return " ".join(arguments.split()).casefold()
+    if isinstance(arguments, dict):
+        return {key: normalize_arguments(value) for key, value in arguments.items()}
+    if isinstance(arguments, (list, tuple)):
+        return [normalize_arguments(value) for value in arguments]
+    return arguments
+
+
+def is_error_response(response: Any) -> bool:
+    """Error responses (status "error", also as JSON text) are never cached"""
+    if isinstance(response, str):
+        try:
+            response = json.loads(response)
+        except (json.JSONDecodeError, TypeError):
+            return response.strip().lower().startswith(("error:", "tool execution error:"))
+    return isinstance(response, dict) and response.get("status") == "error"
+
+
+@dataclass(frozen=True)
+class ToolCachePolicy:
+    """Marks a tool as a pure function of its arguments over near-static data"""
+
+    # Seconds a response is reused ([ToolCache] default_ttl if None)
+    ttl: Optional[float] = None
+    # List arguments whose order does not change the response (e.g. champions to compare)
+    unordered: Tuple[str, ...] = ()
+    # Responses are cached only if this returns True (e.g. all parts of a composite response were found)
+    cacheable: Optional[Callable[[Any], bool]] = None
+
+
+class _Flight:
+    """Call in progress, concurrent callers of the same key wait for its response"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _ToolStats:
+    def __init__(self):
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.shared_hits + self.coalesced
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+
+class ToolResponseCache:
+    """In-process LRU (optionally backed by Redis) of tool responses with per-call TTL"""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        default_ttl: float = 900.0,
+        enabled: bool = True,
+        redis_url: str = "",
+        key_prefix: str = "t3rn:tool",
+        lock_timeout: float = 10.0,
+    ):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self.key_prefix = key_prefix
+        self.lock_timeout = lock_timeout
+
+        self._lock = threading.Lock()
+        # key -> (expires at, response)
+        self._entries: LRUCache = LRUCache(maxsize=max_entries)
+        self._flights: Dict[str, _Flight] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+
+        self._redis: Optional["redis.Redis"] = None
+        if enabled and redis_url:
+            if REDIS_AVAILABLE:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+            else:
+                logger.warning("redis package not installed, tool responses are cached per process only")
+
+    def key(self, tool_name: str, key_arguments: Any) -> str:
+        digest = hashlib.sha1(json.dumps(key_arguments, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}:{tool_name}:{digest}"
+
+    def get_or_call(
+        self,
+        tool_name: str,
+        key_arguments: Any,
+        ttl: Optional[float],
+        call: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Cached response of a tool call, running call() on a miss
+
+        Args:
+            tool_name: Name of the tool
+            key_arguments: Normalized arguments identifying the call
+            ttl: Seconds the response is reused (default_ttl if None)
+            call: Runs the tool
+            cacheable: Whether a response may be cached (error responses never are)
+
+        Returns:
+            Response of the tool (a copy, cached responses are shared)
+        """
+        if not self.enabled:
+            return call()
+
+        key = self.key(tool_name, key_arguments)
+        ttl = ttl if ttl is not None else self.default_ttl
+
+        with self._lock:
+            stats = self._stats.setdefault(tool_name, _ToolStats())
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                stats.local_hits += 1
+                return copy.deepcopy(entry[1])
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if flight.done.wait(self.lock_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                with self._lock:
+                    stats.coalesced += 1
+                return copy.deepcopy(flight.response)
+            # The leader is stuck, do not wait for it any longer
+            with self._lock:
+                stats.misses += 1
+            return call()
+
+        try:
+            response, shared_hit = self._shared_get_or_call(key, ttl, call, cacheable)
+            with self._lock:
+                if shared_hit:
+                    stats.shared_hits += 1
+                else:
+                    stats.misses += 1
+                if shared_hit or self._storable(response, cacheable):
+                    self._entries[key] = (time.monotonic() + ttl, response)
+            flight.response = response
+            return copy.deepcopy(response)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    @staticmethod
+    def _storable(response: Any, cacheable: Optional[Callable[[Any], bool]]) -> bool:
+        return not is_error_response(response) and (cacheable is None or cacheable(response))
+
+    def _shared_get_or_call(
+        self, key: str, ttl: float, call: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Any, bool]:
+        """Response from Redis, or from call() by the process holding the Redis lock of the key"""
+        if self._redis is None:
+            return call(), False
+
+        lock_key = f"{key}:lock"
+        try:
+            cached = self._redis.get(key)
+            if cached is not None:
+                return json.loads(cached)["response"], True
+
+            locked = self._redis.set(lock_key, "1", nx=True, px=int(self.lock_timeout * 1000))
+            if not locked:
+                # Another process runs the tool, poll for its response until the lock expires
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    cached = self._redis.get(key)
+                    if cached is not None:
+                        return json.loads(cached)["response"], True
+        except Exception as e:
+            logger.warning(f"Shared tool cache unavailable: {str(e)}")
+            return call(), False
+
+        response = call()
+        try:
+            if self._storable(response, cacheable):
+                self._redis.set(key, json.dumps({"response": response}), px=int(ttl * 1000))
+            if locked:
+                self._redis.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Failed to store tool response in shared cache: {str(e)}")
+        return response, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def format_stats(self) -> str:
+        with self._lock:
+            if not self.enabled:
+                return f"🗄️ {self.name}: disabled"
+
+            totals = _ToolStats()
+            for stats in self._stats.values():
+                totals.local_hits += stats.local_hits
+                totals.shared_hits += stats.shared_hits
+                totals.coalesced += stats.coalesced
+                totals.misses += stats.misses
+
+            hit_rate = totals.hits / totals.lookups if totals.lookups else 0.0
+            per_tool = ", ".join(f"{name} {stats.hits}/{stats.lookups}" for name, stats in sorted(self._stats.items()))
+            backend = "redis" if self._redis is not None else "local"
+            return (
+                f"🗄️ {self.name} ({backend}): {totals.hits}/{totals.lookups} hits ({hit_rate:.1%}), "
+                f"{totals.local_hits} local, {totals.shared_hits} shared, {totals.coalesced} coalesced, "
+                f"{len(self._entries)} entries" + (f" [{per_tool}]" if per_tool else "")
+            )
+
+
+tool_response_cache = ToolResponseCache(
+    name="Tool response cache",
+    max_entries=AGENT_CONFIG.getint(SECTION, "max_entries", fallback=1024),
+    default_ttl=AGENT_CONFIG.getfloat(SECTION, "default_ttl", fallback=900.0),
+    enabled=AGENT_CONFIG.getboolean(SECTION, "enable", fallback=True),
+    redis_url=AGENT_CONFIG.get(SECTION, "redis_url", fallback=""),
+    key_prefix=AGENT_CONFIG.get(SECTION, "key_prefix", fallback="t3rn:tool"),
+    lock_timeout=AGENT_CONFIG.getfloat(SECTION, "lock_timeout", fallback=10.0),
+)
@@ -4,14 +4,22 @@ Get Champions List
 Retrieves list of all champions from PostgreSQL database
 """
 
+import hashlib
 import logging
+import threading
+import time
+from typing import Optional, Tuple
 
 # Import the global PostgreSQL connection
 from db_postgres import execute_query
+from workload_config import AGENT_CONFIG
 
 # Logger
 logger = logging.getLogger("ChampionsList")
 
+# Seconds the champions roster is reused before it is queried again
+ROSTER_TTL = AGENT_CONFIG.getfloat("PromptCache", "roster_ttl", fallback=300.0)
+
 
 def db_get_champions_list() -> dict:
     """
@@ -90,3 +98,35 @@ def db_get_champions_list_text() -> str:
     except Exception as e:
         logger.error(f"Error getting champions list text: {str(e)}")
         return "Champions list not available"
+
+
+_roster: Optional[Tuple[str, str, float]] = None
+_roster_lock = threading.Lock()
+
+
+def db_get_champions_roster() -> Tuple[str, str]:
+    """
+    Champions list text (see db_get_champions_list_text) and its version
+
+    A successfully loaded roster is reused for ROSTER_TTL seconds. The version is a hash of the
+    text, so prompts built from the roster only change when the roster does.
+
+    Returns:
+        Tuple of (comma-separated champion names, roster version)
+    """
+    global _roster
+
+    with _roster_lock:
+        if _roster is not None and time.time() - _roster[2] < ROSTER_TTL:
+            return _roster[0], _roster[1]
+
+    result_dict = db_get_champions_list()
+    if result_dict["status"] != "success":
+        # Not cached, the next turn tries again
+        return "Champions list not available", "unavailable"
+
+    text = ", ".join(result_dict["champions"])
+    version = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    with _roster_lock:
+        _roster = (text, version, time.time())
+    return text, version
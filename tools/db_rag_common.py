@@ -1,64 +1,523 @@
 import logging
+import os
 import random
-from typing import Any, Dict, List, Optional
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
-import numpy as np
-from cachetools import LRUCache, cached
+from cachetools import LRUCache
 from openai.types.chat import ChatCompletionMessageParam
 
-from db_postgres import execute_query
-from embedder import embd
+from context_packer import PACKING_ENABLED, pack_rag_results
+from db_postgres import decode_vector, execute_query, to_pgvector
+from embedder import EmbeddingCompatibilityError, embd, embd_batch, get_embedding_backend
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from semantic_cache import SemanticSearchCache
+from vector_index import (
+    MMR_FETCH_FACTOR,
+    SNAPSHOT_DIR,
+    SNAPSHOT_TABLES,
+    diversify_rows,
+    get_vector_snapshot,
+    load_snapshot_meta,
+    snapshot_paths,
+)
+from vector_quantization import vector_storage
+from workload_config import AGENT_CONFIG
 
 # Constants
 DEFAULT_RAG_SIMILARITY_THRESHOLD = 0.4
 DEFAULT_RAG_SIMILARITY_LIMIT = 4
 
+# Text search configuration of the full-text fallback, must match GIN index expressions created by db_manage.py
+FULL_TEXT_SEARCH_CONFIG = "english"
+
+# Tables holding embeddings that must match the configured embedding backend
+RAG_VECTOR_TABLES = ("rag_vectors", "rag_qa_vectors", "smalltalk_vectors")
+
 # Logger
 logger = logging.getLogger("DB RAG Common")
 
+# rag_qa_vectors.chunk_sections holds the chunk_sections of each row's entity in rag_vectors
+# (created, backfilled and kept in sync by triggers with `python db_manage.py sync-qa-sections`)
+QA_SECTIONS_COLUMN = "chunk_sections"
+# A missing column is looked up again after this many seconds, so running servers pick up sync-qa-sections
+QA_SECTIONS_RECHECK_INTERVAL = AGENT_CONFIG.getfloat("RagSearch", "qa_sections_recheck_interval", fallback=300.0)
+_qa_sections_column_present: Optional[bool] = None
+_qa_sections_checked_at = 0.0
+
+
+def qa_sections_available() -> bool:
+    """True if rag_qa_vectors has the denormalized chunk_sections column (a missing column is re-checked periodically)"""
+    global _qa_sections_column_present, _qa_sections_checked_at
+
+    recheck = _qa_sections_column_present is False and time.monotonic() - _qa_sections_checked_at >= QA_SECTIONS_RECHECK_INTERVAL
+    if _qa_sections_column_present is None or recheck:
+        rows = execute_query(
+            # to_regclass() resolves the table through search_path, like the searches themselves
+            "SELECT EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = to_regclass('rag_qa_vectors') AND attname = %s AND NOT attisdropped) AS present",
+            (QA_SECTIONS_COLUMN,),
+        )
+        if not rows:
+            # Database not reachable, check again next time
+            return False
+        present = bool(rows[0]["present"])
+        _qa_sections_checked_at = time.monotonic()
+        if not present and _qa_sections_column_present is None:
+            logger.warning(
+                "rag_qa_vectors.chunk_sections is missing, QA section searches use the slow subquery (run: python db_manage.py sync-qa-sections)"
+            )
+        elif present and _qa_sections_column_present is False:
+            logger.info("rag_qa_vectors.chunk_sections is now present, QA section searches use the column")
+        _qa_sections_column_present = present
+
+    return _qa_sections_column_present
+
+
+def qa_section_filter(alias: str = "") -> str:
+    """
+    SQL condition restricting rag_qa_vectors rows to one chunk_section (one %s parameter)
+
+    The literal `chunk_sections @> ARRAY[...]::text[]` form matches the predicates of the
+    per-section partial HNSW indexes created by db_manage.py.
+    """
+    prefix = f"{alias}." if alias else ""
+    if qa_sections_available():
+        return f"{prefix}{QA_SECTIONS_COLUMN} @> ARRAY[%s]::text[]"
+
+    return f"""{prefix}metadata->>'entity_name' IN (
+                        SELECT DISTINCT metadata->>'entity_name'
+                        FROM rag_vectors
+                        WHERE metadata->>'chunk_section' = %s
+                    )"""
+
+
+def fetch_rag_rows(table: str, include_embeddings: bool = False) -> List[Dict[str, Any]]:
+    """
+    Load all rows of a RAG table with the filters used by the SQL searches precomputed
+
+    rag_vectors rows are searchable unless their chunk_name contains QA and belong to their
+    chunk_section; rag_qa_vectors rows belong to the chunk_sections of their entity.
+
+    Args:
+        table: rag_vectors or rag_qa_vectors
+        include_embeddings: Also return `embedding` (float32 array) for each row
+
+    Returns:
+        List of dictionaries with id, chunk_text, metadata, sections, searchable (and embedding)
+    """
+    entity_sections: Dict[str, set] = {}
+    if table == "rag_qa_vectors":
+        for row in execute_query(
+            "SELECT DISTINCT metadata->>'entity_name' AS entity, metadata->>'chunk_section' AS section FROM rag_vectors WHERE metadata->>'chunk_section' IS NOT NULL"
+        ):
+            entity_sections.setdefault(row["entity"], set()).add(row["section"])
+
+    embedding_column = ", vector_send(embedding) AS embedding" if include_embeddings else ""
+    results = execute_query(f"SELECT id, chunk_text, metadata{embedding_column} FROM {table} WHERE embedding IS NOT NULL ORDER BY id")
+
+    rows = []
+    for result in results:
+        metadata = result["metadata"] or {}
+        if table == "rag_vectors":
+            sections = [metadata["chunk_section"]] if metadata.get("chunk_section") else []
+            searchable = "QA" not in (metadata.get("chunk_name") or "")
+        else:
+            sections = sorted(entity_sections.get(metadata.get("entity_name"), set()))
+            searchable = True
+
+        row = {"id": result["id"], "chunk_text": result["chunk_text"], "metadata": metadata, "sections": sections, "searchable": searchable}
+        if include_embeddings:
+            row["embedding"] = decode_vector(result["embedding"])
+        rows.append(row)
+
+    return rows
+
+
 query_embedding_cache = LRUCache(maxsize=1024)
+query_embedding_lock = threading.Lock()
 
 
-@cached(cache=query_embedding_cache)
 def generate_query_embedding(query: str) -> Optional[List[float]]:
+    return generate_query_embeddings([query])[0]
+
+
+def generate_query_embeddings(queries: List[str]) -> List[Optional[List[float]]]:
+    """
+    Query embeddings, the ones missing from query_embedding_cache computed in one embedding batch
+
+    Failed embeddings (None) are not cached, so a query recovers once the embedding service is back.
+    """
+    fingerprint = get_embedding_backend().fingerprint
+    with query_embedding_lock:
+        embeddings = [query_embedding_cache.get((fingerprint, query)) for query in queries]
+
+    missing = list(dict.fromkeys(query for query, embedding in zip(queries, embeddings) if embedding is None))
+    if not missing:
+        return embeddings
+
     try:
-        embedding = embd(query)
-        return embedding
+        computed = embd_batch(missing) if len(missing) > 1 else [embd(missing[0])]
     except Exception as e:
         logger.error(f"Error generating embedding: {str(e)}")
-        return None
+        computed = None
 
+    by_query = dict(zip(missing, computed or [None] * len(missing)))
+    with query_embedding_lock:
+        for query, embedding in by_query.items():
+            if embedding is not None:
+                query_embedding_cache[(fingerprint, query)] = embedding
 
-def generate_embedding_from_conv(
-    conversation: List["ChatCompletionMessageParam"],
-) -> Optional[List[float]]:
+    return [embedding if embedding is not None else by_query[query] for query, embedding in zip(queries, embeddings)]
+
+
+def conversation_to_text(conversation: List["ChatCompletionMessageParam"]) -> str:
     messages = []
     for message in conversation:
         if message["role"] in ["user", "assistant"]:
             messages.append(message)
 
-    if not messages:
-        return None
+    return "\n".join(f"{msg['role']}: {msg.get('content')}" for msg in messages)
 
-    combined_text = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
 
-    return embd(combined_text)
+def generate_embedding_from_conv(
+    conversation: List["ChatCompletionMessageParam"],
+) -> Optional[List[float]]:
+    combined_text = conversation_to_text(conversation)
 
+    if not combined_text:
+        return None
 
-rag_search_cache = LRUCache(maxsize=512)
+    return embd(combined_text)
 
 
-# TODO query_embedding should have EPS for cache.
-@cached(
-    cache=rag_search_cache,
-    key=lambda query_embedding, chunk_section, search_qa, threshold, limit: (
-        tuple(query_embedding),
-        chunk_section,
-        search_qa,
-        threshold,
-        limit,
-    ),
+rag_search_cache = SemanticSearchCache(
+    name="RAG search cache",
+    max_entries=AGENT_CONFIG.getint("RagSearchCache", "max_entries", fallback=512),
+    epsilon=AGENT_CONFIG.getfloat("RagSearchCache", "similarity_epsilon", fallback=0.02),
+    enabled=AGENT_CONFIG.getboolean("RagSearchCache", "enable", fallback=True),
 )
+
+# Hybrid retrieval: BM25 over chunk_text fused with vector results by reciprocal-rank fusion
+HYBRID_SEARCH_ENABLED = AGENT_CONFIG.getboolean("HybridSearch", "enable", fallback=True)
+HYBRID_CANDIDATES = AGENT_CONFIG.getint("HybridSearch", "candidates", fallback=8)
+HYBRID_RESULT_LIMIT = AGENT_CONFIG.getint("HybridSearch", "result_limit", fallback=3)
+HYBRID_RRF_K = AGENT_CONFIG.getint("HybridSearch", "rrf_k", fallback=60)
+LEXICAL_INDEX_RETRY_INTERVAL = AGENT_CONFIG.getfloat("HybridSearch", "index_retry_interval", fallback=60.0)
+
+_lexical_indexes: Dict[str, BM25Index] = {}
+# Time (monotonic) of the last failed or empty build per table
+_lexical_index_failures: Dict[str, float] = {}
+# One build per table at a time; the global lock only guards this dict
+_lexical_index_locks: Dict[str, threading.Lock] = {}
+_lexical_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(table: str) -> Optional[BM25Index]:
+    """
+    BM25 index of a RAG table, built on first use from its snapshot (if exported) or from the database
+
+    A failed or empty build is retried after index_retry_interval. Searches arriving while the
+    table is being built (or before the retry) get None and rank by vectors only.
+
+    Returns:
+        Index or None if hybrid search is disabled or the table is not loaded
+    """
+    if not HYBRID_SEARCH_ENABLED:
+        return None
+
+    index = _lexical_indexes.get(table)
+    if index is not None:
+        return index
+
+    failed_at = _lexical_index_failures.get(table)
+    if failed_at is not None and time.monotonic() - failed_at < LEXICAL_INDEX_RETRY_INTERVAL:
+        return None
+
+    with _lexical_indexes_lock:
+        table_lock = _lexical_index_locks.setdefault(table, threading.Lock())
+
+    if not table_lock.acquire(blocking=False):
+        return None
+
+    try:
+        # Another caller may have built (or failed) it since the checks above
+        index = _lexical_indexes.get(table)
+        if index is not None:
+            return index
+        failed_at = _lexical_index_failures.get(table)
+        if failed_at is not None and time.monotonic() - failed_at < LEXICAL_INDEX_RETRY_INTERVAL:
+            return None
+
+        try:
+            if os.path.exists(snapshot_paths(SNAPSHOT_DIR, table)[1]):
+                rows = load_snapshot_meta(SNAPSHOT_DIR, table)["rows"]
+                source = "snapshot"
+            else:
+                rows = fetch_rag_rows(table)
+                source = "database"
+        except Exception as e:
+            logger.error(f"Cannot load {table} for the BM25 index (retry in {LEXICAL_INDEX_RETRY_INTERVAL:.0f}s): {str(e)}")
+            rows = []
+
+        if not rows:
+            _lexical_index_failures[table] = time.monotonic()
+            return None
+
+        index = BM25Index(rows)
+        _lexical_indexes[table] = index
+        _lexical_index_failures.pop(table, None)
+        logger.info(f"Built BM25 index for {table} from {source}: {len(rows)} rows, {index.terms} terms")
+        return index
+    finally:
+        table_lock.release()
+
+
+def build_lexical_indexes() -> None:
+    """Build BM25 indexes of the RAG tables (called at startup so the first search does not pay for it)"""
+    for table in SNAPSHOT_TABLES:
+        get_lexical_index(table)
+
+
+def verify_embedding_compatibility() -> List[str]:
+    """
+    Check that vectors stored in RAG tables can be compared with the configured embedding backend
+
+    Returns:
+        List of problems found (empty if all tables are compatible)
+    """
+    backend = get_embedding_backend()
+    problems = []
+
+    for table in RAG_VECTOR_TABLES:
+        rows = execute_query(f"SELECT vector_dims(embedding) AS dims FROM {table} LIMIT 1")
+        if not rows:
+            continue
+
+        try:
+            backend.check_compatible(int(rows[0]["dims"]), source=table)
+        except EmbeddingCompatibilityError as e:
+            logger.error(str(e))
+            problems.append(str(e))
+
+    return problems
+
+
+# Query embeddings are bound once per statement: `WITH q AS (SELECT %s::vector AS embedding)`,
+# several embeddings as `WITH q (request, embedding) AS (VALUES (0, %s::vector), ...)`.
+# Ordering by a scalar subquery still lets pgvector use the HNSW index.
+RAG_QUERY_VECTOR = "(SELECT embedding FROM q)"
+
+
+def _query_vector_sql(request: int) -> str:
+    return f"(SELECT embedding FROM q WHERE request = {int(request)})"
+
+
+def _rag_candidates_sql(chunk_section: str | None, search_qa: bool, limit: int, query_vector: str) -> tuple[str, tuple]:
+    """
+    Top-k candidate query for one RAG search (without similarity threshold)
+
+    Candidates are selected with `ORDER BY embedding <=> q LIMIT k` so pgvector can use the HNSW index;
+    the similarity threshold is applied to those candidates afterwards. Tables configured for a
+    quantized representation ([VectorQuantization]) order by the quantized expression and rescore.
+    """
+    if search_qa:
+        storage = vector_storage("rag_qa_vectors")
+        if chunk_section:
+            # Search for QA results in separate rag_qa_vectors table
+            # Restricted to entities of the corresponding chunk_section in main table
+            sql = storage.candidates_sql(
+                columns=f"qa.chunk_text, qa.metadata, 1 - (qa.embedding <=> {query_vector}) as similarity",
+                source="rag_qa_vectors qa",
+                column="qa.embedding",
+                query=query_vector,
+                where=qa_section_filter("qa"),
+            )
+            return sql, (chunk_section,) + storage.limit_params(limit)
+
+        # Search all QA results without chunk_section filter
+        sql = storage.candidates_sql(
+            columns=f"chunk_text, metadata, 1 - (embedding <=> {query_vector}) as similarity",
+            source="rag_qa_vectors",
+            column="embedding",
+            query=query_vector,
+        )
+        return sql, storage.limit_params(limit)
+
+    storage = vector_storage("rag_vectors")
+    if chunk_section:
+        # Search for similarity results (non-QA) in main rag_vectors table with chunk_section filter
+        sql = storage.candidates_sql(
+            columns=f"chunk_text, metadata, 1 - (embedding <=> {query_vector}) as similarity",
+            source="rag_vectors",
+            column="embedding",
+            query=query_vector,
+            where="metadata->>'chunk_section' = %s AND NOT (metadata->>'chunk_name' LIKE '%%QA%%')",
+        )
+        return sql, (chunk_section,) + storage.limit_params(limit)
+
+    # Search all similarity results without chunk_section filter
+    sql = storage.candidates_sql(
+        columns=f"chunk_text, metadata, 1 - (embedding <=> {query_vector}) as similarity",
+        source="rag_vectors",
+        column="embedding",
+        query=query_vector,
+        where="NOT (metadata->>'chunk_name' LIKE '%%QA%%')",
+    )
+    return sql, storage.limit_params(limit)
+
+
+def _memory_rag_search(
+    query_embedding: List[float],
+    chunk_section: str | None,
+    search_qa: bool,
+    threshold: float,
+    limit: int,
+) -> Optional[List[Dict[str, Any]]]:
+    """RAG search answered from the memory-mapped snapshot ([RagSearch] backend = memory), None to use pgvector"""
+    snapshot = get_vector_snapshot("rag_qa_vectors" if search_qa else "rag_vectors")
+    if snapshot is None:
+        return None
+
+    try:
+        matches = snapshot.search(query_embedding, limit, section=chunk_section)
+    except ValueError as e:
+        logger.error(f"Snapshot search failed, using pgvector: {str(e)}")
+        return None
+
+    return [
+        {"chunk_text": snapshot.rows[index]["chunk_text"], "metadata": snapshot.rows[index]["metadata"], "similarity": similarity}
+        for index, similarity in matches
+        if similarity >= threshold
+    ]
+
+
+@dataclass
+class RagSearch:
+    """One vector search of a batch (see execute_rag_search_batch)"""
+
+    query_embedding: List[float]
+    chunk_section: str | None = None
+    search_qa: bool = False
+
+
+def execute_rag_search_batch(
+    searches: List[RagSearch],
+    threshold: float = DEFAULT_RAG_SIMILARITY_THRESHOLD,
+    limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Execute RAG similarity searches of one or more query embeddings in a single round trip
+
+    The searches not answered by the semantic cache (or the in-process snapshot index) are
+    combined with UNION ALL and a search discriminator column. Every distinct embedding is
+    sent once in a VALUES list and referenced by the searches using it.
+
+    Args:
+        searches: Searches to run
+        threshold: Minimum similarity threshold
+        limit: Maximum number of results per search
+
+    Returns:
+        Results of each search in order: lists of dictionaries with chunk_text, metadata, and similarity
+    """
+    fingerprint = get_embedding_backend().fingerprint
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(searches)
+    pending: List[int] = []
+
+    for position, search in enumerate(searches):
+        cache_key = (fingerprint, search.chunk_section, search.search_qa, threshold, limit)
+        cached_results = rag_search_cache.get(search.query_embedding, cache_key)
+        if cached_results is not None:
+            results[position] = cached_results
+            continue
+
+        results[position] = _memory_rag_search(search.query_embedding, search.chunk_section, search.search_qa, threshold, limit)
+        if results[position] is None:
+            pending.append(position)
+
+    if not pending:
+        return results
+
+    try:
+        requests: Dict[bytes, int] = {}
+        vectors: List[Any] = []
+        branches = []
+        branch_params: tuple = ()
+        for position in pending:
+            search = searches[position]
+            vector = to_pgvector(search.query_embedding)
+            request = requests.setdefault(vector.tobytes(), len(vectors))
+            if request == len(vectors):
+                vectors.append(vector)
+
+            candidates, candidate_params = _rag_candidates_sql(search.chunk_section, search.search_qa, limit, _query_vector_sql(request))
+            branches.append(
+                f"""
+                SELECT {position} AS search, chunk_text, metadata, similarity
+                FROM ({candidates}) candidates
+                WHERE similarity >= %s
+                """
+            )
+            branch_params = branch_params + candidate_params + (threshold,)
+
+        values = ", ".join(f"({request}, %s::vector)" for request in range(len(vectors)))
+        union = "\nUNION ALL\n".join(f"({branch})" for branch in branches)
+        query = f"""
+            WITH q (request, embedding) AS (VALUES {values})
+            SELECT search, chunk_text, metadata, similarity
+            FROM ({union}) results
+            ORDER BY search, similarity DESC
+        """
+        rows = execute_query(query, tuple(vectors) + branch_params)
+
+        for position in pending:
+            results[position] = []
+        for row in rows:
+            results[row["search"]].append({"chunk_text": row["chunk_text"], "metadata": row["metadata"], "similarity": row["similarity"]})
+
+        for position in pending:
+            if results[position]:
+                # Empty results are not cached - execute_query also returns [] on database errors
+                search = searches[position]
+                cache_key = (fingerprint, search.chunk_section, search.search_qa, threshold, limit)
+                rag_search_cache.put(search.query_embedding, cache_key, results[position])
+
+    except Exception as e:
+        logger.error(f"Error in RAG search: {str(e)}")
+        for position in pending:
+            results[position] = results[position] or []
+
+    return results
+
+
+def execute_rag_searches(
+    query_embedding: List[float],
+    chunk_section: str | None = None,
+    search_qa_modes: tuple[bool, ...] = (False, True),
+    threshold: float = DEFAULT_RAG_SIMILARITY_THRESHOLD,
+    limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+) -> Dict[bool, List[Dict[str, Any]]]:
+    """
+    Execute several RAG similarity searches for one embedding in a single round trip
+
+    Args:
+        query_embedding: Vector embedding for the query
+        chunk_section: The chunk_section to filter by (e.g., 'LOCATIONS', 'CHAMPIONS'). If None, search all sections.
+        search_qa_modes: Searches to run - False for non-QA content in rag_vectors, True for QA content in rag_qa_vectors
+        threshold: Minimum similarity threshold
+        limit: Maximum number of results per search
+
+    Returns:
+        Dictionary search_qa -> list of dictionaries with chunk_text, metadata, and similarity
+    """
+    searches = [RagSearch(query_embedding, chunk_section, search_qa) for search_qa in search_qa_modes]
+    results = execute_rag_search_batch(searches, threshold=threshold, limit=limit)
+    return dict(zip(search_qa_modes, results))
+
+
 def execute_rag_search(
     query_embedding: List[float],
     chunk_section: str | None = None,
@@ -79,75 +538,145 @@ def execute_rag_search(
     Returns:
         List of dictionaries with chunk_text, metadata, and similarity
     """
+    results = execute_rag_searches(query_embedding, chunk_section=chunk_section, search_qa_modes=(search_qa,), threshold=threshold, limit=limit)
+    return results[search_qa]
+
+
+def fuse_hybrid_results(
+    query: str,
+    vector_results: List[Dict[str, Any]],
+    chunk_section: str | None = None,
+    search_qa: bool = False,
+    limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse vector results of one search with BM25 results by reciprocal-rank fusion
+
+    The fused list is cut to min(limit, HYBRID_RESULT_LIMIT). Rows found only by BM25 (e.g. exact
+    entity names the embedding misses) get similarity 0.0, every row gets its fused `rrf_score`.
+    Without a lexical index the vector results are returned cut to `limit`.
+    """
+    index = get_lexical_index("rag_qa_vectors" if search_qa else "rag_vectors")
+    if index is None:
+        return vector_results[:limit]
+
+    rows_by_text: Dict[str, Dict[str, Any]] = {row["chunk_text"]: row for row in vector_results}
+    lexical_ranking = []
+    for row_index, _ in index.search(query, HYBRID_CANDIDATES, section=chunk_section):
+        row = index.rows[row_index]
+        rows_by_text.setdefault(row["chunk_text"], {"chunk_text": row["chunk_text"], "metadata": row["metadata"], "similarity": 0.0})
+        lexical_ranking.append(row["chunk_text"])
+
+    fused = reciprocal_rank_fusion([[row["chunk_text"] for row in vector_results], lexical_ranking], k=HYBRID_RRF_K)
+    return [{**rows_by_text[text], "rrf_score": score} for text, score in fused[: min(limit, HYBRID_RESULT_LIMIT)]]
+
+
+def hybrid_rag_searches(
+    query: str,
+    query_embedding: List[float],
+    chunk_section: str | None = None,
+    search_qa_modes: tuple[bool, ...] = (False, True),
+    threshold: float = DEFAULT_RAG_SIMILARITY_THRESHOLD,
+    limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+) -> Dict[bool, List[Dict[str, Any]]]:
+    """
+    Vector and BM25 searches fused by reciprocal-rank fusion
+
+    Both retrievers return HYBRID_CANDIDATES rows; see fuse_hybrid_results.
+
+    Args:
+        query: Search query string
+        query_embedding: Vector embedding for the query
+        chunk_section: The chunk_section to filter by. If None, search all sections.
+        search_qa_modes: Searches to run - False for non-QA content in rag_vectors, True for QA content in rag_qa_vectors
+        threshold: Minimum similarity threshold of vector results
+        limit: Maximum number of results per search
+
+    Returns:
+        Dictionary search_qa -> list of dictionaries with chunk_text, metadata, similarity and rrf_score
+    """
+    vector_results = execute_rag_searches(
+        query_embedding,
+        chunk_section=chunk_section,
+        search_qa_modes=search_qa_modes,
+        threshold=threshold,
+        limit=max(limit, HYBRID_CANDIDATES),
+    )
+    return {
+        search_qa: fuse_hybrid_results(query, vector_results[search_qa], chunk_section=chunk_section, search_qa=search_qa, limit=limit)
+        for search_qa in search_qa_modes
+    }
+
+
+def build_text_search_query(text: str) -> str:
+    """
+    Build to_tsquery() source matching any word of the text (stop words are dropped by PostgreSQL)
+
+    Args:
+        text: Free text query
+
+    Returns:
+        OR-ed words for to_tsquery or empty string if text has no words
+    """
+    words = re.findall(r"\w+", text.lower())
+    return " | ".join(dict.fromkeys(words))
+
+
+def execute_text_search(
+    query_text: str,
+    chunk_section: str | None = None,
+    search_qa: bool = False,
+    limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+) -> List[Dict[str, Any]]:
+    """
+    Execute full-text search in PostgreSQL (fallback used while embeddings are unavailable)
+
+    Args:
+        query_text: Free text query
+        chunk_section: The chunk_section to filter by. If None, search all sections.
+        search_qa: If True, search rag_qa_vectors; if False, search non-QA content in rag_vectors
+        limit: Maximum number of results
+
+    Returns:
+        List of dictionaries with chunk_text, metadata, and similarity (ts_rank_cd score)
+    """
+    ts_query = build_text_search_query(query_text)
+    if not ts_query:
+        return []
+
+    document = f"to_tsvector('{FULL_TEXT_SEARCH_CONFIG}', chunk_text)"
+    ts_query_sql = f"to_tsquery('{FULL_TEXT_SEARCH_CONFIG}', %s)"
+
     try:
         if search_qa:
+            table = "rag_qa_vectors"
+            filters = []
+            params: list = [ts_query]
             if chunk_section:
-                # Search for QA results in separate rag_qa_vectors table
-                # Use entity_names from the corresponding chunk_section in main table
-                query = """
-                    SELECT qa.chunk_text, qa.metadata, 1 - (qa.embedding <=> %s::vector) as similarity
-                    FROM rag_qa_vectors qa
-                    WHERE qa.metadata->>'entity_name' IN (
-                        SELECT DISTINCT metadata->>'entity_name' 
-                        FROM rag_vectors 
-                        WHERE metadata->>'chunk_section' = %s
-                    )
-                    AND 1 - (qa.embedding <=> %s::vector) >= %s
-                    ORDER BY similarity DESC
-                    LIMIT %s
-                """
-                params = (
-                    query_embedding,
-                    chunk_section,
-                    query_embedding,
-                    threshold,
-                    limit,
-                )
-            else:
-                # Search all QA results without chunk_section filter
-                query = """
-                    SELECT chunk_text, metadata, 1 - (embedding <=> %s::vector) as similarity
-                    FROM rag_qa_vectors
-                    WHERE 1 - (embedding <=> %s::vector) >= %s
-                    ORDER BY similarity DESC
-                    LIMIT %s
-                """
-                params = (query_embedding, query_embedding, threshold, limit)
+                filters.append(qa_section_filter())
+                params.append(chunk_section)
         else:
+            table = "rag_vectors"
+            filters = ["NOT (metadata->>'chunk_name' LIKE '%%QA%%')"]
+            params = [ts_query]
             if chunk_section:
-                # Search for similarity results (non-QA) in main rag_vectors table with chunk_section filter
-                query = """
-                    SELECT chunk_text, metadata, 1 - (embedding <=> %s::vector) as similarity
-                    FROM rag_vectors 
-                    WHERE metadata->>'chunk_section' = %s
-                    AND NOT (metadata->>'chunk_name' LIKE '%%QA%%')
-                    AND 1 - (embedding <=> %s::vector) >= %s
-                    ORDER BY similarity DESC
-                    LIMIT %s
-                """
-                params = (
-                    query_embedding,
-                    chunk_section,
-                    query_embedding,
-                    threshold,
-                    limit,
-                )
-            else:
-                # Search all similarity results without chunk_section filter
-                query = """
-                    SELECT chunk_text, metadata, 1 - (embedding <=> %s::vector) as similarity
-                    FROM rag_vectors 
-                    WHERE NOT (metadata->>'chunk_name' LIKE '%%QA%%')
-                    AND 1 - (embedding <=> %s::vector) >= %s
-                    ORDER BY similarity DESC
-                    LIMIT %s
-                """
-                params = (query_embedding, query_embedding, threshold, limit)
+                filters.append("metadata->>'chunk_section' = %s")
+                params.append(chunk_section)
 
-        return execute_query(query, params)
+        where_extra = "".join(f"\n                AND {condition}" for condition in filters)
+        query = f"""
+            SELECT chunk_text, metadata, ts_rank_cd({document}, ts_query) as similarity
+            FROM {table}, {ts_query_sql} ts_query
+            WHERE {document} @@ ts_query{where_extra}
+            ORDER BY similarity DESC
+            LIMIT %s
+        """
+        params.append(limit)
+
+        return execute_query(query, tuple(params))
 
     except Exception as e:
-        logger.error(f"Error in RAG search: {str(e)}")
+        logger.error(f"Error in full-text RAG search: {str(e)}")
         return []
 
 
@@ -202,6 +731,23 @@ def process_rag_results(results: List[Dict[str, Any]], is_qa: bool = False, rand
         return "\n\n".join(content_parts)
 
 
+def format_rag_contents(similarity_results: List[Dict[str, Any]], qa_results: List[Dict[str, Any]], function_name: str) -> Tuple[str, str]:
+    """
+    Similarity and QA content of a RAG tool result
+
+    With [ContextPacking] enabled the rows are deduplicated, ordered by score and packed into
+    the tool's token budget; otherwise every row is joined as is.
+    """
+    if PACKING_ENABLED:
+        similarity_content, qa_content, _ = pack_rag_results(similarity_results, qa_results, function_name)
+        return similarity_content, qa_content
+
+    return (
+        process_rag_results(similarity_results, is_qa=False, random_selection=False),
+        process_rag_results(qa_results, is_qa=True, random_selection=False),
+    )
+
+
 def create_rag_response(
     query: str,
     category: str,
@@ -210,6 +756,7 @@ def create_rag_response(
     qa_content: str = "",
     error_message: str = "",
     error_details: str = "",
+    search_mode: str = "vector",
 ) -> dict:
     """
     Create standardized JSON response for RAG functions
@@ -222,6 +769,7 @@ def create_rag_response(
         qa_content: Formatted QA results content
         error_message: Error message if any
         error_details: Additional error details
+        search_mode: Retrieval used to build the content ('vector', 'hybrid' or 'full_text')
 
     Returns:
         JSON formatted response string
@@ -253,6 +801,7 @@ def create_rag_response(
         "internal_info": {
             "function_name": function_name,
             "parameters": {"query": query},
+            "search_mode": search_mode,
         },
     }
 
@@ -263,6 +812,81 @@ def create_rag_response(
     return response
 
 
+@dataclass(frozen=True)
+class RagToolSpec:
+    """
+    Search parameters of a db_rag_get_* tool
+
+    Lets callers run several RAG tool calls together with execute_universal_rag_batch;
+    `query_parameter` is the tool argument holding the search query.
+    """
+
+    chunk_section: str | None
+    category: str
+    function_name: str
+    query_parameter: str = "query"
+    include_qa: bool = True
+
+    def arguments(self) -> Dict[str, Any]:
+        """Keyword arguments of execute_universal_rag for this tool"""
+        return {
+            "chunk_section": self.chunk_section,
+            "category": self.category,
+            "function_name": self.function_name,
+            "include_qa": self.include_qa,
+        }
+
+
+def _text_rag_response(query: str, chunk_section: str | None, category: str, function_name: str, limit: int, include_qa: bool) -> dict:
+    # Embedding service is down or slow - answer from full-text search instead of failing
+    logger.warning(f"Embedding unavailable, using full-text search for '{query}'")
+
+    similarity_results = execute_text_search(query, chunk_section=chunk_section, search_qa=False, limit=limit)
+    qa_results = execute_text_search(query, chunk_section=chunk_section, search_qa=True, limit=limit) if include_qa else []
+
+    similarity_content, qa_content = format_rag_contents(similarity_results, qa_results, function_name)
+    return create_rag_response(
+        query=query,
+        category=category,
+        function_name=function_name,
+        similarity_content=similarity_content,
+        qa_content=qa_content,
+        search_mode="full_text",
+    )
+
+
+def _vector_rag_response(
+    query: str,
+    chunk_section: str | None,
+    category: str,
+    function_name: str,
+    limit: int,
+    vector_results: Dict[bool, List[Dict[str, Any]]],
+) -> dict:
+    # vector_results hold max(limit, HYBRID_CANDIDATES) rows per search when hybrid search is enabled
+    if HYBRID_SEARCH_ENABLED:
+        search_results = {
+            search_qa: fuse_hybrid_results(query, results, chunk_section=chunk_section, search_qa=search_qa, limit=limit)
+            for search_qa, results in vector_results.items()
+        }
+    else:
+        search_results = {search_qa: results[:limit] for search_qa, results in vector_results.items()}
+
+    similarity_content, qa_content = format_rag_contents(search_results[False], search_results.get(True, []), function_name)
+    return create_rag_response(
+        query=query,
+        category=category,
+        function_name=function_name,
+        similarity_content=similarity_content,
+        qa_content=qa_content,
+        search_mode="hybrid" if HYBRID_SEARCH_ENABLED else "vector",
+    )
+
+
+def _vector_search_limit(limit: int) -> int:
+    return max(limit, HYBRID_CANDIDATES) if HYBRID_SEARCH_ENABLED else limit
+
+
 def execute_universal_rag(
     query: str,
     chunk_section: str | None = None,
@@ -291,44 +915,18 @@ def execute_universal_rag(
         # Generate embedding
         query_embedding = generate_query_embedding(query)
         if not query_embedding:
-            return create_rag_response(
-                query=query,
-                category=category,
-                function_name=function_name,
-                error_message=f"Failed to generate embedding for query '{query}'",
-            )
+            return _text_rag_response(query, chunk_section, category, function_name, limit, include_qa)
 
-        # Search for similarity results
-        similarity_results = execute_rag_search(
+        # Search for similarity results and QA results (if requested) in one round trip
+        search_qa_modes = (False, True) if include_qa else (False,)
+        vector_results = execute_rag_searches(
             query_embedding=query_embedding,
             chunk_section=chunk_section,
-            search_qa=False,
+            search_qa_modes=search_qa_modes,
             threshold=threshold,
-            limit=limit,
-        )
-
-        similarity_content = process_rag_results(similarity_results, is_qa=False, random_selection=False)
-
-        # Search for QA results if requested
-        qa_content = ""
-        if include_qa:
-            qa_results = execute_rag_search(
-                query_embedding=query_embedding,
-                chunk_section=chunk_section,
-                search_qa=True,
-                threshold=threshold,
-                limit=limit,
-            )
-            qa_content = process_rag_results(qa_results, is_qa=True, random_selection=False)
-
-        # Create and return response
-        return create_rag_response(
-            query=query,
-            category=category,
-            function_name=function_name,
-            similarity_content=similarity_content,
-            qa_content=qa_content,
+            limit=_vector_search_limit(limit),
         )
+        return _vector_rag_response(query, chunk_section, category, function_name, limit, vector_results)
 
     except Exception as e:
         logger.error(f"Error in universal RAG function: {str(e)}")
@@ -341,34 +939,121 @@ def execute_universal_rag(
         )
 
 
+def execute_universal_rag_batch(
+    requests: List[Tuple[str, RagToolSpec]],
+    threshold: float = DEFAULT_RAG_SIMILARITY_THRESHOLD,
+    limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+) -> List[dict]:
+    """
+    execute_universal_rag for several tool calls with one embedding batch and one SQL statement
+
+    Queries are embedded together (cached embeddings are reused), all vector searches run in a
+    single round trip and the rows are split back into one response per request. A request whose
+    embedding is unavailable falls back to execute_universal_rag (full-text search).
+
+    Args:
+        requests: List of (query, tool spec)
+        threshold: Similarity threshold
+        limit: Result limit
+
+    Returns:
+        Responses in the order of requests
+    """
+    if not requests:
+        return []
+
+    try:
+        embeddings = generate_query_embeddings([query for query, _ in requests])
+
+        searches: List[RagSearch] = []
+        owners: List[Tuple[int, bool]] = []
+        for position, ((_, spec), embedding) in enumerate(zip(requests, embeddings)):
+            if not embedding:
+                continue
+            for search_qa in (False, True) if spec.include_qa else (False,):
+                searches.append(RagSearch(embedding, spec.chunk_section, search_qa))
+                owners.append((position, search_qa))
+
+        vector_results: Dict[int, Dict[bool, List[Dict[str, Any]]]] = {}
+        search_results = execute_rag_search_batch(searches, threshold=threshold, limit=_vector_search_limit(limit)) if searches else []
+        for (position, search_qa), results in zip(owners, search_results):
+            vector_results.setdefault(position, {})[search_qa] = results
+
+    except Exception as e:
+        logger.error(f"Error in batched RAG search, running requests one by one: {str(e)}")
+        vector_results = {}
+
+    responses = []
+    for position, (query, spec) in enumerate(requests):
+        if position not in vector_results:
+            responses.append(execute_universal_rag(query, threshold=threshold, limit=limit, **spec.arguments()))
+            continue
+
+        try:
+            responses.append(_vector_rag_response(query, spec.chunk_section, spec.category, spec.function_name, limit, vector_results[position]))
+        except Exception as e:
+            logger.error(f"Error in universal RAG function: {str(e)}")
+            responses.append(
+                create_rag_response(
+                    query=query,
+                    category=spec.category,
+                    function_name=spec.function_name,
+                    error_message=f"Database error while searching for {spec.category} '{query}'",
+                    error_details=str(e),
+                )
+            )
+
+    return responses
+
+
 def search_qa_similarity(
-    query_embedding: List[float],
+    query_embedding: Optional[List[float]],
     limit: int = DEFAULT_RAG_SIMILARITY_LIMIT,
+    mmr_lambda: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search QA vectors table for similar content using embeddings
 
     Args:
-        query_embedding: Vector embedding to compare against
-        threshold: Minimum similarity threshold
+        query_embedding: Vector embedding to compare against (None if embedding is unavailable)
         limit: Maximum number of results
+        mmr_lambda: If set, return a diverse top-k selected by Maximal Marginal Relevance
 
     Returns:
         List of dictionaries with similarity score and QA content
     """
-    embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+    if query_embedding is None:
+        return []
+
+    if mmr_lambda is not None:
+        candidates = search_qa_similarity(query_embedding, limit=limit * MMR_FETCH_FACTOR)
+        return diversify_rows(candidates, k=limit, lambda_mult=mmr_lambda)
+
+    snapshot = get_vector_snapshot("rag_qa_vectors")
+    if snapshot is not None:
+        try:
+            return [
+                {
+                    "id": snapshot.rows[index]["id"],
+                    "similarity": similarity,
+                    "content": snapshot.rows[index]["chunk_text"],
+                    "embedding": snapshot.embedding(index),
+                }
+                for index, similarity in snapshot.search(query_embedding, limit)
+            ]
+        except ValueError as e:
+            logger.error(f"Snapshot QA search failed, using pgvector: {str(e)}")
+
     try:
-        query = """
-            SELECT 
-                id, 
-                1 - (embedding <=> %s::vector) as similarity,
-                chunk_text,
-                embedding
-            FROM rag_qa_vectors
-            ORDER BY similarity DESC
-            LIMIT %s
-        """
-        params = (embedding_str, limit)
+        storage = vector_storage("rag_qa_vectors")
+        candidates = storage.candidates_sql(
+            columns=f"id, 1 - (embedding <=> {RAG_QUERY_VECTOR}) as similarity, chunk_text, vector_send(embedding) as embedding",
+            source="rag_qa_vectors",
+            column="embedding",
+            query=RAG_QUERY_VECTOR,
+        )
+        query = f"WITH q AS (SELECT %s::vector AS embedding) {candidates}"
+        params = (to_pgvector(query_embedding),) + storage.limit_params(limit)
 
         results = execute_query(query, params)
         return [
@@ -376,7 +1061,7 @@ def search_qa_similarity(
                 "id": r["id"],
                 "similarity": float(r["similarity"]),
                 "content": r["chunk_text"],
-                "embedding": np.array([float(x) for x in r["embedding"].strip("[]").split(",")]),
+                "embedding": decode_vector(r["embedding"]),
             }
             for r in results
         ]
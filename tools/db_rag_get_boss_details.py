@@ -1,4 +1,6 @@
-from tools.db_rag_common import execute_universal_rag
+from tools.db_rag_common import RagToolSpec, execute_universal_rag
+
+RAG_TOOL_SPEC = RagToolSpec(chunk_section="BOSSES", category="bosses", function_name="db_rag_get_boss_details", query_parameter="boss_name")
 
 
 def db_rag_get_boss_details(boss_name: str) -> dict:
@@ -11,9 +13,4 @@ def db_rag_get_boss_details(boss_name: str) -> dict:
     Returns:
         str: JSON formatted boss information with separated QA and similarity results
     """
-    return execute_universal_rag(
-        query=boss_name,
-        chunk_section="BOSSES",
-        category="bosses",
-        function_name="db_rag_get_boss_details",
-    )
+    return execute_universal_rag(query=boss_name, **RAG_TOOL_SPEC.arguments())
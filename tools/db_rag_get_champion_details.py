@@ -1,4 +1,8 @@
-from tools.db_rag_common import execute_universal_rag
+from tools.db_rag_common import RagToolSpec, execute_universal_rag
+
+RAG_TOOL_SPEC = RagToolSpec(
+    chunk_section="CHAMPIONS", category="champions", function_name="db_rag_get_champion_details", query_parameter="champion_name"
+)
 
 
 def db_rag_get_champion_details(champion_name: str) -> dict:
@@ -11,4 +15,4 @@ def db_rag_get_champion_details(champion_name: str) -> dict:
     Returns:
         str: JSON formatted champion information with separated QA and similarity results
     """
-    return execute_universal_rag(query=champion_name, chunk_section="CHAMPIONS", category="champions", function_name="db_rag_get_champion_details")
+    return execute_universal_rag(query=champion_name, **RAG_TOOL_SPEC.arguments())
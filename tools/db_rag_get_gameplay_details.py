@@ -1,4 +1,6 @@
-from tools.db_rag_common import execute_universal_rag
+from tools.db_rag_common import RagToolSpec, execute_universal_rag
+
+RAG_TOOL_SPEC = RagToolSpec(chunk_section="GAMEPLAY", category="gameplay", function_name="db_rag_get_gameplay_details")
 
 
 def db_rag_get_gameplay_details(query: str) -> dict:
@@ -11,9 +13,4 @@ def db_rag_get_gameplay_details(query: str) -> dict:
     Returns:
         str: JSON formatted gameplay information with separated QA and similarity results
     """
-    return execute_universal_rag(
-        query=query,
-        chunk_section="GAMEPLAY",
-        category="gameplay",
-        function_name="db_rag_get_gameplay_details",
-    )
+    return execute_universal_rag(query=query, **RAG_TOOL_SPEC.arguments())
@@ -1,4 +1,7 @@
-from tools.db_rag_common import execute_universal_rag
+from tools.db_rag_common import RagToolSpec, execute_universal_rag
+
+# No chunk_section filtering - search entire database
+RAG_TOOL_SPEC = RagToolSpec(chunk_section=None, category="general", function_name="db_rag_get_general_knowledge")
 
 
 def db_rag_get_general_knowledge(query: str) -> dict:
@@ -11,9 +14,4 @@ def db_rag_get_general_knowledge(query: str) -> dict:
     Returns:
         str: JSON formatted knowledge information with separated QA and similarity results
     """
-    return execute_universal_rag(
-        query=query,
-        chunk_section=None,  # No filtering - search entire database
-        category="general",
-        function_name="db_rag_get_general_knowledge",
-    )
+    return execute_universal_rag(query=query, **RAG_TOOL_SPEC.arguments())
@@ -1,4 +1,6 @@
-from tools.db_rag_common import execute_universal_rag
+from tools.db_rag_common import RagToolSpec, execute_universal_rag
+
+RAG_TOOL_SPEC = RagToolSpec(chunk_section="MECHANICS", category="mechanics", function_name="db_rag_get_mechanic_details")
 
 
 def db_rag_get_mechanic_details(query: str) -> dict:
@@ -11,9 +13,4 @@ def db_rag_get_mechanic_details(query: str) -> dict:
     Returns:
         str: JSON formatted mechanics information with separated QA and similarity results
     """
-    return execute_universal_rag(
-        query=query,
-        chunk_section="MECHANICS",
-        category="mechanics",
-        function_name="db_rag_get_mechanic_details",
-    )
+    return execute_universal_rag(query=query, **RAG_TOOL_SPEC.arguments())
@@ -2,10 +2,10 @@ import logging
 import random
 from typing import List
 
-import numpy as np
-
-from db_postgres import execute_query
+from db_postgres import decode_vector, execute_query, to_pgvector
 from embedder import embd
+from tools.db_rag_common import FULL_TEXT_SEARCH_CONFIG, build_text_search_query
+from vector_index import MMR_FETCH_FACTOR, diversify_rows
 
 # Logger
 logger = logging.getLogger("DBSmalltalk")
@@ -106,27 +106,31 @@ def db_rag_get_smalltalk(query: str = "") -> dict:
                 # Real pgvector similarity search
                 logger.info("Using Ollama embedding-based similarity search")
 
-                # Convert embedding to PostgreSQL vector format
-                embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+                # float32 array, passed as a vector parameter by the adapter registered in db_postgres
+                embedding_vector = to_pgvector(query_embedding)
 
                 # Get multiple similar results and pick one randomly for variety
+                # Top-k by distance first (HNSW index scan), similarity threshold applied afterwards
                 similarity_sql = """
-                SELECT topic, category, knowledge_text, 
-                       1 - (embedding <=> %s::vector) as similarity
-                FROM smalltalk_vectors
-                WHERE 1 - (embedding <=> %s::vector) >= %s
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s
+                SELECT topic, category, knowledge_text, similarity
+                FROM (
+                    SELECT topic, category, knowledge_text, 
+                           1 - (embedding <=> %s::vector) as similarity
+                    FROM smalltalk_vectors
+                    ORDER BY embedding <=> %s::vector
+                    LIMIT %s
+                ) candidates
+                WHERE similarity >= %s
+                ORDER BY similarity DESC
                 """
 
                 results = execute_query(
                     similarity_sql,
                     (
-                        embedding_str,
-                        embedding_str,
-                        SIMILARITY_THRESHOLD,
-                        embedding_str,
+                        embedding_vector,
+                        embedding_vector,
                         RAG_SMALLTALK_SEARCH_LIMIT,
+                        SIMILARITY_THRESHOLD,
                     ),
                 )
 
@@ -160,7 +164,43 @@ def db_rag_get_smalltalk(query: str = "") -> dict:
                 logger.info(f"No embedding match above threshold {SIMILARITY_THRESHOLD}, falling back to random")
 
             else:
-                logger.info("Embedding generation failed, falling back to random")
+                logger.info("Embedding generation failed, falling back to full-text search")
+
+                # Embedding service is down or slow - match knowledge_text with PostgreSQL full-text search
+                text_search_sql = f"""
+                SELECT topic, category, knowledge_text,
+                       ts_rank_cd(to_tsvector('{FULL_TEXT_SEARCH_CONFIG}', knowledge_text), ts_query) as similarity
+                FROM smalltalk_vectors, to_tsquery('{FULL_TEXT_SEARCH_CONFIG}', %s) ts_query
+                WHERE to_tsvector('{FULL_TEXT_SEARCH_CONFIG}', knowledge_text) @@ ts_query
+                ORDER BY similarity DESC
+                LIMIT %s
+                """
+
+                ts_query = build_text_search_query(query)
+                results = execute_query(text_search_sql, (ts_query, RAG_SMALLTALK_SEARCH_LIMIT)) if ts_query else []
+
+                if results:
+                    result = random.choice(results)
+                    logger.info(f"Selected random result from {len(results)} full-text matches")
+
+                    content = f"### Information in galactic database: {result['topic']} ({result['category']})\n{result['knowledge_text']}"
+
+                    return {
+                        "status": "success",
+                        "message": f"Found smalltalk context for '{query}' (full-text search)",
+                        "search_query": search_query,
+                        "content": {"smltk_results": content},
+                        "llm_instruction": SMALLTALK_SPECIALIST_EMBEDDING,
+                        "internal_info": {
+                            "function_name": "db_rag_get_smalltalk",
+                            "parameters": {"query": query},
+                            "method": "full_text_search",
+                            "similarity_score": float(result["similarity"]),
+                            "candidates_found": len(results),
+                        },
+                    }
+
+                logger.info("No full-text match, falling back to random")
 
             # No good match found - get random topic instead
             logger.info(f"No good smalltalk match for query '{query}', selecting random topic")
@@ -224,30 +264,41 @@ def db_rag_get_smalltalk(query: str = "") -> dict:
 def db_rag_get_smalltalk_from_embedding(
     embeddings: List[float],
     RAG_SMALLTALK_SEARCH_LIMIT: int = 2,
+    mmr_lambda: float | None = None,
 ) -> List[dict]:
     if not embeddings:
         return []
 
-    # Convert embedding to PostgreSQL vector format
-    embedding_str = "[" + ",".join(map(str, embeddings)) + "]"
+    if mmr_lambda is not None:
+        # Diverse top-k selected by Maximal Marginal Relevance from a larger candidate set
+        candidates = db_rag_get_smalltalk_from_embedding(embeddings, RAG_SMALLTALK_SEARCH_LIMIT * MMR_FETCH_FACTOR)
+        return diversify_rows(candidates, k=RAG_SMALLTALK_SEARCH_LIMIT, lambda_mult=mmr_lambda)
+
+    # float32 array, passed as a vector parameter by the adapter registered in db_postgres
+    embedding_vector = to_pgvector(embeddings)
 
     # Combined similarity search using both embedding types
+    # (top-k per embedding column keeps both branches index scans, their union contains the overall top-k)
     similarity_sql = """
     WITH combined_results AS (
-        SELECT id, topic, category, knowledge_text, short_knowledge_text, embedding,
+        (SELECT id, topic, category, knowledge_text, short_knowledge_text, embedding,
                 1 - (embedding <=> %s::vector) as similarity,
                 'embedding' as search_type
         FROM smalltalk_vectors
+        ORDER BY embedding <=> %s::vector
+        LIMIT %s)
         
         UNION ALL
         
-        SELECT id, topic, category, knowledge_text, short_knowledge_text, topic_embedding as embedding,
+        (SELECT id, topic, category, knowledge_text, short_knowledge_text, topic_embedding as embedding,
                 1 - (topic_embedding <=> %s::vector) as similarity,
                 'topic_embedding' as search_type  
         FROM smalltalk_vectors
+        ORDER BY topic_embedding <=> %s::vector
+        LIMIT %s)
     )
     SELECT * FROM (
-        SELECT DISTINCT ON (id) id, topic, category, knowledge_text, short_knowledge_text, embedding, similarity, search_type
+        SELECT DISTINCT ON (id) id, topic, category, knowledge_text, short_knowledge_text, vector_send(embedding) as embedding, similarity, search_type
         FROM combined_results
         ORDER BY id, similarity DESC
     ) t
@@ -258,8 +309,12 @@ def db_rag_get_smalltalk_from_embedding(
     results = execute_query(
         similarity_sql,
         (
-            embedding_str,
-            embedding_str,
+            embedding_vector,
+            embedding_vector,
+            RAG_SMALLTALK_SEARCH_LIMIT,
+            embedding_vector,
+            embedding_vector,
+            RAG_SMALLTALK_SEARCH_LIMIT,
             RAG_SMALLTALK_SEARCH_LIMIT,
         ),
     )
@@ -274,7 +329,7 @@ def db_rag_get_smalltalk_from_embedding(
             "similarity": float(r["similarity"]),
             "long_content": f"### {r['topic']} ({r['category']})\n{r['knowledge_text']}",
             "content": f"### {r['topic']}\n{r['short_knowledge_text']}",
-            "embedding": np.array([float(x) for x in r["embedding"].strip("[]").split(",")]),
+            "embedding": decode_vector(r["embedding"]),
             "search_type": r["search_type"],
         }
         for r in results
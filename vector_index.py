@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Vector Index
+In-process brute-force vector search over memory-mapped snapshots of the RAG tables
+
+A snapshot of a table is two files in the snapshot directory:
+* <table>.npy - float32 matrix of L2-normalized embeddings (one row per table row)
+* <table>.meta.json - row payloads, sections and searchable flags in the same order
+
+Matrices are opened with np.load(mmap_mode="r"), so worker processes share the pages
+through the OS page cache instead of each holding a copy.
+
+Also provides Maximal Marginal Relevance (MMR) selection for diverse top-k results.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from semantic_cache import normalize_vector
+from workload_config import AGENT_CONFIG
+
+# Logger
+logger = logging.getLogger("VectorIndex")
+
+SECTION = "RagSearch"
+
+# pgvector (remote queries) | memory (memory-mapped snapshot, falls back to pgvector if it cannot be loaded)
+RAG_SEARCH_BACKEND = AGENT_CONFIG.get(SECTION, "backend", fallback="pgvector")
+SNAPSHOT_DIR = AGENT_CONFIG.get(SECTION, "snapshot_dir", fallback="data/vector_snapshot")
+
+# Tables exported by `python db_manage.py export-snapshot`
+SNAPSHOT_TABLES = ("rag_vectors", "rag_qa_vectors")
+
+# Searches asked for MMR-diversified results fetch limit * mmr_fetch_factor candidates
+MMR_FETCH_FACTOR = AGENT_CONFIG.getint(SECTION, "mmr_fetch_factor", fallback=3)
+
+
+def snapshot_paths(directory: str, table: str) -> Tuple[str, str]:
+    return os.path.join(directory, f"{table}.npy"), os.path.join(directory, f"{table}.meta.json")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Float32 copy of matrix with L2-normalized rows (zero rows are kept as is)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0.0, 1.0, norms)
+
+
+def write_snapshot(directory: str, table: str, embeddings: np.ndarray, rows: List[Dict[str, Any]]) -> None:
+    """
+    Write a table snapshot (files are replaced atomically, running processes keep their old mapping)
+
+    Args:
+        directory: Snapshot directory
+        table: Table name
+        embeddings: Matrix with one embedding per row
+        rows: Row payloads; `sections` (list of chunk_sections) and `searchable` (bool) drive search filters
+    """
+    os.makedirs(directory, exist_ok=True)
+    matrix_path, meta_path = snapshot_paths(directory, table)
+
+    matrix = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(rows), -1))
+
+    with open(matrix_path + ".tmp", "wb") as file:
+        np.save(file, matrix)
+    with open(meta_path + ".tmp", "w") as file:
+        json.dump({"table": table, "dimension": int(matrix.shape[1]), "rows": rows}, file, default=str)
+
+    os.replace(matrix_path + ".tmp", matrix_path)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def load_snapshot_meta(directory: str, table: str) -> Dict[str, Any]:
+    """Metadata sidecar of a table snapshot (table, dimension, rows)"""
+    _, meta_path = snapshot_paths(directory, table)
+    with open(meta_path) as file:
+        return json.load(file)
+
+
+def section_row_sets(rows: List[Dict[str, Any]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Row indexes of searchable rows, overall and per chunk_section"""
+    searchable = np.array([row.get("searchable", True) for row in rows], dtype=bool)
+    section_rows: Dict[str, np.ndarray] = {}
+
+    sections = sorted({section for row in rows for section in row.get("sections", [])})
+    for section in sections:
+        mask = searchable & np.array([section in row.get("sections", []) for row in rows], dtype=bool)
+        section_rows[section] = np.flatnonzero(mask)
+
+    return np.flatnonzero(searchable), section_rows
+
+
+class VectorSnapshot:
+    """
+    Exact top-k cosine search over one memory-mapped table snapshot.
+
+    Row sets for section filters are precomputed at load time, so a filtered search is a
+    matmul over the section's rows followed by argpartition.
+    """
+
+    def __init__(self, table: str, matrix: np.ndarray, rows: List[Dict[str, Any]]):
+        self.table = table
+        self.matrix = matrix
+        self.rows = rows
+        self.dimension = int(matrix.shape[1])
+
+        self._all_rows, self._section_rows = section_row_sets(rows)
+
+    @classmethod
+    def load(cls, directory: str, table: str) -> "VectorSnapshot":
+        matrix_path, _ = snapshot_paths(directory, table)
+        meta = load_snapshot_meta(directory, table)
+
+        matrix = np.load(matrix_path, mmap_mode="r")
+        if matrix.shape[0] != len(meta["rows"]):
+            raise ValueError(f"Snapshot {table} is inconsistent: {matrix.shape[0]} vectors for {len(meta['rows'])} rows")
+
+        return cls(table, matrix, meta["rows"])
+
+    def candidate_rows(self, section: Optional[str] = None) -> np.ndarray:
+        if section is None:
+            return self._all_rows
+        return self._section_rows.get(section, np.empty(0, dtype=np.int64))
+
+    def search(self, query_embedding: List[float] | np.ndarray, limit: int, section: Optional[str] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k rows by cosine similarity
+
+        Args:
+            query_embedding: Query vector
+            limit: Number of results
+            section: Only search rows of this chunk_section
+
+        Returns:
+            List of (row index, similarity) sorted by similarity descending
+        """
+        query = normalize_vector(query_embedding)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Query has {query.shape[0]} dimensions, snapshot {self.table} has {self.dimension}")
+
+        candidates = self.candidate_rows(section)
+        if limit <= 0 or len(candidates) == 0:
+            return []
+
+        if len(candidates) == len(self.rows):
+            scores = self.matrix @ query
+        else:
+            scores = self.matrix[candidates] @ query
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        indices = top if len(candidates) == len(self.rows) else candidates[top]
+        return list(zip(indices.tolist(), scores[top].astype(float).tolist()))
+
+    def embedding(self, index: int) -> np.ndarray:
+        return np.array(self.matrix[index], dtype=np.float32)
+
+
+def maximal_marginal_relevance(
+    embeddings: np.ndarray,
+    relevance: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: Optional[float] = None,
+) -> List[int]:
+    """
+    Greedy Maximal Marginal Relevance selection
+
+    Each step picks the candidate maximizing
+    lambda_mult * relevance - (1 - lambda_mult) * max cosine similarity to the already selected ones.
+    All pairwise similarities come from one matmul of the normalized matrix, every step is a
+    vectorized update of the per-candidate maximum.
+
+    Args:
+        embeddings: Candidate matrix (one row per candidate, normalized here)
+        relevance: Relevance score of each candidate (e.g. similarity to the query)
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        duplicate_threshold: Candidates more similar than this to a selected one are never selected
+
+    Returns:
+        Indexes of the selected candidates in selection order
+    """
+    relevance = np.asarray(relevance, dtype=np.float32).ravel()
+    count = len(relevance)
+    if k <= 0 or count == 0:
+        return []
+
+    matrix = normalize_rows(embeddings).reshape(count, -1)
+    similarities = matrix @ matrix.T
+
+    # Highest similarity of each candidate to the selected ones (0 while nothing is selected)
+    redundancy = np.zeros(count, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+    selected: List[int] = []
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not available[best]:
+            break
+
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarities[best])
+        if duplicate_threshold is not None:
+            available &= similarities[best] <= duplicate_threshold
+
+    return selected
+
+
+def diversify_rows(
+    rows: List[Dict[str, Any]],
+    k: int,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: Optional[float] = None,
+    embedding_key: str = "embedding",
+    score_key: str = "similarity",
+) -> List[Dict[str, Any]]:
+    """MMR-ordered top-k of search result rows carrying their embedding and similarity (see maximal_marginal_relevance)"""
+    if not rows:
+        return []
+
+    embeddings = np.stack([np.asarray(row[embedding_key], dtype=np.float32) for row in rows])
+    relevance = np.array([row[score_key] for row in rows], dtype=np.float32)
+    return [rows[index] for index in maximal_marginal_relevance(embeddings, relevance, k, lambda_mult, duplicate_threshold)]
+
+
+_snapshots: Dict[str, Optional[VectorSnapshot]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_vector_snapshot(table: str) -> Optional[VectorSnapshot]:
+    """
+    Memory-mapped snapshot of a table if the memory backend is configured and the snapshot loads
+
+    A failed load is logged once and remembered, callers then keep using pgvector.
+    """
+    if RAG_SEARCH_BACKEND != "memory":
+        return None
+
+    with _snapshots_lock:
+        if table not in _snapshots:
+            try:
+                _snapshots[table] = VectorSnapshot.load(SNAPSHOT_DIR, table)
+                logger.info(f"Loaded vector snapshot {table}: {len(_snapshots[table].rows)} rows")
+            except Exception as e:
+                logger.error(f"Cannot load vector snapshot {table} from {SNAPSHOT_DIR}, using pgvector: {str(e)}")
+                _snapshots[table] = None
+        return _snapshots[table]
+
+
+def reset_vector_snapshots() -> None:
+    """Forget loaded snapshots (the next search maps the current files)"""
+    with _snapshots_lock:
+        _snapshots.clear()
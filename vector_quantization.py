@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Vector Quantization
+Reduced-precision HNSW searches over the full-precision RAG vector columns
+
+Embeddings stay stored as `vector` columns (ingestion is unchanged); a quantized search orders
+rows by an expression that an HNSW expression index covers (`python db_manage.py create-hnsw-index`):
+* halfvec - half-precision copy of each vector in the index (half the index size)
+* binary  - binary_quantize() bit vectors compared by hamming distance (1/32 of the size)
+Both can search a Matryoshka-style prefix of the embedding (`dimensions`; nomic-embed-text v1.5
+is trained for 768, 512, 256, 128 and 64). Quantized searches fetch limit * rerank_factor
+candidates and rescore them with the full-precision cosine distance, so returned similarities
+are exact.
+"""
+
+from dataclasses import dataclass
+
+from workload_config import AGENT_CONFIG
+
+SECTION = "VectorQuantization"
+
+QUANTIZATION_MODES = ("full", "halfvec", "binary")
+
+# Tables whose searches follow the [VectorQuantization] configuration
+QUANTIZED_TABLES = ("rag_vectors", "rag_qa_vectors")
+
+EMBEDDING_DIMENSION = AGENT_CONFIG.getint("Embedder", "dimension", fallback=768)
+DEFAULT_RERANK_FACTOR = AGENT_CONFIG.getint(SECTION, "rerank_factor", fallback=4)
+
+
+@dataclass(frozen=True)
+class VectorStorage:
+    """Search representation of a vector column: precision mode and searched prefix length"""
+
+    mode: str = "full"
+    dimensions: int = EMBEDDING_DIMENSION
+    rerank_factor: int = DEFAULT_RERANK_FACTOR
+
+    def __post_init__(self):
+        if self.mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown vector storage '{self.mode}', available: {', '.join(QUANTIZATION_MODES)}")
+        if not 0 < self.dimensions <= EMBEDDING_DIMENSION:
+            raise ValueError(f"Vector storage dimensions must be between 1 and {EMBEDDING_DIMENSION}, got {self.dimensions}")
+
+    @classmethod
+    def parse(cls, value: str, rerank_factor: int = DEFAULT_RERANK_FACTOR) -> "VectorStorage":
+        """Storage from `mode` or `mode:dimensions` (e.g. `halfvec:256`)"""
+        mode, _, dimensions = value.strip().partition(":")
+        return cls(mode=mode, dimensions=int(dimensions) if dimensions else EMBEDDING_DIMENSION, rerank_factor=rerank_factor)
+
+    @property
+    def is_exact(self) -> bool:
+        return self.mode == "full" and self.dimensions == EMBEDDING_DIMENSION
+
+    @property
+    def label(self) -> str:
+        return f"{self.mode}{self.dimensions}"
+
+    @property
+    def operator(self) -> str:
+        return "<~>" if self.mode == "binary" else "<=>"
+
+    @property
+    def opclass(self) -> str:
+        return {"full": "vector_cosine_ops", "halfvec": "halfvec_cosine_ops", "binary": "bit_hamming_ops"}[self.mode]
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return {"full": 4 * self.dimensions, "halfvec": 2 * self.dimensions, "binary": (self.dimensions + 7) // 8}[self.mode]
+
+    def expression(self, vector: str) -> str:
+        """SQL expression of a vector column or query vector in this representation"""
+        if self.is_exact:
+            return vector
+
+        if self.dimensions < EMBEDDING_DIMENSION:
+            vector = f"subvector({vector}, 1, {self.dimensions})"
+        if self.mode == "binary":
+            return f"binary_quantize({vector})::bit({self.dimensions})"
+        return f"({vector})::{'halfvec' if self.mode == 'halfvec' else 'vector'}({self.dimensions})"
+
+    def index_name(self, base_name: str) -> str:
+        """Name of the HNSW index of this representation, derived from the full-precision index name"""
+        if self.is_exact:
+            return base_name
+        return base_name.replace("_hnsw_idx", f"_{self.label}_hnsw_idx")
+
+    def index_sql(self, index_name: str, table: str, column: str, where: str = "") -> str:
+        """CREATE INDEX statement named index_name (m and ef_construction are the two parameters), optionally partial"""
+        target = column if self.is_exact else f"({self.expression(column)})"
+        return f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING hnsw ({target} {self.opclass}) WITH (m = %s, ef_construction = %s)" + (
+            f" WHERE {where}" if where else ""
+        )
+
+    def candidates_sql(self, columns: str, source: str, column: str, query: str, where: str = "") -> str:
+        """
+        Top-k query ordered by distance between `column` and `query` (see limit_params for its LIMIT parameters)
+
+        `columns` must select the full-precision `similarity`; approximate candidates are
+        rescored by it.
+        """
+        where_clause = f"WHERE {where}" if where else ""
+        if self.is_exact:
+            return f"""
+                SELECT {columns}
+                FROM {source}
+                {where_clause}
+                ORDER BY {column} <=> {query}
+                LIMIT %s
+            """
+
+        return f"""
+            SELECT * FROM (
+                SELECT {columns}
+                FROM {source}
+                {where_clause}
+                ORDER BY {self.expression(column)} {self.operator} {self.expression(query)}
+                LIMIT %s
+            ) quantized
+            ORDER BY similarity DESC
+            LIMIT %s
+        """
+
+    def limit_params(self, limit: int) -> tuple:
+        if self.is_exact:
+            return (limit,)
+        return (limit * self.rerank_factor, limit)
+
+
+def vector_storage(table: str) -> VectorStorage:
+    """
+    Configured search representation of a table ([VectorQuantization] <table> = mode, <table>_dimensions = N)
+
+    Tables outside QUANTIZED_TABLES are always searched with full precision.
+    """
+    if table not in QUANTIZED_TABLES:
+        return VectorStorage()
+
+    return VectorStorage(
+        mode=AGENT_CONFIG.get(SECTION, table, fallback="full"),
+        dimensions=AGENT_CONFIG.getint(SECTION, f"{table}_dimensions", fallback=EMBEDDING_DIMENSION),
+    )
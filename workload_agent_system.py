@@ -4,36 +4,96 @@ Agent-Based LLM System
 New agent-based architecture for processing user messages
 """
 
+import asyncio
 import logging
-from typing import Type
+import time
+from typing import Dict, Optional, Tuple, Type
 
 # Import agent classes
-from agents.base_agent import Agent
+from agents.base_agent import Agent, AgentResult
 from agents.fallback_agent import FallbackAgent
 from agents.simple_fallback_agent import SimpleFallbackAgent
 from agents.t3rn_agent import T3RNAgent
+from async_runtime import run_coroutine
+from cancellation import CancelScope, enter_scope, run_with_timeout
 from channel_logger import ChannelLogger
+from hedging import hedge_stats
 from session import Session
+from workload_config import AGENT_CONFIG
 
 # Logger
 logger = logging.getLogger("AgentSystem")
 
+# Seconds one agent of the cascade may take before its turn is cancelled and the next agent runs
+TURN_TIMEOUT = AGENT_CONFIG.getfloat("AgentSystem", "turn_timeout", fallback=60.0)
+# Seconds to answer a message with the whole cascade (session setting "message_deadline" overrides it)
+MESSAGE_DEADLINE = AGENT_CONFIG.getfloat("AgentSystem", "message_deadline", fallback=30.0)
+# Seconds an agent needs at least, with less time left the cascade skips to the next (cheaper) agent
+T3RN_MIN_BUDGET = AGENT_CONFIG.getfloat("AgentSystem", "t3rn_min_budget", fallback=8.0)
+FALLBACK_MIN_BUDGET = AGENT_CONFIG.getfloat("AgentSystem", "fallback_min_budget", fallback=3.0)
+# Start the FallbackAgent RAG preload with every message instead of after a T3RN failure
+SPECULATIVE_FALLBACK_RAG = AGENT_CONFIG.getboolean("AgentSystem", "speculative_fallback_rag", fallback=False)
+# Race a FallbackAgent turn against T3RN turns running longer than this quantile of T3RN latency
+HEDGE_FALLBACK = AGENT_CONFIG.getboolean("AgentSystem", "hedge_fallback", fallback=False)
+HEDGE_QUANTILE = AGENT_CONFIG.getfloat("AgentSystem", "hedge_quantile", fallback=0.95)
+HEDGE_MIN_SAMPLES = AGENT_CONFIG.getint("AgentSystem", "hedge_min_samples", fallback=20)
+
+
+def message_deadline(session: Session) -> float:
+    """Seconds to answer a message: the session setting if it is a positive number, else the configured deadline"""
+    try:
+        deadline = float(session.message_deadline) if session.message_deadline is not None else MESSAGE_DEADLINE
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid message_deadline setting {session.message_deadline!r}, using {MESSAGE_DEADLINE:.1f}s")
+        return MESSAGE_DEADLINE
+    return deadline if deadline > 0 else MESSAGE_DEADLINE
+
+
+# Agent that answered a message and its result
+TurnAnswer = Tuple[Agent, AgentResult]
+
+
+def session_agent(agent_class: Type[Agent], session: Session, channel_logger: ChannelLogger) -> Agent:
+    """
+    Agent of the session, created on its first message and reused afterwards
+
+    Reuse skips building the agent, its modules (config parsing) and its tool list on every
+    message; the agent only swaps its per-message state in begin_turn.
+    """
+    agent = session.agents.get(agent_class.__name__)
+    if agent is None:
+        agent = agent_class(session, channel_logger)
+        session.agents[agent_class.__name__] = agent
+    else:
+        agent.begin_turn(channel_logger)
+    return agent
+
 
 def process_llm_agents(user_message: str, session: Session, channel_logger: ChannelLogger) -> str:
+    """Synchronous entry point, runs process_llm_agents_async on the shared event loop"""
+    return run_coroutine(process_llm_agents_async(user_message, session, channel_logger))
+
+
+async def process_llm_agents_async(user_message: str, session: Session, channel_logger: ChannelLogger) -> str:
     session.action_id += 1
     action_id = session.action_id
 
     channel_logger.set_action_id(action_id)
     channel_logger.log_to_logs(f"🚀 Starting agent-based processing [Action {action_id}]")
 
-    def run_agent(agent_class: Type[Agent], session: "Session", user_message: str) -> str | None:
+    # Agents that ran for this message by class name (the session drops failed ones)
+    turn_agents: Dict[str, Agent] = {}
+
+    async def run_agent(agent_class: Type[Agent], session: "Session", user_message: str) -> TurnAnswer | None:
         agent_type = agent_class.__name__
         channel_logger.log_to_logs(f"🤖 Executing {agent_type}")
 
         try:
-            agent = agent_class(session, channel_logger)
+            agent = session_agent(agent_class, session, channel_logger)
+            turn_agents[agent_type] = agent
 
-            result = agent.execute(user_message)
+            # Past the turn (or message) deadline the turn is cancelled, including its OpenAI request and database queries
+            result = await run_with_timeout(agent.execute_async(user_message), TURN_TIMEOUT, f"{agent_type} exceeded the turn or message deadline")
 
             if result.final_answer is not None:
                 channel_logger.log_to_logs(f"✅ {agent_type} provided final answer")
@@ -41,39 +101,144 @@ def process_llm_agents(user_message: str, session: Session, channel_logger: Chan
                 if result.error_content:
                     channel_logger.log_error(result.error_content)
 
-                return result.final_answer
+                return agent, result
 
             else:
                 channel_logger.log_to_logs(f"⚠️ {agent_type} failed to provide a final answer")
+                # A failed agent is rebuilt on the next message, it may be left in a broken state
+                session.agents.pop(agent_type, None)
                 return None
 
         except Exception as e:
             channel_logger.log_to_logs(f"❌ {agent_type} error: {str(e)}")
+            session.agents.pop(agent_type, None)
             channel_logger.log_error(str(e))
             return None
 
+    deadline = message_deadline(session)
+    message_scope = CancelScope(deadline)
+    channel_logger.log_to_logs(f"⏱️ Message deadline {deadline:.1f}s")
+
+    def fits_budget(agent_class: Type[Agent], min_budget: float) -> bool:
+        remaining = message_scope.remaining()
+        if remaining < min_budget:
+            channel_logger.log_to_logs(f"⏭️ Skipping {agent_class.__name__}: {remaining:.1f}s left, needs {min_budget:.1f}s")
+            return False
+        return True
+
+    async def run_t3rn(hedge_delay: Optional[float]) -> Tuple[Optional[TurnAnswer], bool]:
+        """
+        T3RN turn, raced against a hedged FallbackAgent turn once it runs longer than hedge_delay
+
+        Returns:
+            The answer and whether FallbackAgent already ran as a hedge
+        """
+        start_time = time.monotonic()
+        t3rn_task = asyncio.ensure_future(run_agent(T3RNAgent, session, user_message))
+
+        if hedge_delay is not None:
+            await asyncio.wait({t3rn_task}, timeout=hedge_delay)
+
+        if hedge_delay is None or t3rn_task.done() or not fits_budget(FallbackAgent, FALLBACK_MIN_BUDGET):
+            answer = await t3rn_task
+            if answer is not None:
+                hedge_stats.t3rn_latency.record(time.monotonic() - start_time)
+            return answer, False
+
+        channel_logger.log_to_logs(f"🏁 T3RNAgent running past p{HEDGE_QUANTILE * 100:.0f} ({hedge_delay:.1f}s), starting hedged FallbackAgent")
+        fallback_task = asyncio.ensure_future(run_agent(FallbackAgent, session, user_message))
+
+        # First answer wins, a turn that failed leaves the race to the other one
+        answer: Optional[TurnAnswer] = None
+        winner = None
+        pending = {t3rn_task, fallback_task}
+        while pending and answer is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: task is not t3rn_task):
+                if answer is None and task.result() is not None:
+                    answer, winner = task.result(), task
+
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        t3rn_agent = turn_agents.get(T3RNAgent.__name__)
+        fallback_agent = turn_agents.get(FallbackAgent.__name__)
+        fallback_won = winner is fallback_task
+        if winner is t3rn_task:
+            hedge_stats.t3rn_latency.record(time.monotonic() - start_time)
+        elif t3rn_task in pending:
+            # Lower bound of the cancelled turn, keeps slow turns in the hedge delay
+            hedge_stats.t3rn_latency.record(time.monotonic() - start_time)
+            # A cancelled turn may leave the agent in a broken state, like a failed one
+            session.agents.pop(T3RNAgent.__name__, None)
+        if fallback_task in pending:
+            session.agents.pop(FallbackAgent.__name__, None)
+
+        hedge_stats.record_hedge(
+            fallback_won=fallback_won,
+            hedge_tokens=fallback_agent.turn_tokens if fallback_agent is not None else 0,
+            abandoned_tokens=t3rn_agent.turn_tokens if fallback_won and t3rn_agent is not None else 0,
+        )
+        channel_logger.log_to_logs(f"🏁 Hedge won by {'FallbackAgent' if fallback_won else 'T3RNAgent' if winner else 'neither agent'}")
+        return answer, True
+
     # TODO note for future
     # What if T3RN Agents sets context into unrecoverable state that will cause
     # Fallback to fail as well?
     # Context should be isolated between runs
+    start_time = time.monotonic()
+    final_answer: Optional[TurnAnswer] = None
+    fallback_ran = False
+
+    # Agents of the cascade run in the message scope, their turn deadline never exceeds the message deadline
+    with enter_scope(message_scope):
+        preload_agent = session_agent(FallbackAgent, session, channel_logger) if SPECULATIVE_FALLBACK_RAG else None
+        if preload_agent is not None:
+            preload_agent.preload_knowledge(user_message)
+
+        if fits_budget(T3RNAgent, T3RN_MIN_BUDGET):
+            hedge_delay = hedge_stats.hedge_delay(HEDGE_QUANTILE, HEDGE_MIN_SAMPLES) if HEDGE_FALLBACK else None
+            try:
+                final_answer, fallback_ran = await run_t3rn(hedge_delay)
+            except Exception as e:
+                channel_logger.log_to_logs(f"❌ T3RNAgent failed me: {str(e)}")
+                channel_logger.log_error(str(e))
+                final_answer = None
+
+            if final_answer is None and not fallback_ran:
+                channel_logger.log_to_logs("🔄 Attempting FallbackAgent due to T3RNAgent failure")
+
+        if final_answer is None and not fallback_ran and fits_budget(FallbackAgent, FALLBACK_MIN_BUDGET):
+            try:
+                final_answer = await run_agent(FallbackAgent, session, user_message)
+            except Exception as e:
+                channel_logger.log_to_logs(f"❌ This moron FallbackAgent failed as well: {str(e)}")
+                channel_logger.log_error(str(e))
+                final_answer = None
+
+        if preload_agent is not None:
+            hedge_stats.record_preload(used=not preload_agent.cancel_preload())
+
+    # The emergency fallback answers instantly and runs even past the message deadline
+    if final_answer is None:
+        channel_logger.log_to_logs("⚠️ Using emergency fallback due to FallbackAgent failure")
+
+        final_answer = await run_agent(SimpleFallbackAgent, session, user_message)
+
+    if final_answer is None:
+        hedge_stats.message_latency.record(time.monotonic() - start_time)
+        return "ERROR 1138: Primary directive compromised. Rebooting memory core"
+
+    # Only the answer the player gets enters the conversation (cancelled or losing turns never
+    # commit); shielded so a cancelled caller cannot leave memory half summarized
+    agent, result = final_answer
     try:
-        final_answer = run_agent(T3RNAgent, session, user_message)
+        await asyncio.shield(agent.commit_turn_async(result))
     except Exception as e:
-        channel_logger.log_to_logs(f"❌ T3RNAgent failed me: {str(e)}")
+        channel_logger.log_to_logs(f"❌ Failed to store {type(agent).__name__} answer in memory: {str(e)}")
         channel_logger.log_error(str(e))
-        final_answer = None
-
-    if final_answer is None:
-        channel_logger.log_to_logs("🔄 Attempting FallbackAgent due to T3RNAgent failure")
-        try:
-            final_answer = run_agent(FallbackAgent, session, user_message)
-        except Exception as e:
-            channel_logger.log_to_logs(f"❌ This moron FallbackAgent failed as well: {str(e)}")
-            channel_logger.log_error(str(e))
-            final_answer = None
-    if final_answer is None:
-        channel_logger.log_to_logs("⚠️ Using emergency fallback due to FallbackAgent failure")
 
-        final_answer = run_agent(SimpleFallbackAgent, session, user_message) or "ERROR 1138: Primary directive compromised. Rebooting memory core"
+    hedge_stats.message_latency.record(time.monotonic() - start_time)
 
-    return final_answer
+    return result.final_answer
@@ -3,10 +3,16 @@ import time
 
 # Import agent system
 from agents.memory_manager import MemoryManager
+from agents.prompt_cache import provider_cache_usage, system_prompt_cache
 
 # Import channel logger
 from channel_logger import ChannelLogger
+from context_packer import packing_totals
+from hedging import hedge_stats
+from llm_clients import client_registry
 from session import Session
+from tool_cache import tool_response_cache
+from tools.db_rag_common import rag_search_cache
 from workload_agent_system import process_llm_agents
 from workload_tools import ContextAdapter, create_response, send_response
 
@@ -50,6 +56,14 @@ def process_main_channel(client, session: "Session"):
         channel_logger.log_to_logs(f"✅ Agent processing completed in {process_time:.2f} seconds")
         channel_logger.log_to_logs(f"📝 Answer length: {len(final_answer)} characters")
         session.memory_manager.log_memory()
+        channel_logger.log_to_caches(rag_search_cache.format_stats())
+        channel_logger.log_to_caches(packing_totals.format_stats())
+        channel_logger.log_to_caches(system_prompt_cache.format_stats())
+        channel_logger.log_to_caches(provider_cache_usage.format_stats())
+        channel_logger.log_to_caches(client_registry.format_stats())
+        channel_logger.log_to_caches(hedge_stats.format_stats())
+        channel_logger.log_to_caches(session.memory_manager.tool_results.format_stats())
+        channel_logger.log_to_caches(tool_response_cache.format_stats())
 
         chat_response = create_response(0, final_answer, session_id, message_id)
         send_response(client, chat_response, session_id, channel or 0, message_id)
@@ -68,4 +82,7 @@ def process_main_channel(client, session: "Session"):
 
         channel_logger.log_to_chat(f"Error processing your question: {str(e)}")
     finally:
+        if session.rag_prefetch is not None:
+            session.rag_prefetch.cancel()
+            session.rag_prefetch = None
         channel_logger.flush_all_buffers()
@@ -11,7 +11,9 @@ from dotenv import dotenv_values, load_dotenv
 
 from db_postgres import initialize_postgres_db
 from game_state_parser.parser import GameStateParser
+from rag_prefetch import start_rag_prefetch
 from session import Session
+from tools.db_rag_common import build_lexical_indexes, verify_embedding_compatibility
 from workload_chat import process_main_channel
 from workload_config import SERVER_HOST, SERVER_PORT, WORKLOAD_CONFIG
 from workload_tools import create_response, send_message, send_response
@@ -151,6 +153,9 @@ def process_message(client, message):
             process_initialization_message(client, session)
         elif message_type == "process":
             #  - {'type': 'process', 'text': 'Hello friend', 'channel': 0, 'session_id': '5YG83K', 'message_id': 1752050086246}
+            if session.channel == 0:
+                # Start embedding and likely RAG searches while the agent assembles its prompt
+                session.rag_prefetch = start_rag_prefetch(session)
             process_text_message(client, session)
         elif message_type == "settings":
             process_settings_message(client, session, data)
@@ -383,7 +388,9 @@ def reconnect_loop():
         # Reset retry interval on successful connection
         retry_interval = 1
 
-        initialize_postgres_db()
+        if initialize_postgres_db():
+            verify_embedding_compatibility()
+            build_lexical_indexes()
 
         try:
             # Register workload